@@ -0,0 +1,97 @@
+"""
+Size and time of the admin data export as gzip CSV and as Parquet.
+
+Fills a synthetic table shaped like `chatgpt_messages` (bigint, boolean,
+timestamp and text columns) and exports it with both writers of
+`app.database.export`. Uses a temporary SQLite file unless `--database-url`
+is given (e.g. a PostgreSQL DSN). Parquet needs pyarrow: pip install ".[parquet]".
+
+    python benchmarks/export_formats.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+# Settings require these variables, the benchmark does not contact Telegram
+os.environ.setdefault("BOT_TOKEN", "1234567890:" + "A" * 35)
+os.environ.setdefault("SUPERUSER_USERNAME", "admin")
+os.environ.setdefault("SUPERUSER_USER_ID", "1")
+
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, MetaData, String, Table, create_engine, insert  # noqa: E402
+
+from app.database.export import EXPORT_FORMATS  # noqa: E402
+
+WORDS = "the bot user message reply export table row chat item category search admin".split()
+
+
+def create_table(engine, rows: int, batch: int = 50000) -> Table:
+    """Create and fill a table of `rows` synthetic rows, written `batch` at a time."""
+    metadata = MetaData()
+    table = Table(
+        "benchmark_messages",
+        metadata,
+        Column("id", BigInteger, primary_key=True),
+        Column("chat_id", BigInteger),
+        Column("is_assistant", Boolean),
+        Column("content", String),
+        Column("created_at", DateTime),
+    )
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    random.seed(0)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as connection:
+        for offset in range(0, rows, batch):
+            connection.execute(
+                insert(table),
+                [
+                    {
+                        "id": number,
+                        "chat_id": random.randrange(10_000) + 10**9,
+                        "is_assistant": number % 2 == 1,
+                        "content": " ".join(random.choices(WORDS, k=random.randint(3, 30))),
+                        "created_at": start + timedelta(seconds=number),
+                    }
+                    for number in range(offset, min(offset + batch, rows))
+                ],
+            )
+    return table
+
+
+def main() -> None:
+    """Export the table in each format and print the duration and file size."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(args.database_url or f"sqlite:///{directory}/benchmark.db")
+        started = time.perf_counter()
+        table = create_table(engine, args.rows)
+        print(f"Filled {args.rows} rows in {time.perf_counter() - started:.1f}s\n")
+
+        print(f"{'format':<10}{'size MB':>10}{'seconds':>10}{'rows/s':>12}")
+        for name, (suffix, write_table) in EXPORT_FORMATS.items():
+            path = os.path.join(directory, f"{table.name}{suffix}")
+            started = time.perf_counter()
+            try:
+                rows = write_table(engine, table, path, args.chunk_size)
+            except ImportError as e:
+                print(f"{name:<10}{e}")
+                continue
+            elapsed = time.perf_counter() - started
+            print(f"{name:<10}{os.path.getsize(path) / 2**20:>10.1f}{elapsed:>10.2f}{rows / elapsed:>12.0f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
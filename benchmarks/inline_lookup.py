@@ -0,0 +1,174 @@
+"""
+Typing latency of the inline item lookup (`@bot <query>`), with and without the match cache.
+
+Fills `items` with synthetic notes, then replays typing sessions: each
+keystroke is an inline query run through the user middleware and the items
+inline handler as the bot does, with Telegram calls recorded instead of sent.
+Prints the latency per keystroke and the share of keystrokes that queried the
+database. Uses a temporary SQLite file unless `--database-url` is given (e.g.
+a PostgreSQL DSN of an empty database, whose bot tables are dropped before
+and after the run).
+
+    python benchmarks/inline_lookup.py --items 200000 --users 2000 --sessions 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+# Settings require these variables, the benchmark does not contact Telegram
+os.environ.setdefault("BOT_TOKEN", "1234567890:" + "A" * 35)
+os.environ.setdefault("SUPERUSER_USERNAME", "admin")
+os.environ.setdefault("SUPERUSER_USER_ID", "1")
+
+from sqlalchemy import create_engine, func, insert, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from telebot import types  # noqa: E402
+
+from app.database.migrate import migrate  # noqa: E402
+from app.items.cache import item_match_cache  # noqa: E402
+from app.items.handlers import register_handlers  # noqa: E402
+from app.items.models import Item  # noqa: E402
+from app.middleware.database import LazySession, finish_session  # noqa: E402
+from app.middleware.user import UserInlineQueryMiddleware  # noqa: E402
+from app.models import Base  # noqa: E402
+from app.users.activity import activity_tracker  # noqa: E402
+from app.users.cache import user_cache  # noqa: E402
+from app.users.models import User  # noqa: E402
+
+WORDS = (
+    "milk bread groceries gym plan squats garden seeds travel tickets passport books movies recipe soup "
+    "meeting notes budget taxes car service doctor dentist birthday gift password wifi project ideas"
+).split()
+
+
+class RecordingBot:
+    """Collects the inline handler of the items module and counts the answers, without calling Telegram."""
+
+    def __init__(self) -> None:
+        """Start with no handler and no answer."""
+        self.inline_handlers = []
+        self.answers = 0
+
+    def inline_handler(self, **kwargs):
+        """Collect the decorated inline handler."""
+        def decorator(handler):
+            self.inline_handlers.append(handler)
+            return handler
+
+        return decorator
+
+    def __getattr__(self, name):
+        """Return a decorator leaving the handler as it is."""
+        # message_handler, callback_query_handler...: registered handlers are not needed
+        return lambda *args, **kwargs: (lambda handler: handler)
+
+    def answer_inline_query(self, *args, **kwargs) -> None:
+        """Count the answer."""
+        self.answers += 1
+
+
+def fill(engine, items: int, users: int, batch: int = 50000) -> None:
+    """Insert the users and `items` items, most of them owned by a few users, `batch` at a time."""
+    with engine.begin() as connection:
+        connection.execute(
+            insert(User.__table__), [{"id": n, "username": f"user{n}", "role_id": 2} for n in range(1, users + 1)]
+        )
+        for offset in range(0, items, batch):
+            connection.execute(
+                insert(Item.__table__),
+                [
+                    {
+                        "name": " ".join(random.choices(WORDS, k=random.randint(1, 3))),
+                        "content": " ".join(random.choices(WORDS, k=random.randint(3, 20))),
+                        "category": 1,
+                        # Skewed: a few users own thousands of items
+                        "owner_id": min(int(users ** random.random()), users),
+                    }
+                    for _ in range(offset, min(offset + batch, items))
+                ],
+            )
+
+
+def typing_sessions(sessions: int, users: int) -> list[tuple[int, list[str]]]:
+    """Return the user and the successive queries of each session, one per keystroke."""
+    replayed = []
+    for _ in range(sessions):
+        text = " ".join(random.sample(WORDS, random.randint(1, 2)))
+        replayed.append((random.randint(1, users), [text[:end] for end in range(len(text) + 1)]))
+    return replayed
+
+
+def replay(session_factory, sessions: list[tuple[int, list[str]]]) -> tuple[list[float], int]:
+    """Run each keystroke through the user middleware and the handler, return the timings and the queried count."""
+    bot = RecordingBot()
+    register_handlers(bot)
+    (inline_lookup,) = bot.inline_handlers
+    middleware = UserInlineQueryMiddleware(bot)
+
+    timings, queried = [], 0
+    for user_id, queries in sessions:
+        from_user = types.User(id=user_id, is_bot=False, first_name="User", username=f"user{user_id}")
+        for number, query in enumerate(queries):
+            inline_query = types.InlineQuery(id=str(number), from_user=from_user, query=query, offset="")
+            started = time.perf_counter()
+            # The database and user middlewares, then the handler
+            data = {"db_session": LazySession(session_factory)}
+            middleware.pre_process(inline_query, data)
+            inline_lookup(inline_query, data)
+            queried += data["db_session"].created
+            finish_session(data["db_session"], inline_query, None)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings, queried
+
+
+def main() -> None:
+    """Fill the items, replay the typing sessions and print the latency per keystroke."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(args.database_url or f"sqlite:///{directory}/benchmark.db")
+        Base.metadata.drop_all(engine)
+        migrate(engine)
+        fill(engine, args.items, args.users)
+        session_factory = sessionmaker(bind=engine)
+        # The user middleware records the activity of the benchmark users
+        activity_tracker.session_factory = session_factory
+        with session_factory() as session:
+            counts = select(func.count(Item.id)).group_by(Item.owner_id)
+            owned = session.scalar(counts.order_by(func.count(Item.id).desc()).limit(1))
+        print(f"{args.items} items of {args.users} users, the largest owner has {owned}\n")
+
+        sessions = typing_sessions(args.sessions, args.users)
+        keystrokes = sum(len(queries) for _, queries in sessions)
+        print(f"{'match cache':<14}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'db queried':>12}")
+        for label, ttl in (("off", 0.0), ("on", item_match_cache.ttl or 30.0)):
+            user_cache.clear()
+            item_match_cache.clear()
+            item_match_cache.ttl = ttl
+            timings, queried = replay(session_factory, sessions)
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            print(
+                f"{label:<14}{statistics.median(timings):>10.2f}{p95:>10.2f}{max(timings):>10.2f}"
+                f"{queried / keystrokes:>12.0%}"
+            )
+        activity_tracker.stop()
+        if args.database_url:
+            Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
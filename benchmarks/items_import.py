@@ -0,0 +1,85 @@
+"""
+Duration of the bulk import and export of a user's items.
+
+Writes a CSV file of synthetic items, imports it with `import_items` as the
+document handler's background job does, then exports the user's items in
+each format. Uses a temporary SQLite file unless `--database-url` is given
+(e.g. a PostgreSQL DSN of an empty database, whose bot tables are dropped
+before and after the run).
+
+    python benchmarks/items_import.py --items 10000
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+# Settings require these variables, the benchmark does not contact Telegram
+os.environ.setdefault("BOT_TOKEN", "1234567890:" + "A" * 35)
+os.environ.setdefault("SUPERUSER_USERNAME", "admin")
+os.environ.setdefault("SUPERUSER_USER_ID", "1")
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database.migrate import migrate  # noqa: E402
+from app.items.transfer import ITEM_EXPORT_FORMATS, export_items, import_items  # noqa: E402
+from app.models import Base  # noqa: E402
+from app.reference_cache import reference_cache  # noqa: E402
+from app.users.models import User  # noqa: E402
+
+WORDS = "milk bread call mom plan trip book notes gym budget idea recipe garden meeting draft".split()
+
+
+def items_csv(items: int) -> bytes:
+    """Return a CSV file of `items` synthetic items."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["name", "content", "category"])
+    for number in range(items):
+        content = " ".join(random.choices(WORDS, k=random.randint(5, 60)))
+        writer.writerow([f"{random.choice(WORDS)} {number}", content, random.choice(["", "1"])])
+    return buffer.getvalue().encode()
+
+
+def main() -> None:
+    """Import the items of a CSV file, export them in each format and print the durations."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(args.database_url or f"sqlite:///{directory}/benchmark.db")
+        Base.metadata.drop_all(engine)
+        migrate(engine)
+        reference_cache.session_factory = sessionmaker(bind=engine)
+        reference_cache.invalidate()
+        with engine.begin() as connection:
+            connection.execute(insert(User.__table__), [{"id": 1, "username": "user1", "role_id": 2}])
+
+        data = items_csv(args.items)
+        report = import_items(engine, 1, "items.csv", data, chunk_size=args.chunk_size, max_items=args.items)
+        print(f"Imported {report.items} items ({len(data) / 2**20:.1f} MB of CSV) in {report.seconds:.2f}s")
+
+        for export_format, (suffix, _) in ITEM_EXPORT_FORMATS.items():
+            path = os.path.join(directory, f"items{suffix}")
+            report = export_items(engine, 1, path, export_format, chunk_size=args.chunk_size)
+            size = os.path.getsize(path) / 2**20
+            print(f"Exported {report.items} items as {export_format} ({size:.1f} MB) in {report.seconds:.2f}s")
+
+        if args.database_url:
+            Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
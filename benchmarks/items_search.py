@@ -0,0 +1,124 @@
+"""
+Latency of the owner-scoped full-text search of `/search` over synthetic items.
+
+Fills `items` with notes written from a Zipf-distributed vocabulary, indexed
+by the migration `v0005_items_search`, then times `search_items` for random
+owners with common, rare and two-word queries. Uses a temporary SQLite
+file unless `--database-url` is given (e.g. a PostgreSQL DSN of an empty
+database, whose bot tables are dropped before and after the run).
+
+    python benchmarks/items_search.py --items 1000000 --users 10000
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+# Settings require these variables, the benchmark does not contact Telegram
+os.environ.setdefault("BOT_TOKEN", "1234567890:" + "A" * 35)
+os.environ.setdefault("SUPERUSER_USERNAME", "admin")
+os.environ.setdefault("SUPERUSER_USER_ID", "1")
+
+from sqlalchemy import create_engine, insert, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database.migrate import migrate  # noqa: E402
+from app.items.models import Item  # noqa: E402
+from app.items.search import search_items  # noqa: E402
+from app.models import Base  # noqa: E402
+from app.users.models import User  # noqa: E402
+
+SYLLABLES = "ka lo mi ne ru sa to vi de po la me ni so tu ba ge ri wo zu".split()
+
+
+def vocabulary(size: int) -> list[str]:
+    """Return `size` distinct made-up words, sorted."""
+    words = set()
+    while len(words) < size:
+        words.add("".join(random.choices(SYLLABLES, k=random.randint(2, 4))))
+    return sorted(words)
+
+
+def fill(engine, items: int, users: int, words: list[str], batch: int = 50000) -> None:
+    """Insert the users and `items` notes written from `words`, `batch` at a time."""
+    # Zipf-like frequencies: the word of rank r appears about 1/r as often as the most common one
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    with engine.begin() as connection:
+        connection.execute(
+            insert(User.__table__), [{"id": n, "username": f"user{n}", "role_id": 2} for n in range(1, users + 1)]
+        )
+        for offset in range(0, items, batch):
+            connection.execute(
+                insert(Item.__table__),
+                [
+                    {
+                        "name": " ".join(random.choices(words, cum_weights=weights, k=random.randint(1, 4))),
+                        "content": " ".join(random.choices(words, cum_weights=weights, k=random.randint(5, 40))),
+                        "category": 1,
+                        "owner_id": random.randint(1, users),
+                    }
+                    for _ in range(offset, min(offset + batch, items))
+                ],
+            )
+        connection.execute(text("ANALYZE"))
+
+
+def queries(words: list[str], count: int) -> dict[str, list[str]]:
+    """Return `count` common, rare and two-word queries."""
+    common, rare = words[:20], words[len(words) // 2 :]
+    return {
+        "common": [random.choice(common) for _ in range(count)],
+        "rare": [random.choice(rare) for _ in range(count)],
+        "two words": [f"{random.choice(common)} {random.choice(rare)}" for _ in range(count)],
+    }
+
+
+def main() -> None:
+    """Fill the items and print the search latency of each kind of query."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--words", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(args.database_url or f"sqlite:///{directory}/benchmark.db")
+        Base.metadata.drop_all(engine)
+        migrate(engine)
+        words = vocabulary(args.words)
+        started = time.perf_counter()
+        fill(engine, args.items, args.users, words)
+        print(f"Indexed {args.items} items of {args.users} users in {time.perf_counter() - started:.1f}s\n")
+
+        print(f"{'query':<12}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'results':>10}")
+        with Session(engine) as session:
+            for kind, texts in queries(words, args.queries).items():
+                timings, results = [], 0
+                for query in texts:
+                    owner_id = random.randint(1, args.users)
+                    started = time.perf_counter()
+                    page = search_items(session, owner_id, query)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    results += len(page.items)
+                p95 = statistics.quantiles(timings, n=20)[-1]
+                print(
+                    f"{kind:<12}{statistics.median(timings):>10.2f}{p95:>10.2f}{max(timings):>10.2f}"
+                    f"{results / len(texts):>10.1f}"
+                )
+        if args.database_url:
+            Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
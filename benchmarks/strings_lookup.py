@@ -0,0 +1,53 @@
+"""
+Micro-benchmark of string lookups: OmegaConf `DictConfig` against the compiled catalog.
+
+Times the lookups a handler and its markup builder do per update: a nested
+title, iterating menu options and formatting a template.
+
+    python benchmarks/strings_lookup.py --number 100000
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from omegaconf import OmegaConf  # noqa: E402
+
+from app.catalog import catalog  # noqa: E402
+
+
+def lookups(strings: dict) -> None:
+    """Read and format the strings a /menu update and a user lookup use, in both languages."""
+    for lang in ("en", "ru"):
+        _ = strings["menu"][lang].main_menu.title
+        for option in strings["menu"][lang].main_menu.options:
+            _ = option.label, option.value
+        strings["users"][lang].block_user_confirm.format(user_id=42)
+        strings["users"][lang].user_info_template.format(
+            user_id=42, username="john", first_name="John", last_name="Doe", role="user", is_blocked=False
+        )
+
+
+def main() -> None:
+    """Time the lookups on the OmegaConf configs and on the catalog."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--number", type=int, default=20000, help="Iterations per variant")
+    args = parser.parse_args()
+
+    omegaconf_strings = {
+        feature: OmegaConf.load(catalog.root / feature / "config.yaml").strings for feature in ("menu", "users")
+    }
+    catalog_strings = {feature: catalog.strings(feature) for feature in ("menu", "users")}
+
+    results = {}
+    for name, strings in (("OmegaConf", omegaconf_strings), ("catalog", catalog_strings)):
+        seconds = min(timeit.repeat(lambda strings=strings: lookups(strings), number=args.number, repeat=3))
+        results[name] = seconds / args.number * 1e6
+        print(f"{name:<12}{results[name]:>10.2f} us per update")
+    print(f"{'speedup':<12}{results['OmegaConf'] / results['catalog']:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
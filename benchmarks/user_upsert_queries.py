@@ -0,0 +1,98 @@
+"""
+Queries per update of the user upsert run by the user middlewares: the former
+SELECT + `update_user`/`create_user` path against the single-statement upsert.
+
+Counts SQL statements and commits per update and the time per update. Uses a
+temporary SQLite file unless `--database-url` is given (e.g. a PostgreSQL DSN).
+
+    python benchmarks/user_upsert_queries.py --updates 2000 --users 100
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+# Settings require these variables, the benchmark does not contact Telegram
+os.environ.setdefault("BOT_TOKEN", "1234567890:" + "A" * 35)
+os.environ.setdefault("SUPERUSER_USERNAME", "admin")
+os.environ.setdefault("SUPERUSER_USER_ID", "1")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import app.items.models  # noqa: E402, F401
+from app.models import Base  # noqa: E402
+from app.users.models import Role, User  # noqa: E402
+from app.users.service import create_user, update_user, upsert_user  # noqa: E402
+
+
+def legacy_upsert(db_session, user_id: int, username: str, first_name: str, last_name: str) -> User:
+    """The upsert as it was: SELECT, then update_user or create_user, each committing and closing the session."""
+    db_session.expire_on_commit = False
+    try:
+        user = db_session.query(User).filter(User.id == user_id).first()
+        write = update_user if user else create_user
+        user = write(db_session, user_id=user_id, username=username, first_name=first_name, last_name=last_name)
+    finally:
+        db_session.close()
+    return user
+
+
+def run(name: str, upsert, engine, session_factory, updates: list[int]) -> None:
+    """Replay the updates with `upsert` and print the statements and commits per update and its duration."""
+    counts = {"statements": 0, "commits": 0}
+    on_execute = lambda *args: counts.__setitem__("statements", counts["statements"] + 1)  # noqa: E731
+    on_commit = lambda *args: counts.__setitem__("commits", counts["commits"] + 1)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", on_execute)
+    event.listen(engine, "commit", on_commit)
+
+    started = time.perf_counter()
+    for user_id in updates:
+        # One update as the middlewares see it: a session, the upsert and its commit
+        session = session_factory()
+        upsert(session, user_id=user_id, username=f"user{user_id}", first_name="First", last_name="Last")
+        session.commit()
+        session.close()
+    elapsed = time.perf_counter() - started
+
+    event.remove(engine, "before_cursor_execute", on_execute)
+    event.remove(engine, "commit", on_commit)
+    print(
+        f"{name:<10}{counts['statements'] / len(updates):>14.2f}{counts['commits'] / len(updates):>12.2f}"
+        f"{elapsed / len(updates) * 1000:>12.3f}"
+    )
+
+
+def main() -> None:
+    """Compare the user writes of the baseline and of the upsert."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(args.database_url or f"sqlite:///{directory}/benchmark.db")
+        random.seed(0)
+        updates = [random.randrange(args.users) + 1 for _ in range(args.updates)]
+
+        print(f"{'path':<10}{'queries/upd':>14}{'commits/upd':>12}{'ms/upd':>12}")
+        for name, upsert in (("legacy", legacy_upsert), ("upsert", upsert_user)):
+            Base.metadata.drop_all(engine)
+            Base.metadata.create_all(engine)
+            session_factory = sessionmaker(bind=engine)
+            with session_factory() as session:
+                roles = enumerate(("superuser", "admin", "user"))
+                session.add_all([Role(id=role_id, name=role_name) for role_id, role_name in roles])
+                session.commit()
+            run(name, upsert, engine, session_factory, updates)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Load test for the queued webhook receiver against a fake Telegram API.
+
+Posts updates for many chats concurrently, the way Telegram delivers them, and
+reports accepted/rejected requests, request latency and ingest-to-handle lag.
+
+    python benchmarks/webhook_load.py --updates 5000 --chats 200 --workers 8 --handler-latency 0.02
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from aiohttp import ClientSession, web  # noqa: E402
+from telebot import TeleBot  # noqa: E402
+
+from app.dispatch.fake_telegram import FakeTelegramApi, make_message_update  # noqa: E402
+from app.dispatch.webhook import SECRET_TOKEN_HEADER, QueuedWebhookReceiver  # noqa: E402
+from app.metrics import format_snapshot, metrics  # noqa: E402
+
+
+async def post_updates(url: str, updates: list[dict], concurrency: int, secret: str) -> tuple[dict, list[float]]:
+    """POST the updates to the webhook, `concurrency` at a time, and return the status counts and latencies."""
+    statuses: dict[int, int] = {}
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with ClientSession(headers={SECRET_TOKEN_HEADER: secret}) as session:
+
+        async def post(update: dict) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                async with session.post(url, json=update) as response:
+                    statuses[response.status] = statuses.get(response.status, 0) + 1
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(post(update) for update in updates))
+    return statuses, latencies
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Serve the webhook with a slow echo handler, post the updates and print the results."""
+    fake_api = FakeTelegramApi(latency=args.api_latency).install()
+    bot = TeleBot("1234567890:" + "A" * 35, threaded=False)
+
+    @bot.message_handler(func=lambda message: True)
+    def slow_echo(message):
+        time.sleep(args.handler_latency)
+        bot.send_message(message.chat.id, message.text)
+
+    receiver = QueuedWebhookReceiver(bot, num_workers=args.workers, queue_size=args.queue_size, secret_token="load")  # noqa: S106
+    runner = web.AppRunner(receiver.make_app("/webhook"))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+
+    updates = [make_message_update(i, 1000 + i % args.chats, f"msg {i}") for i in range(args.updates)]
+    started = time.perf_counter()
+    statuses, latencies = await post_updates(f"http://127.0.0.1:{args.port}/webhook", updates, args.concurrency, "load")
+    ingest_seconds = time.perf_counter() - started
+
+    accepted = statuses.get(200, 0)
+    while len(fake_api.calls_to("sendMessage")) < accepted:
+        await asyncio.sleep(0.05)
+    total_seconds = time.perf_counter() - started
+
+    await runner.cleanup()
+    receiver.close()
+    FakeTelegramApi.uninstall()
+
+    latencies.sort()
+    print(f"updates: {args.updates}, statuses: {statuses}")
+    print(f"ingest: {ingest_seconds:.2f}s ({args.updates / ingest_seconds:.0f} req/s), drained after {total_seconds:.2f}s")
+    print(f"request latency p50={latencies[len(latencies) // 2] * 1000:.1f}ms p95={latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms")
+    print(format_snapshot({name: value for name, value in metrics.snapshot().items() if name.startswith("webhook.")}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--queue-size", type=int, default=1000)
+    parser.add_argument("--handler-latency", type=float, default=0.01)
+    parser.add_argument("--api-latency", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8181)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,115 @@
+"""Background data export for the admins, uploaded as one archive."""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from ..catalog import catalog
+from ..config import settings
+from ..database.core import engine
+from ..database.export import export_archive, save_watermarks
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+# Load configuration
+app_strings = catalog.strings("admin")
+
+# Largest document a bot can send
+TELEGRAM_UPLOAD_LIMIT = 50 * 1024 * 1024
+
+# One export at a time, each one already reads the tables in parallel
+_export_lock = threading.Lock()
+
+
+class ExportProgress:
+    """Edits a status message with the rows exported so far, at most every `interval` seconds."""
+
+    def __init__(self, bot, chat_id: int, message_id: int, lang: str, interval: float = 3.0) -> None:
+        """
+        Args:
+            bot: Bot sending the status message
+            chat_id: Chat of the status message
+            message_id: Id of the status message
+            lang: Language of the admin
+            interval: Minimum seconds between two edits
+        """
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.lang = lang
+        self.interval = interval
+        self.rows: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._last_update = time.monotonic()
+
+    def __call__(self, table: str, rows: int) -> None:
+        """Record the rows exported from `table` and edit the status message if it is due."""
+        with self._lock:
+            self.rows[table] = rows
+            now = time.monotonic()
+            if now - self._last_update < self.interval:
+                return
+            self._last_update = now
+            text = app_strings[self.lang].export.progress.format(tables=len(self.rows), rows=sum(self.rows.values()))
+        try:
+            self.bot.edit_message_text(text, self.chat_id, self.message_id)
+        except Exception as e:
+            # Progress is informative, the export goes on
+            logger.warning(f"Error reporting export progress: {e}")
+
+
+def start_export(
+    bot, user, tables: Optional[list[str]] = None, export_format: str = "csv", incremental: bool = False
+) -> bool:
+    """
+    Start exporting `tables`, all of them by default, in a background thread and return False if one runs.
+
+    With `incremental` only the rows changed since the previous delivered export are exported.
+    """
+    if not _export_lock.acquire(blocking=False):
+        bot.send_message(user.id, app_strings[user.lang].export.running)
+        return False
+    try:
+        status = bot.send_message(user.id, app_strings[user.lang].export.started)
+        progress = ExportProgress(bot, user.id, status.message_id, user.lang)
+        options = {"tables": tables, "export_format": export_format, "incremental": incremental}
+        threading.Thread(
+            target=_run_export, args=(bot, user, options, progress), name="admin-export", daemon=True
+        ).start()
+    except Exception:
+        _export_lock.release()
+        raise
+    return True
+
+
+def _run_export(bot, user, options: dict, progress: ExportProgress) -> None:
+    strings = app_strings[user.lang].export
+    mode = "delta" if options["incremental"] else "full"
+    archive_name = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{mode}_{options['export_format']}.zip"
+    archive_path = os.path.join(settings.EXPORT_DIR, archive_name)
+    keep_archive = False
+    try:
+        report = export_archive(engine, archive_path, progress=progress, **options)
+        summary = strings.done.format(tables=len(report.rows), rows=report.total_rows, seconds=report.seconds)
+        if report.incremental:
+            summary += "\n" + strings.changes_only.format(tables=", ".join(sorted(report.incremental)))
+        size = os.path.getsize(archive_path)
+        if size > TELEGRAM_UPLOAD_LIMIT:
+            keep_archive = True
+            bot.send_message(user.id, strings.too_large.format(size_mb=size / 2**20, path=archive_path))
+        else:
+            with open(archive_path, "rb") as file:
+                bot.send_document(user.id, file, caption=summary)
+        # The next incremental export starts where this delivered one ends
+        save_watermarks(engine, report.watermarks)
+    except Exception as e:
+        logger.error(f"Error exporting data: {e}")
+        bot.send_message(user.id, f"Error: ```{str(e)}```", parse_mode="Markdown")
+    finally:
+        if not keep_archive and os.path.exists(archive_path):
+            os.remove(archive_path)
+        _export_lock.release()
@@ -1,25 +1,25 @@
 """Handler to show information about the application configuration."""
 import logging
-import os
+import re
 from ast import Call
-from datetime import datetime
-from pathlib import Path
 
-from omegaconf import OmegaConf
 from telebot.types import CallbackQuery, Message
 
+from ..catalog import catalog
 from ..config import settings
-from ..database.core import export_all_tables
-from .markup import create_admin_menu_markup
+from ..metrics import format_snapshot, metrics
+from .export import start_export
+from .markup import create_admin_menu_markup, create_export_format_markup
 
 # Set up logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-app_strings = config.strings
+app_strings = catalog.strings("admin")
+
+# Callback data of the export buttons: mode and format
+EXPORT_CALLBACK = re.compile(r"export_(full|delta)_(csv|parquet)")
 
 
 def register_handlers(bot):
@@ -67,21 +67,41 @@ def register_handlers(bot):
         # Send config
         bot.send_message(user_id, app_info, parse_mode="Markdown")
 
+    @bot.callback_query_handler(func=lambda call: call.data == "metrics")
+    def metrics_handler(call: CallbackQuery, data: dict):
+        """Handler to show the in-process metrics."""
+        user = data["user"]
+        if user.role_id not in {0, 1}:
+            bot.send_message(call.from_user.id, app_strings[user.lang].no_rights)
+            return
+
+        report = format_snapshot(metrics.snapshot())
+        if not report:
+            bot.send_message(user.id, app_strings[user.lang].no_metrics)
+            return
+        bot.send_message(user.id, f"```\n{report}\n```", parse_mode="Markdown")
+
     @bot.callback_query_handler(func=lambda call: call.data == "export_data")
     def export_data_handler(call, data):
+        """Handler to choose the format of the data export."""
         user = data["user"]
-        db_session = data["db_session"]
-        # Export data
-        export_dir = f'./data/{datetime.now().strftime("%Y%m%d_%H%M%S")}'
-        os.makedirs(export_dir)
-        try:
-            table_names = export_all_tables(db_session, export_dir)
-            for table in table_names:
-                # save as excel in temp folder and send to a user
-                filename = f"{export_dir}/{table}.csv"
-                bot.send_document(user.id, open(filename, "rb"))
-                # remove the file
-                os.remove(filename)
-        except Exception as e:
-            bot.send_message(user.id, f"Error: ```{str(e)}```", parse_mode="Markdown")
-            logger.error(f"Error exporting data: {e}")
+        if user.role_id not in {0, 1}:
+            bot.send_message(call.from_user.id, app_strings[user.lang].no_rights)
+            return
+        bot.edit_message_text(
+            app_strings[user.lang].export.choose_format,
+            call.message.chat.id,
+            call.message.message_id,
+            reply_markup=create_export_format_markup(user.lang),
+        )
+
+    @bot.callback_query_handler(func=lambda call: EXPORT_CALLBACK.fullmatch(call.data or ""))
+    def export_format_handler(call, data):
+        """Handler to export the data in the chosen format and mode."""
+        user = data["user"]
+        if user.role_id not in {0, 1}:
+            bot.send_message(call.from_user.id, app_strings[user.lang].no_rights)
+            return
+        mode, export_format = EXPORT_CALLBACK.fullmatch(call.data).groups()
+        # The export streams the tables on its own connections and reports its progress
+        start_export(bot, user, export_format=export_format, incremental=mode == "delta")
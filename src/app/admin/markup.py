@@ -1,19 +1,19 @@
 import logging
-from pathlib import Path
 
-from omegaconf import OmegaConf
 from telebot.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from ..catalog import catalog
+from ..markup_cache import cached_markup
+
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-app_strings = config.strings
+app_strings = catalog.strings("admin")
 
 # Set up logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
 
+@cached_markup
 def create_admin_menu_markup(lang: str) -> InlineKeyboardMarkup:
     """Create the admin menu markup."""
     menu_markup = InlineKeyboardMarkup(row_width=1)
@@ -22,6 +22,7 @@ def create_admin_menu_markup(lang: str) -> InlineKeyboardMarkup:
     return menu_markup
 
 
+@cached_markup
 def create_users_menu_markup(lang: str, user_id: str) -> InlineKeyboardMarkup:
     """Create the users menu markup."""
     menu_markup = InlineKeyboardMarkup(row_width=1)
@@ -30,8 +31,23 @@ def create_users_menu_markup(lang: str, user_id: str) -> InlineKeyboardMarkup:
     return menu_markup
 
 
+@cached_markup
 def create_cancel_button(lang: str) -> InlineKeyboardMarkup:
     """Create a cancel button for the admin menu."""
     cancel_button = InlineKeyboardMarkup(row_width=1)
     cancel_button.add(InlineKeyboardButton(app_strings[lang].cancel, callback_data="cancel_admin"))
     return cancel_button
+
+
+@cached_markup
+def create_export_format_markup(lang: str) -> InlineKeyboardMarkup:
+    """Create the markup to choose the format and the mode, full or changes only, of the data export."""
+    format_markup = InlineKeyboardMarkup(row_width=2)
+    for mode in app_strings[lang].export.modes:
+        buttons = [
+            InlineKeyboardButton(f"{option.label}: {mode.label}", callback_data=f"export_{mode.value}_{option.value}")
+            for option in app_strings[lang].export.formats
+        ]
+        format_markup.add(*buttons)
+    format_markup.add(InlineKeyboardButton(app_strings[lang].back, callback_data="admin"))
+    return format_markup
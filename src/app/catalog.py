@@ -0,0 +1,249 @@
+"""Central catalog of the feature strings, compiled once from every feature `config.yaml`."""
+import functools
+import logging
+import string
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from omegaconf import DictConfig, OmegaConf
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+APP_DIR = Path(__file__).parent
+DEFAULT_LANG = "en"
+
+_formatter = string.Formatter()
+
+
+class Template(str):
+    """
+    String whose `format` reuses the template parsed once.
+
+    `str.format` parses the template on every call. Templates using only named
+    fields (`"User {user_id} not found"`) are parsed once into their literal and
+    field parts, and `format` only looks up, converts and joins the fields, with
+    the semantics of `str.format`: a missing field raises KeyError and extra
+    keyword arguments are ignored. Calls with positional arguments and other
+    templates keep `str.format`.
+    """
+
+    def __new__(cls, value: str) -> "Template":
+        """Create the template and parse it if it only has named fields."""
+        template = super().__new__(cls, value)
+        parts = _parse_format(value)
+        if parts is not None:
+            # Instance attribute shadows str.format
+            template.__dict__["format"] = functools.partial(_format, value, parts)
+        return template
+
+    def __reduce__(self):
+        """Pickle as a plain string, the parsed `format` is not picklable."""
+        return str, (str(self),)
+
+
+# Conversions of a replacement field, `{value!r}`
+_CONVERSIONS: dict[str, Callable[[Any], str]] = {"r": repr, "s": str, "a": ascii}
+
+
+def _parse_format(value: str) -> Optional[tuple[tuple[str, Optional[str], Optional[str], str], ...]]:
+    """Return the `(literal, field, conversion, spec)` parts of `value`, or None if it has no simple named fields."""
+    try:
+        parsed = list(_formatter.parse(value))
+    except ValueError:
+        return None
+    parts = []
+    for literal, field, spec, conversion in parsed:
+        if field is not None:
+            if not field.isidentifier() or "{" in spec or (conversion is not None and conversion not in _CONVERSIONS):
+                return None
+        parts.append((literal, field, conversion, spec))
+    if all(field is None for _, field, _, _ in parts):
+        return None
+    return tuple(parts)
+
+
+def _format(value: str, parts: tuple, *args: Any, **kwargs: Any) -> str:
+    """Format the parsed template `value` like `str.format`."""
+    if args:
+        return str.format(value, *args, **kwargs)
+    pieces = []
+    for literal, field, conversion, spec in parts:
+        pieces.append(literal)
+        if field is not None:
+            item = kwargs[field]
+            if conversion is not None:
+                item = _CONVERSIONS[conversion](item)
+            pieces.append(format(item, spec))
+    return "".join(pieces)
+
+
+class Strings:
+    """Immutable strings of one language with attribute and item access."""
+
+    def __init__(self, values: dict[str, Any]) -> None:
+        """
+        Args:
+            values: The strings by name
+        """
+        self.__dict__.update(values)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Refuse to change a string."""
+        raise AttributeError("Strings are read-only, reload the catalog instead")
+
+    __delattr__ = __setattr__
+
+    def __getattr__(self, name: str) -> Any:
+        """Raise AttributeError naming the missing string."""
+        # Only called for missing keys, after the fallback language was merged in
+        raise AttributeError(f"No string {name!r} in the catalog")
+
+    def __getitem__(self, name: str) -> Any:
+        """Return the string `name`."""
+        return self.__dict__[name]
+
+    def __contains__(self, name: str) -> bool:
+        """Return True if there is a string `name`."""
+        return name in self.__dict__
+
+    def __iter__(self):
+        """Iterate over the string names."""
+        return iter(self.__dict__)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Return the string `name`, or `default` if it is missing."""
+        return self.__dict__.get(name, default)
+
+    def keys(self):
+        """Return the string names."""
+        return self.__dict__.keys()
+
+    def __repr__(self) -> str:
+        """Return the representation listing the string names."""
+        return f"Strings({', '.join(self.__dict__)})"
+
+
+class LanguageTable(dict):
+    """Compiled strings of one feature by language, unknown languages get the default language."""
+
+    def __missing__(self, lang: str) -> Strings:
+        """Return the strings of the default language."""
+        return dict.__getitem__(self, DEFAULT_LANG)
+
+
+def _merge(default: Any, value: Any) -> Any:
+    """Fill the keys missing from `value` with `default`, recursively."""
+    if isinstance(default, dict) and isinstance(value, dict):
+        merged = {key: _merge(default[key], value[key]) if key in value else default[key] for key in default}
+        merged.update((key, item) for key, item in value.items() if key not in default)
+        return merged
+    return value
+
+
+def _compile(value: Any) -> Any:
+    """Compile plain config values into Strings, tuples and Templates."""
+    if isinstance(value, dict):
+        return Strings({str(key): _compile(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_compile(item) for item in value)
+    if isinstance(value, str):
+        return Template(value)
+    return value
+
+
+def compile_strings(strings: dict[str, Any]) -> dict[str, Strings]:
+    """Compile a `strings` section into one Strings per language, with missing keys taken from the default language."""
+    default = strings.get(DEFAULT_LANG, {})
+    return {lang: _compile(_merge(default, values)) for lang, values in strings.items()}
+
+
+class StringCatalog:
+    """
+    Strings of all features, loaded once from their `config.yaml` files.
+
+    OmegaConf resolves every attribute access through its node tree, which costs
+    microseconds per lookup on every update. The catalog reads each feature's
+    `strings` section once and compiles it into read-only objects looked up like
+    plain attributes: `catalog.strings("menu")[lang].main_menu.title`. Keys
+    missing in a language fall back to English, and so do unknown languages.
+
+    The tables returned by `strings()` are updated in place by `reload()`, so
+    modules can keep them in a global.
+    """
+
+    def __init__(self, root: Path = APP_DIR) -> None:
+        """
+        Args:
+            root: Directory containing the feature packages
+        """
+        self.root = root
+        self.version = 0
+        self._configs: dict[str, DictConfig] = {}
+        self._tables: dict[str, LanguageTable] = {}
+        self._defaults: dict[str, dict] = {}
+        self._listeners: list[Callable[[StringCatalog], None]] = []
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    def _load(self) -> None:
+        configs = {path.parent.name: OmegaConf.load(path) for path in sorted(self.root.glob("*/config.yaml"))}
+        for feature in configs.keys() | self._defaults.keys() | self._tables.keys():
+            config = configs.get(feature)
+            if config is not None and "strings" in config:
+                strings = OmegaConf.to_container(config.strings, resolve=True)
+            else:
+                strings = self._defaults.get(feature, {})
+            table = self._tables.setdefault(feature, LanguageTable())
+            compiled = compile_strings(strings)
+            table.clear()
+            table.update(compiled)
+        self._configs = configs
+        self._loaded = True
+        logger.info(f"Compiled strings of {len(self._tables)} features")
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+
+    def config(self, feature: str) -> DictConfig:
+        """Return the full `config.yaml` of `feature`, for its non-string sections."""
+        self._ensure_loaded()
+        return self._configs[feature]
+
+    def strings(self, feature: str, default: Optional[dict] = None) -> LanguageTable:
+        """
+        Return the compiled strings of `feature` by language.
+
+        Args:
+            feature: Name of the feature package
+            default: Strings by language used if the feature has no config file
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if feature not in self._tables:
+                if default is None:
+                    raise KeyError(f"No strings for feature {feature!r} in {self.root}")
+                logger.error(f"Config file not found for {feature}, using default strings")
+                self._defaults[feature] = default
+                self._tables[feature] = LanguageTable(compile_strings(default))
+            return self._tables[feature]
+
+    def on_reload(self, callback: Callable[["StringCatalog"], None]) -> None:
+        """Call `callback` with the catalog after every reload."""
+        self._listeners.append(callback)
+
+    def reload(self) -> None:
+        """Read the config files again and update the tables in place."""
+        with self._lock:
+            self._load()
+            self.version += 1
+        for callback in self._listeners:
+            callback(self)
+
+
+catalog = StringCatalog()
@@ -0,0 +1,29 @@
+"""AsyncSession variants of the functions of `chatgpt.history`."""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .history import as_history, history_statement
+from .models import Chat
+from .models import Message as ChatMessage
+
+
+async def get_or_create_chat(db_session: AsyncSession, user_id: int) -> Chat:
+    """Return the chat of a user, created on the first message"""
+    chat = (await db_session.scalars(select(Chat).where(Chat.user_id == user_id).limit(1))).first()
+    if not chat:
+        chat = Chat(user_id=user_id, name=None)
+        db_session.add(chat)
+        await db_session.commit()
+        await db_session.refresh(chat)
+    return chat
+
+
+async def save_message(db_session: AsyncSession, chat: Chat, role: str, content: str) -> None:
+    """Add a message to the chat"""
+    db_session.add(ChatMessage(chat_id=chat.id, role=role, content=content))
+    await db_session.commit()
+
+
+async def get_chat_history(db_session: AsyncSession, chat: Chat, limit: int) -> list[dict[str, str]]:
+    """Return the `limit` latest messages of the chat, oldest first"""
+    return as_history((await db_session.scalars(history_statement(chat, limit))).all())
@@ -1,35 +1,65 @@
+import asyncio
 import logging
-from pathlib import Path
 
-from omegaconf import OmegaConf
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from telebot.states import State
 from telebot.states.sync.context import StateContext, StatesGroup
 from telebot.types import CallbackQuery, Message
 from telebot.util import is_command
 
-from .service import ChatGptService
+from ..catalog import catalog
+from ..dispatch.asyncio_bridge import SyncBotBridge
+from ..plugins.lazy import LazyObject
 
 # Set up logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-strings = config.strings
+config = catalog.config("chatgpt")
+strings = catalog.strings("chatgpt")
 
-# Initialize OpenAI service
-chatgpt_service = ChatGptService(config.app)
+
+def create_chatgpt_service():
+    """Import the service (markitdown, PIL, OpenAI client) and build it."""
+    from .service import ChatGptService
+
+    return ChatGptService(config.app)
+
+
+def create_async_chatgpt_service():
+    """Import the service of the async dispatch mode and build it."""
+    from .service import AsyncChatGptService
+
+    return AsyncChatGptService(config.app)
+
+
+# Initialize OpenAI service on first use, registering the handlers stays cheap
+chatgpt_service = LazyObject(create_chatgpt_service)
+async_chatgpt_service = LazyObject(create_async_chatgpt_service)
+
+CONTENT_TYPES = ["text", "photo", "document", "audio", "voice"]
 
 
 class ChatGptStates(StatesGroup):
     awaiting = State()
 
 
+def error_text(error: Exception, user) -> str:
+    """Return the reply for a message the service failed to answer."""
+    logger.error(f"Error handling message: {error}")
+    if "Cannot preprocess image" in str(error):
+        return strings[user.lang].no_image_support
+    return strings[user.lang].error
+
+
 def register_handlers(bot):
     """Register handlers for the chat bot."""
-    # Provide bot to the service
-    chatgpt_service.set_bot(bot)
+    # In async mode the replies are awaited on the event loop instead of holding a bridge thread
+    if isinstance(bot, SyncBotBridge):
+        async_chatgpt_service.on_load(lambda service: service.set_bot(bot.bot))
+    else:
+        chatgpt_service.on_load(lambda service: service.set_bot(bot))
 
     @bot.callback_query_handler(func=lambda call: call.data == "chatgpt")
     def handle_chatgpt_callback(call: CallbackQuery, data: dict):
@@ -38,10 +68,14 @@ def register_handlers(bot):
         state = StateContext(call, bot)
         state.set(ChatGptStates.awaiting)
 
+    if isinstance(bot, SyncBotBridge):
+        _register_async_message_handler(bot)
+        return
+
     @bot.message_handler(
         func=lambda message: not is_command(message.text),
         state=ChatGptStates.awaiting,
-        content_types=["text", "photo", "document", "audio", "voice"],
+        content_types=CONTENT_TYPES,
     )
     def handle_template_document(message: Message, data: dict) -> None:
         user = data["user"]
@@ -58,14 +92,36 @@ def register_handlers(bot):
             else:
                 bot.reply_to(message, strings[user.lang].unsupported_message_type)
         except Exception as e:
-            logger.error(f"Error handling message: {e}")
-            if "Cannot preprocess image" in str(e):
-                bot.reply_to(message, strings[user.lang].no_image_support)
+            bot.reply_to(message, error_text(e, user))
+
+
+def _register_async_message_handler(bridge: SyncBotBridge) -> None:
+    """Register the coroutine variant of the message handler, run on the event loop."""
+    bot = bridge.bot
+
+    @bridge.message_handler(
+        func=lambda message: not is_command(message.text),
+        state=ChatGptStates.awaiting,
+        content_types=CONTENT_TYPES,
+    )
+    async def handle_template_document(message: Message, data: dict) -> None:
+        user = data["user"]
+        db_session: AsyncSession = data.get("async_db_session")
+
+        try:
+            # The first use imports the heavy libraries, which must not block the event loop
+            if async_chatgpt_service.loaded:
+                service = async_chatgpt_service.get()
             else:
-                bot.reply_to(message, strings[user.lang].error)
-        except Exception as e:
-            logger.error(f"Error handling message: {e}")
-            if "Cannot preprocess image" in str(e):
-                bot.reply_to(message, strings[user.lang].no_image_support)
+                service = await asyncio.to_thread(async_chatgpt_service.get)
+            if message.content_type == "document":
+                await service.handle_document(message, user, db_session)
+            elif message.content_type == "photo":
+                logger.info("Handling photo")
+                await service.handle_photo(message, user, db_session)
+            elif message.content_type == "text":
+                await service.handle_text(message, user, db_session)
             else:
-                bot.reply_to(message, strings[user.lang].error)
+                await bot.reply_to(message, strings[user.lang].unsupported_message_type)
+        except Exception as e:
+            await bot.reply_to(message, error_text(e, user))
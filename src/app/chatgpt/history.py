@@ -0,0 +1,42 @@
+"""Persistence of the ChatGPT conversations."""
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models import Chat
+from .models import Message as ChatMessage
+
+
+def get_or_create_chat(db_session: Session, user_id: int) -> Chat:
+    """Return the chat of a user, created on the first message"""
+    chat = db_session.query(Chat).filter(Chat.user_id == user_id).first()
+    if not chat:
+        chat = Chat(user_id=user_id, name=None)
+        db_session.add(chat)
+        db_session.commit()
+        db_session.refresh(chat)
+    return chat
+
+
+def save_message(db_session: Session, chat: Chat, role: str, content: str) -> None:
+    """Add a message to the chat"""
+    db_session.add(ChatMessage(chat_id=chat.id, role=role, content=content))
+    db_session.commit()
+
+
+def history_statement(chat: Chat, limit: int):
+    """Select the `limit` latest messages of the chat, all of them if `limit` is 0"""
+    statement = select(ChatMessage).where(ChatMessage.chat_id == chat.id)
+    if not limit:
+        return statement.order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc())
+    return statement.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit)
+
+
+def as_history(messages: list[ChatMessage]) -> list[dict[str, str]]:
+    """Return the messages oldest first in the format of the LLM client"""
+    messages = sorted(messages, key=lambda m: (m.created_at, m.id))
+    return [{"role": m.role, "content": m.content} for m in messages]
+
+
+def get_chat_history(db_session: Session, chat: Chat, limit: int) -> list[dict[str, str]]:
+    """Return the `limit` latest messages of the chat, oldest first"""
+    return as_history(db_session.scalars(history_statement(chat, limit)).all())
@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, Column, ForeignKey, Integer, String
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from ..models import Base, TimeStampMixin
@@ -10,7 +10,7 @@ class Chat(Base, TimeStampMixin):
     __tablename__ = "chatgpt_chats"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
+    user_id = Column(BigInteger, ForeignKey("users.id"), nullable=False, index=True)
     name = Column(String, nullable=True)
 
     # Establish relationship with Message and enable cascade deletion
@@ -21,6 +21,8 @@ class Message(Base, TimeStampMixin):
     """Message model"""
 
     __tablename__ = "chatgpt_messages"
+    # History of a chat in order
+    __table_args__ = (Index("ix_chatgpt_messages_chat_id_created_at", "chat_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     chat_id = Column(Integer, ForeignKey("chatgpt_chats.id"))
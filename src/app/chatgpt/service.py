@@ -1,25 +1,25 @@
+import asyncio
 import logging
-from pathlib import Path
 from typing import Any, Optional
 
 from markitdown import MarkItDown
-from omegaconf import OmegaConf
 from PIL import Image as PILImage
 
+from ..catalog import catalog
 from ..plugins.telegram_openai.client import OpenAiClient
 from ..plugins.telegram_openai.schemas import ModelConfig
+from . import async_history as async_chat_store
+from . import history as chat_store
 from .models import Chat
-from .models import Message as ChatMessage
-from .utils import download_file_in_memory
+from .utils import download_file_in_memory, download_file_in_memory_async
 
 # Set up logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-strings = config.strings
+config = catalog.config("chatgpt")
+strings = catalog.strings("chatgpt")
 
 
 class ChatGptService:
@@ -72,13 +72,7 @@ class ChatGptService:
             reply_text = self.llm.chat(system_prompt=system_prompt, messages=history, image=image).strip()
             if not reply_text:
                 # Fallback: flatten history into a single prompt
-                flattened = []
-                for m in history:
-                    role = m.get("role", "user")
-                    content = m.get("content", "")
-                    flattened.append(f"{role}: {content}")
-                flattened.append("assistant:")
-                reply_text = self.llm.chat(system_prompt=system_prompt, user_text="\n".join(flattened)).strip()
+                reply_text = self.llm.chat(system_prompt=system_prompt, user_text=self._flatten(history)).strip()
 
             if not reply_text:
                 logger.warning("LLM returned empty reply; sending generic fallback.")
@@ -89,27 +83,22 @@ class ChatGptService:
             logger.error(f"Error generating reply: {e}")
             raise
 
+    @staticmethod
+    def _flatten(history: list[dict[str, str]]) -> str:
+        flattened = [f"{m.get('role', 'user')}: {m.get('content', '')}" for m in history]
+        flattened.append("assistant:")
+        return "\n".join(flattened)
+
     # ---- moved from handlers ----
 
     def get_or_create_chat(self, db_session, user_id: int) -> Chat:
-        chat = db_session.query(Chat).filter(Chat.user_id == user_id).first()
-        if not chat:
-            chat = Chat(user_id=user_id, name=None)
-            db_session.add(chat)
-            db_session.commit()
-            db_session.refresh(chat)
-        return chat
+        return chat_store.get_or_create_chat(db_session, user_id)
 
     def save_message(self, db_session, chat: Chat, role: str, content: str) -> None:
-        msg = ChatMessage(chat_id=chat.id, role=role, content={}.get("content", content) or content)
-        db_session.add(msg)
-        db_session.commit()
+        chat_store.save_message(db_session, chat, role, content)
 
     def get_chat_history(self, db_session, chat: Chat, limit: int) -> list[dict[str, str]]:
-        q = db_session.query(ChatMessage).filter(ChatMessage.chat_id == chat.id).order_by(ChatMessage.created_at.asc())
-        messages = q.all()
-        messages = messages[-limit:] if limit and len(messages) > limit else messages
-        return [{"role": m.role, "content": m.content} for m in messages]
+        return chat_store.get_chat_history(db_session, chat, limit)
 
     def handle_photo(self, message: Any, user: Any, db_session) -> None:
         assert self.bot is not None, "Bot is not set on ChatGptService. Call set_bot(bot) first."
@@ -173,3 +162,92 @@ class ChatGptService:
 
         # Send reply
         self.bot.send_message(user_id, reply_text)
+
+
+class AsyncChatGptService(ChatGptService):
+    """
+    ChatGptService of the async dispatch mode, whose handlers are coroutines.
+
+    `bot` is the AsyncTeleBot and `db_session` an AsyncSession. The reply is awaited
+    through the async OpenAI client, so a conversation waiting for the model holds
+    no thread; file conversions run in a thread.
+    """
+
+    async def generate_reply(self, chat_history: list[dict[str, str]], image: Optional[Any] = None) -> str:
+        """Generate the assistant reply like ChatGptService.generate_reply, without blocking the event loop."""
+        history = chat_history[-self.history_limit :] if self.history_limit else chat_history
+        system_prompt = self._get_system_prompt()
+
+        try:
+            reply_text = (await self.llm.chat_async(system_prompt=system_prompt, messages=history, image=image)).strip()
+            if not reply_text:
+                reply_text = (
+                    await self.llm.chat_async(system_prompt=system_prompt, user_text=self._flatten(history))
+                ).strip()
+
+            if not reply_text:
+                logger.warning("LLM returned empty reply; sending generic fallback.")
+                reply_text = "…"
+            return reply_text
+
+        except Exception as e:
+            logger.error(f"Error generating reply: {e}")
+            raise
+
+    async def handle_photo(self, message: Any, user: Any, db_session) -> None:
+        """Reply to a photo and its caption."""
+        assert self.bot is not None, "Bot is not set on AsyncChatGptService. Call set_bot(bot) first."
+        user_message = message.caption if message.caption else ""
+        file_object = await download_file_in_memory_async(self.bot, message.photo[-1].file_id)
+        image = PILImage.open(file_object)
+        await self.process_message(db_session, int(message.chat.id), user_message, user, image)
+
+    async def handle_document(self, message: Any, user: Any, db_session) -> None:
+        """Reply to a document converted to text, and its caption."""
+        assert self.bot is not None, "Bot is not set on AsyncChatGptService. Call set_bot(bot) first."
+        user_message = message.caption if message.caption else ""
+        file_object = await download_file_in_memory_async(self.bot, message.document.file_id)
+        try:
+            result = await asyncio.to_thread(self.markitdown.convert_stream, file_object)
+            user_message += ("\n" if user_message else "") + result.text_content
+        except Exception as e:
+            logger.error(f"Error processing file: {e}")
+            await self.bot.reply_to(message, strings[user.lang].error)
+            return
+        await self.process_message(db_session, int(message.chat.id), user_message, user)
+
+    async def handle_text(self, message: Any, user: Any, db_session) -> None:
+        """Reply to a text message."""
+        await self.process_message(db_session, int(message.chat.id), message.text, user)
+
+    async def process_message(
+        self,
+        db_session,
+        user_id: int,
+        user_message: str,
+        user: Any,
+        image: Optional[PILImage.Image] = None,
+    ) -> None:
+        """Save the user message, send the reply of the model and save it."""
+        assert self.bot is not None, "Bot is not set on AsyncChatGptService. Call set_bot(bot) first."
+        user_message = (user_message or "")[: config.app.max_input_length]
+
+        chat = await async_chat_store.get_or_create_chat(db_session, user.id)
+        await async_chat_store.save_message(
+            db_session, chat, role="user", content=user_message if user_message else "[attachment]"
+        )
+        history = await async_chat_store.get_chat_history(db_session, chat, limit=self.history_limit)
+
+        logger.info(f"User message: {user_message}")
+
+        try:
+            reply_text = await self.generate_reply(chat_history=history, image=image)
+        except Exception as e:
+            logger.error(f"Error invoking LLM: {e}")
+            await self.bot.send_message(user_id, strings[user.lang].error)
+            return
+
+        logger.info(f"Response content: {reply_text}")
+
+        await async_chat_store.save_message(db_session, chat, role="assistant", content=reply_text)
+        await self.bot.send_message(user_id, reply_text)
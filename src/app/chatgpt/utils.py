@@ -19,3 +19,18 @@ def download_file_in_memory(bot, file_id: str) -> io.BytesIO:
     file_object = io.BytesIO(downloaded_file)
 
     return file_object
+
+
+async def download_file_in_memory_async(bot, file_id: str) -> io.BytesIO:
+    """
+    Like download_file_in_memory, with an AsyncTeleBot.
+
+    Args:
+        bot: The AsyncTeleBot instance.
+        file_id: The unique identifier for the file to be downloaded.
+
+    Returns:
+        io.BytesIO: The file object containing the downloaded file.
+    """
+    file_info = await bot.get_file(file_id)
+    return io.BytesIO(await bot.download_file(file_info.file_path))
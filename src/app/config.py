@@ -40,10 +40,51 @@ class Settings(BaseSettings):
     SUPERUSER_USER_ID: int
     COMMUNICATION_STRATEGY: Literal["polling", "webhook"] = "polling"
 
+    # Dispatch Configuration
+    DISPATCH_MODE: Literal["sync", "async"] = "sync"
+    ASYNC_HANDLER_WORKERS: int = 256  # Threads running sync handler bodies in async mode, at most as many at once
+    DISPATCH_WORKERS: int = 4  # Worker threads processing updates in sync mode
+    DISPATCH_ORDERED: bool = True  # Shard updates by chat id so each chat is handled in order
+    DISPATCH_PROCESSES: int = 1  # Worker processes in sync mode, above 1 runs the supervisor
+    SUPERVISOR_HEALTH_TIMEOUT: float = 30.0  # Seconds without heartbeat before a worker process is restarted
+    SUPERVISOR_HANDLER_TIMEOUT: float = 900.0  # Seconds one update may run before its worker process is restarted
+
     # Webhook Configuration
     WEBHOOK_URL: str = ""
     WEBHOOK_SSL_CERT: str = "./webhook_cert.pem"
     WEBHOOK_SSL_PRIVKEY: str = "./webhook_pkey.pem"
+    WEBHOOK_SERVER: Literal["telebot", "queued"] = "telebot"  # "queued" acks at once and handles on a worker pool
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_QUEUE_SIZE: int = 1000  # Updates waiting for a worker before requests are rejected with 429
+    WEBHOOK_SECRET_TOKEN: str = ""  # Generated at startup if empty
+
+    # Outbound Configuration (Telegram limits: ~30 msg/s overall, ~1 msg/s per chat, 20 msg/min per group)
+    OUTBOUND_ENABLED: bool = True  # Rate-limit and prioritize outgoing messages
+    OUTBOUND_GLOBAL_RATE: float = 30.0  # Messages per second over all chats
+    OUTBOUND_CHAT_RATE: float = 1.0  # Messages per second in one private chat
+    OUTBOUND_CHAT_BURST: int = 3  # Messages a private chat may receive at once
+    OUTBOUND_GROUP_RATE: float = 20 / 60  # Messages per second in one group
+    OUTBOUND_MAX_RETRIES: int = 3  # Retries of a message answered with 429
+
+    # HTTP Transport Configuration
+    HTTP_POOLED_TRANSPORT: bool = True  # Share keep-alive connections to the Bot API between threads
+    HTTP_POOL_CONNECTIONS: int = 4  # Hosts to keep a connection pool for
+    HTTP_POOL_MAXSIZE: int = 32  # Keep-alive connections per host
+    HTTP_CONNECT_TIMEOUT: float = 5.0  # Seconds
+    HTTP_READ_TIMEOUT: float = 30.0  # Seconds, long polling adds its own timeout
+    HTTP2_ENABLED: bool = False  # Requires httpx[http2]
+
+    # User Cache Configuration
+    USER_CACHE_TTL: float = 60.0  # Seconds a cached user record is trusted, 0 disables the cache
+    USER_CACHE_SIZE: int = 10000  # Users kept in memory, the least recently seen are dropped
+    REFERENCE_CACHE_TTL: float = 300.0  # Seconds cached roles and item categories are trusted, 0 disables the cache
+    ACTIVITY_FLUSH_INTERVAL: float = 5.0  # Seconds between bulk writes of last_message_timestamp
+    ACTIVITY_MAX_PENDING: int = 10000  # Users waiting for the write before a flush is forced
+
+    # Inline Mode Configuration
+    INLINE_CACHE_TIME: int = 10  # Seconds Telegram caches the results of an inline query per user
+    INLINE_RESULT_CACHE_TTL: float = 30.0  # Seconds the server keeps the matches of a query, 0 disables it
+    INLINE_RESULT_CACHE_SIZE: int = 5000  # Users whose matches are kept, the least recently active are dropped
 
     # Antiflood Configuration
     ANTIFLOOD_ENABLED: bool = True
@@ -55,9 +96,31 @@ class Settings(BaseSettings):
     DB_USER: str = ""
     DB_PASSWORD: str = ""
     DB_NAME: str = ""
+    DB_POOL_CLASS: Literal["queue", "null", "static"] = "queue"  # "null" opens a connection per session
+    DB_POOL_SIZE: int = 10  # Connections kept open
+    DB_MAX_OVERFLOW: int = 20  # Extra connections opened under load and closed when returned
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced, -1 never
+    DB_POOL_PRE_PING: bool = True  # Test connections on checkout and replace dropped ones
+    SQLITE_WAL: bool = True  # Write-ahead log, readers do not block the writer
+    SQLITE_BUSY_TIMEOUT: int = 5000  # Milliseconds a writer waits for the lock
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # Bytes of the database file read through mmap, 0 disables
+
+    # Data Export Configuration
+    EXPORT_WORKERS: int = 4  # Tables exported in parallel
+    EXPORT_CHUNK_SIZE: int = 10000  # Rows fetched and written at a time
+    EXPORT_DIR: str = "./data"  # Where archives are written before the upload
+    EXPORT_PARQUET_COMPRESSION: Literal["zstd", "snappy", "gzip", "none"] = "zstd"
+
+    # Item Import/Export Configuration
+    ITEM_TRANSFER_WORKERS: int = 2  # Imports and exports of items run at once, in background threads
+    ITEM_IMPORT_CHUNK_SIZE: int = 1000  # Items inserted per statement and transaction
+    ITEM_IMPORT_MAX_ITEMS: int = 50000  # Items accepted from one file
 
     # Plugins Configuration
     USE_PLUGINS: bool = False  # Enable plugins
+    YT_DLP_WORKERS: int = 2  # Downloads running at once in async mode, others wait for a thread
+    GOOGLE_SHEETS_WORKERS: int = 4  # Google Sheets requests running at once in async mode
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -0,0 +1,49 @@
+"""Async engine and session factory, sharing the models and settings of `database.core`."""
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from ..metrics import metrics
+from .core import DATABASE_URL, TimedCheckout, engine_options, pool_status, set_sqlite_pragmas
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+class TimedAsyncQueuePool(TimedCheckout, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool recording the checkout wait time."""
+
+
+def async_database_url(database_url: str) -> URL:
+    """Return `database_url` with the asyncio driver of its database, asyncpg or aiosqlite."""
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+def build_async_engine(database_url: str) -> AsyncEngine:
+    """Create the async engine of `database_url` with the pool and driver settings of the sync engine."""
+    url = async_database_url(database_url)
+    options = engine_options(database_url, queue_pool=TimedAsyncQueuePool)
+    if url.get_backend_name() == "postgresql":
+        options["connect_args"] = {"timeout": 5, "server_settings": {"application_name": "telegram_bot"}}
+
+    try:
+        engine = create_async_engine(url, echo=False, **options)
+    except ImportError as e:
+        raise ImportError("The async engine requires its driver: pip install aiosqlite asyncpg") from e
+    if url.get_backend_name() == "sqlite":
+        event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
+    return engine
+
+
+async_engine = build_async_engine(DATABASE_URL)
+metrics.gauge("db.async_pool", lambda: pool_status(async_engine.sync_engine))
+
+# Objects stay readable after commit without implicit I/O on attribute access
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
@@ -1,13 +1,15 @@
-import csv
 import logging
-import os
+import time
 
 from dotenv import find_dotenv, load_dotenv
-from sqlalchemy import create_engine, inspect
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
 
 from ..config import settings
+from ..metrics import metrics
 from ..users.models import Base
 
 # Set up logging
@@ -24,14 +26,87 @@ else:
     DATABASE_URL = "sqlite:///local_database.db"
     logger.warning("Database environment variables not set. Using SQLite instead.")
 
-# Replace with a unified approach:
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"connect_timeout": 5, "application_name": "telegram_bot"} if "postgresql" in DATABASE_URL else {},
-    poolclass=NullPool if "postgresql" in DATABASE_URL else None,
-    pool_size=32,
-    echo=False,
-)
+
+class TimedCheckout:
+    """Pool mixin recording how long sessions wait for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe("db.pool_checkout_seconds", time.perf_counter() - started)
+
+
+class TimedQueuePool(TimedCheckout, QueuePool):
+    """QueuePool recording the checkout wait time."""
+
+
+POOL_CLASSES = {"queue": TimedQueuePool, "null": NullPool, "static": StaticPool}
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Tune each new SQLite connection for concurrent handler threads."""
+    cursor = dbapi_connection.cursor()
+    try:
+        if settings.SQLITE_WAL:
+            # Persistent in the database file, readers no longer block the writer
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # Safe with WAL: a power loss may only drop the last transactions
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    finally:
+        cursor.close()
+
+
+def pool_status(engine: Engine) -> dict:
+    """Return the connections of the engine pool in use, idle and opened beyond its size."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+
+
+def engine_options(database_url: str, queue_pool: type = TimedQueuePool) -> dict:
+    """Return the pool and driver options of an engine of `database_url`, shared by the sync and async engines."""
+    pool_class = POOL_CLASSES[settings.DB_POOL_CLASS]
+    if pool_class is TimedQueuePool:
+        pool_class = queue_pool
+    options = {"poolclass": pool_class, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if pool_class is queue_pool:
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    if database_url.startswith("sqlite"):
+        # Sessions of the handler threads share the pooled connections
+        options["connect_args"] = {"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT / 1000}
+    return options
+
+
+def build_engine(database_url: str) -> Engine:
+    """Create the engine of `database_url` with the pool and driver settings."""
+    options = engine_options(database_url)
+    if database_url.startswith("postgresql"):
+        options["connect_args"] = {"connect_timeout": 5, "application_name": "telegram_bot"}
+
+    engine = create_engine(database_url, echo=False, **options)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    return engine
+
+
+engine = build_engine(DATABASE_URL)
+metrics.gauge("db.pool", lambda: pool_status(engine))
 
 # a factory that produces new Session objects (database sessions).
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -59,25 +134,21 @@ def drop_tables():
     logger.info("Tables dropped")
 
 
-def export_all_tables(db_session, export_dir: str) -> list[str]:
-    """Export all tables to CSV files."""
-    inspector = inspect(db_session.get_bind())
-    table_names = inspector.get_table_names()
-    for table_name in table_names:
-        file_path = os.path.join(export_dir, f"{table_name}.csv")
-        with open(file_path, mode="w", newline="") as file:
-            writer = csv.writer(file)
-            columns = [col["name"] for col in inspector.get_columns(table_name)]
-            writer.writerow(columns)
-
-            from sqlalchemy import MetaData, Table, select
-
-            metadata = MetaData()
-            table = Table(table_name, metadata, autoload_with=db_session.get_bind())
-            stmt = select(table)
-            records = db_session.execute(stmt).fetchall()
-            for record in records:
-                writer.writerow(record)
-
-    db_session.close()
-    return table_names
+def upsert_rows(db_session: Session, model, rows: list[dict]) -> None:
+    """Insert `rows` into the table of `model` in one statement, updating the rows with the same primary key."""
+    table = model.__table__
+    dialect = db_session.get_bind().dialect.name
+    if dialect not in {"postgresql", "sqlite"}:
+        for row in rows:
+            db_session.merge(model(**row))
+        return
+
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = insert(table).values(rows)
+    keys = [column.name for column in table.primary_key.columns]
+    updates = {name: statement.excluded[name] for name in rows[0] if name not in keys}
+    if updates:
+        statement = statement.on_conflict_do_update(index_elements=keys, set_=updates)
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=keys)
+    db_session.execute(statement)
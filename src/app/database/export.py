@@ -0,0 +1,292 @@
+"""Streaming export of the database tables into one compressed archive."""
+import csv
+import gzip
+import logging
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import Column, MetaData, Table, func, select, types
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql import ColumnElement
+
+from ..config import settings
+from ..metrics import metrics
+from .models import ExportWatermark
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+# Called with the table name and the number of its rows written so far
+ProgressCallback = Callable[[str, int], None]
+
+
+@dataclass
+class ExportReport:
+    """Result of an export: the written files and their number of rows by table."""
+
+    files: dict[str, str] = field(default_factory=dict)
+    rows: dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+    path: Optional[str] = None
+    # Latest change timestamp covered by the export, by table
+    watermarks: dict[str, datetime] = field(default_factory=dict)
+    # Tables exported as the changes since the previous export
+    incremental: set[str] = field(default_factory=set)
+
+    @property
+    def total_rows(self) -> int:
+        """Return the number of rows over all tables."""
+        return sum(self.rows.values())
+
+
+def derived_tables(bind: Engine) -> set[str]:
+    """Return the SQLite virtual tables, e.g. full-text indexes, and their shadow tables: data rebuilt from others."""
+    if bind.dialect.name != "sqlite":
+        return set()
+    with bind.connect() as connection:
+        names = connection.exec_driver_sql("SELECT name, sql FROM sqlite_master WHERE type = 'table'").all()
+    virtual = {name for name, sql in names if (sql or "").upper().startswith("CREATE VIRTUAL TABLE")}
+    return {name for name, _ in names if any(name == table or name.startswith(f"{table}_") for table in virtual)}
+
+
+def reflect_tables(bind: Engine, tables: Optional[list[str]] = None) -> list[Table]:
+    """Reflect the tables of the database once, all of them but the derived ones if `tables` is not given."""
+    metadata = MetaData()
+    skipped = derived_tables(bind) if not tables else set()
+    metadata.reflect(bind, only=list(tables) if tables else lambda name, _: name not in skipped)
+    return [metadata.tables[name] for name in (tables or sorted(metadata.tables))]
+
+
+# Columns tracking the last change of a row, by preference
+WATERMARK_COLUMNS = ("updated_at", "created_at")
+
+
+def watermark_column(table: Table) -> Optional[Column]:
+    """Return the timestamp column of `table` telling which rows changed, or None if it has none."""
+    for name in WATERMARK_COLUMNS:
+        column = table.columns.get(name)
+        if column is not None and isinstance(column.type, types.DateTime):
+            return column
+    return None
+
+
+def load_watermarks(bind: Engine) -> dict[str, datetime]:
+    """Return the watermarks saved by the previous exports, by table."""
+    ExportWatermark.__table__.create(bind, checkfirst=True)
+    with Session(bind) as session:
+        return {row.table_name: row.watermark for row in session.scalars(select(ExportWatermark))}
+
+
+def save_watermarks(bind: Engine, watermarks: dict[str, datetime]) -> None:
+    """Save the watermarks of a delivered export, the next incremental export starts from them."""
+    ExportWatermark.__table__.create(bind, checkfirst=True)
+    now = datetime.now()
+    with Session(bind) as session:
+        for table_name, watermark in watermarks.items():
+            session.merge(ExportWatermark(table_name=table_name, watermark=watermark, exported_at=now))
+        session.commit()
+
+
+def export_table(
+    bind: Engine,
+    table: Table,
+    path: str,
+    chunk_size: int = 10000,
+    progress: Optional[ProgressCallback] = None,
+    where: Optional[ColumnElement] = None,
+) -> int:
+    """
+    Stream `table` into a gzip-compressed CSV file and return the number of rows.
+
+    Rows are fetched `chunk_size` at a time through a server-side cursor where
+    the driver has one, so memory use does not grow with the table. Only the
+    rows matching `where` are exported if it is given.
+    """
+    rows = 0
+    statement = select(table) if where is None else select(table).where(where)
+    with bind.connect() as connection, gzip.open(path, "wt", newline="", compresslevel=6) as file:
+        writer = csv.writer(file)
+        writer.writerow(table.columns.keys())
+        result = connection.execution_options(yield_per=chunk_size).execute(statement)
+        for chunk in result.partitions():
+            writer.writerows(chunk)
+            rows += len(chunk)
+            if progress is not None:
+                progress(table.name, rows)
+    return rows
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet export requires pyarrow: pip install '.[parquet]'") from e
+    return pyarrow, pyarrow.parquet
+
+
+def arrow_type(column_type: types.TypeEngine):
+    """Return the Arrow type keeping the values of a SQLAlchemy column type, strings for unknown types."""
+    pa, _ = _import_pyarrow()
+    # Subclasses first: BigInteger and Boolean before Integer, DateTime before Date
+    if isinstance(column_type, types.BigInteger):
+        return pa.int64()
+    if isinstance(column_type, types.SmallInteger):
+        return pa.int16()
+    if isinstance(column_type, types.Integer):
+        return pa.int64()
+    if isinstance(column_type, types.Boolean):
+        return pa.bool_()
+    if isinstance(column_type, types.DateTime):
+        return pa.timestamp("us", tz="UTC" if column_type.timezone else None)
+    if isinstance(column_type, types.Date):
+        return pa.date32()
+    if isinstance(column_type, types.Time):
+        return pa.time64("us")
+    if isinstance(column_type, types.Float):
+        return pa.float64()
+    if isinstance(column_type, types.Numeric):
+        if column_type.precision is not None and column_type.scale is not None:
+            return pa.decimal128(column_type.precision, column_type.scale)
+        return pa.float64()
+    if isinstance(column_type, types.LargeBinary):
+        return pa.binary()
+    return pa.string()
+
+
+def export_table_parquet(
+    bind: Engine,
+    table: Table,
+    path: str,
+    chunk_size: int = 10000,
+    progress: Optional[ProgressCallback] = None,
+    where: Optional[ColumnElement] = None,
+) -> int:
+    """
+    Stream `table` into a Parquet file, one row group per `chunk_size` rows, and return the number of rows.
+
+    Column types are kept (integers, booleans, timestamps) and the pages are
+    compressed with `EXPORT_PARQUET_COMPRESSION`.
+    """
+    pa, pq = _import_pyarrow()
+    schema = pa.schema([pa.field(column.name, arrow_type(column.type)) for column in table.columns])
+    rows = 0
+    statement = select(table) if where is None else select(table).where(where)
+    with bind.connect() as connection, pq.ParquetWriter(
+        path, schema, compression=settings.EXPORT_PARQUET_COMPRESSION
+    ) as writer:
+        result = connection.execution_options(yield_per=chunk_size).execute(statement)
+        for chunk in result.partitions():
+            columns = zip(*chunk, strict=True)
+            arrays = [pa.array(values, type=field.type) for values, field in zip(columns, schema, strict=True)]
+            writer.write_batch(pa.record_batch(arrays, schema=schema), row_group_size=chunk_size)
+            rows += len(chunk)
+            if progress is not None:
+                progress(table.name, rows)
+    return rows
+
+
+# File suffix and writer of each export format
+EXPORT_FORMATS = {
+    "csv": (".csv.gz", export_table),
+    "parquet": (".parquet", export_table_parquet),
+}
+
+
+def export_all_tables(
+    bind: Engine,
+    export_dir: str,
+    tables: Optional[list[str]] = None,
+    progress: Optional[ProgressCallback] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    export_format: str = "csv",
+    incremental: bool = False,
+) -> ExportReport:
+    """
+    Export the tables in parallel into `<table>.csv.gz` or `<table>.parquet` files of `export_dir`.
+
+    With `incremental`, tables with an `updated_at` (or `created_at`) column only
+    get the rows changed since the watermark saved by `save_watermarks`, the
+    other tables are exported in full. Rows changed at the watermark itself are
+    exported again and deletions are not seen. The report holds the new
+    watermarks, to be saved once the export is delivered.
+    """
+    suffix, write_table = EXPORT_FORMATS[export_format]
+    if export_format == "parquet":
+        # Fail before any table is read
+        _import_pyarrow()
+    started = time.perf_counter()
+    max_workers = max_workers or settings.EXPORT_WORKERS
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    if isinstance(bind.pool, StaticPool):
+        # One shared connection cannot run queries from several threads
+        max_workers = 1
+
+    report = ExportReport()
+    lock = threading.Lock()
+    previous = load_watermarks(bind) if incremental else {}
+
+    def export(table: Table) -> None:
+        column = watermark_column(table)
+        where, watermark = None, None
+        if column is not None:
+            with bind.connect() as connection:
+                watermark = connection.execute(select(func.max(column))).scalar()
+            if table.name in previous and watermark is not None:
+                # Rows changed during the export are left to the next one
+                where = column.between(previous[table.name], watermark)
+
+        path = os.path.join(export_dir, f"{table.name}{suffix}")
+        rows = write_table(bind, table, path, chunk_size, progress, where)
+        with lock:
+            report.files[table.name] = path
+            report.rows[table.name] = rows
+            if watermark is not None:
+                report.watermarks[table.name] = watermark
+            if where is not None:
+                report.incremental.add(table.name)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export") as executor:
+        # Largest tables are not known in advance, list() raises the first error
+        list(executor.map(export, reflect_tables(bind, tables)))
+
+    report.seconds = time.perf_counter() - started
+    metrics.observe("export.seconds", report.seconds)
+    metrics.inc("export.rows_total", report.total_rows)
+    logger.info(f"Exported {report.total_rows} rows of {len(report.rows)} tables in {report.seconds:.1f}s")
+    return report
+
+
+def export_archive(
+    bind: Engine,
+    archive_path: str,
+    tables: Optional[list[str]] = None,
+    progress: Optional[ProgressCallback] = None,
+    **options,
+) -> ExportReport:
+    """
+    Export the tables into one zip archive of `<table>.csv.gz` or `<table>.parquet` files at `archive_path`.
+
+    The files are already compressed, the archive stores them as they are.
+    """
+    directory = os.path.dirname(os.path.abspath(archive_path))
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=directory) as export_dir:
+        report = export_all_tables(bind, export_dir, tables, progress, **options)
+        with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_STORED) as archive:
+            for name, path in sorted(report.files.items()):
+                archive.write(path, arcname=os.path.basename(path))
+                report.files[name] = os.path.basename(path)
+    report.path = archive_path
+    return report
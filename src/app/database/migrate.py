@@ -0,0 +1,128 @@
+"""
+Versioned schema migrations.
+
+Migrations are the modules `vNNNN_<name>.py` of `database.migrations`, each
+with an `upgrade(connection)` function. They run in version order, each in
+its own transaction recording its version in `schema_version`, so a restart
+with an up-to-date schema only reads the current version. A module setting
+`TRANSACTIONAL = False` runs in autocommit mode instead, as required by
+`CREATE INDEX CONCURRENTLY` on PostgreSQL. Write migrations so they also pass
+on a database created by a later `v0001_initial_schema`, e.g. with
+`checkfirst=True` or `IF NOT EXISTS`.
+"""
+import importlib
+import logging
+import pkgutil
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from . import migrations as migrations_package
+from .models import SchemaVersion
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+MIGRATION_NAME = re.compile(r"v(\d+)_(\w+)")
+
+# Arbitrary key of the PostgreSQL advisory lock serializing migrations of concurrent processes
+ADVISORY_LOCK_KEY = 7_204_615
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema change, applied once."""
+
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+    transactional: bool = True
+
+
+def discover_migrations(package=migrations_package) -> list[Migration]:
+    """Return the migrations of `package` in version order."""
+    found = []
+    for module_info in pkgutil.iter_modules(package.__path__):
+        match = MIGRATION_NAME.fullmatch(module_info.name)
+        if match is None:
+            continue
+        module = importlib.import_module(f"{package.__name__}.{module_info.name}")
+        transactional = getattr(module, "TRANSACTIONAL", True)
+        found.append(Migration(int(match.group(1)), match.group(2), module.upgrade, transactional))
+    found.sort(key=lambda migration: migration.version)
+    versions = [migration.version for migration in found]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {package.__name__}: {versions}")
+    return found
+
+
+def current_version(connection: Connection) -> int:
+    """Return the version of the schema, 0 for a database never migrated."""
+    SchemaVersion.__table__.create(connection, checkfirst=True)
+    return connection.execute(select(func.max(SchemaVersion.version))).scalar() or 0
+
+
+@contextmanager
+def _migration_lock(connection: Connection):
+    """Let one process at a time migrate a PostgreSQL database, other dialects lock on write."""
+    if connection.dialect.name != "postgresql":
+        yield
+    elif connection.in_transaction():
+        # Released with the transaction
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        yield
+    else:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+
+
+def _apply(connection: Connection, migration: Migration) -> bool:
+    with _migration_lock(connection):
+        # Another process may have applied it meanwhile
+        if migration.version <= current_version(connection):
+            return False
+        logger.info(f"Applying migration {migration.version} {migration.name}")
+        migration.upgrade(connection)
+        connection.execute(
+            insert(SchemaVersion.__table__).values(
+                version=migration.version, name=migration.name, applied_at=datetime.now()
+            )
+        )
+    return True
+
+
+def migrate(engine: Engine, migrations: Optional[list[Migration]] = None) -> list[Migration]:
+    """Apply the pending migrations and return them, none if the schema is up to date."""
+    migrations = discover_migrations() if migrations is None else migrations
+    latest = migrations[-1].version if migrations else 0
+
+    with engine.connect() as connection:
+        version = current_version(connection)
+        connection.commit()
+    if version >= latest:
+        logger.info(f"Database schema is up to date (version {version})")
+        return []
+
+    applied = []
+    for migration in migrations:
+        if migration.version <= version:
+            continue
+        if migration.transactional:
+            with engine.begin() as connection:
+                done = _apply(connection, migration)
+        else:
+            with engine.connect() as connection:
+                done = _apply(connection.execution_options(isolation_level="AUTOCOMMIT"), migration)
+        if done:
+            applied.append(migration)
+    logger.info(f"Database schema migrated to version {latest}")
+    return applied
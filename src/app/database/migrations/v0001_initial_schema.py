@@ -0,0 +1,23 @@
+"""Tables of the bot, as created by `create_tables` before migrations."""
+from sqlalchemy.engine import Connection
+
+from ...chatgpt import models as chatgpt_models  # noqa: F401
+from ...items import models as items_models  # noqa: F401
+from ...models import Base
+from .. import models as database_models  # noqa: F401
+
+TABLES = [
+    "roles",
+    "users",
+    "item_categories",
+    "items",
+    "chatgpt_chats",
+    "chatgpt_messages",
+    "export_watermarks",
+]
+
+
+def upgrade(connection: Connection) -> None:
+    """Create the tables of the bot that do not exist yet."""
+    # Existing databases already have the tables
+    Base.metadata.create_all(connection, tables=[Base.metadata.tables[name] for name in TABLES], checkfirst=True)
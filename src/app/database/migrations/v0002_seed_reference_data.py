@@ -0,0 +1,14 @@
+"""System roles and default item categories."""
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from ...items.data import init_item_categories_table
+from ...users.data import init_roles_table
+
+
+def upgrade(connection: Connection) -> None:
+    """Insert or update the system roles and the default item categories."""
+    # Upserts, rows of databases seeded before migrations are kept
+    with Session(bind=connection) as session:
+        init_roles_table(session)
+        init_item_categories_table(session)
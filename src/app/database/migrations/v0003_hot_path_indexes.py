@@ -0,0 +1,20 @@
+"""Indexes of the lookups done per update: items by owner, chats by user, chat history, users by username."""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Built without a transaction, so PostgreSQL creates them without locking writes
+TRANSACTIONAL = False
+
+INDEXES = {
+    "ix_items_owner_id": "items (owner_id)",
+    "ix_chatgpt_chats_user_id": "chatgpt_chats (user_id)",
+    "ix_chatgpt_messages_chat_id_created_at": "chatgpt_messages (chat_id, created_at)",
+    "ix_users_username": "users (username)",
+}
+
+
+def upgrade(connection: Connection) -> None:
+    """Create the indexes of the per-update lookups."""
+    concurrently = "CONCURRENTLY " if connection.dialect.name == "postgresql" else ""
+    for name, columns in INDEXES.items():
+        connection.execute(text(f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {columns}"))
@@ -0,0 +1,14 @@
+"""Index items by owner and id, so a page of "My items" reads only its own rows."""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Built without a transaction, so PostgreSQL creates it without locking writes
+TRANSACTIONAL = False
+
+
+def upgrade(connection: Connection) -> None:
+    """Replace the owner index of the items with one on (owner_id, id)."""
+    concurrently = "CONCURRENTLY " if connection.dialect.name == "postgresql" else ""
+    connection.execute(text(f"CREATE INDEX {concurrently}IF NOT EXISTS ix_items_owner_id_id ON items (owner_id, id)"))
+    # Its leading column covers the lookups of the former owner index
+    connection.execute(text(f"DROP INDEX {concurrently}IF EXISTS ix_items_owner_id"))
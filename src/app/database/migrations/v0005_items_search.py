@@ -0,0 +1,47 @@
+"""Full-text index of the items: an FTS5 table kept by triggers on SQLite, a weighted tsvector on PostgreSQL."""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Built without a transaction, so PostgreSQL creates the GIN index without locking writes
+TRANSACTIONAL = False
+
+SQLITE = [
+    # External content table: the index stores tokens only, the text stays in `items`. The owner is
+    # indexed as a token, so a search intersects the owner's few rows with the matches of the words.
+    """CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+        name, content, owner_id, content='items', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts (rowid, name, content, owner_id) VALUES (new.id, new.name, new.content, new.owner_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts (items_fts, rowid, name, content, owner_id)
+        VALUES ('delete', old.id, old.name, old.content, old.owner_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE OF name, content, owner_id ON items BEGIN
+        INSERT INTO items_fts (items_fts, rowid, name, content, owner_id)
+        VALUES ('delete', old.id, old.name, old.content, old.owner_id);
+        INSERT INTO items_fts (rowid, name, content, owner_id) VALUES (new.id, new.name, new.content, new.owner_id);
+    END""",
+    # Index the existing items, or reindex after the items were dropped and recreated
+    "INSERT INTO items_fts (items_fts) VALUES ('rebuild')",
+]
+
+POSTGRESQL = [
+    # The 'simple' configuration does not stem, the items are written in several languages
+    """ALTER TABLE items ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(content, '')), 'B')
+    ) STORED""",
+    # btree_gin lets one GIN index hold the owner and the words, so a search intersects both
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    """CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_items_owner_id_search_vector
+    ON items USING gin (owner_id, search_vector)""",
+]
+
+
+def upgrade(connection: Connection) -> None:
+    """Create the full-text index of the items for the dialect, none for other dialects."""
+    statements = {"sqlite": SQLITE, "postgresql": POSTGRESQL}.get(connection.dialect.name, [])
+    for statement in statements:
+        connection.execute(text(statement))
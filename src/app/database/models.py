@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, Integer, String
+
+from ..models import Base
+
+
+class ExportWatermark(Base):
+    """Latest change timestamp of a table covered by the data exports"""
+
+    __tablename__ = "export_watermarks"
+
+    table_name = Column(String, primary_key=True)
+    watermark = Column(DateTime, nullable=False)
+    exported_at = Column(DateTime, nullable=False)
+
+
+class SchemaVersion(Base):
+    """Migration applied to the database schema"""
+
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime, nullable=False)
@@ -0,0 +1,172 @@
+"""Run the synchronous feature handlers on top of AsyncTeleBot."""
+import asyncio
+import functools
+import inspect
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_handler_backends import BaseMiddleware
+from telebot.states.sync.context import StateContext
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+# Handler decorators that get their handler functions wrapped into coroutines
+HANDLER_DECORATORS = (
+    "message_handler",
+    "edited_message_handler",
+    "callback_query_handler",
+    "inline_handler",
+    "chosen_inline_handler",
+)
+
+
+class _SyncContextManager:
+    """Expose an async context manager (e.g. state data) as a sync one."""
+
+    def __init__(self, bridge: "SyncBotBridge", async_context: Any) -> None:
+        self.bridge = bridge
+        self.async_context = async_context
+
+    def __enter__(self):
+        return self.bridge.wait(self.async_context.__aenter__())
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self.bridge.wait(self.async_context.__aexit__(exc_type, exc_value, traceback))
+
+
+class SyncBotBridge:
+    """
+    TeleBot-compatible facade over an AsyncTeleBot.
+
+    Feature modules register plain functions with `bot.message_handler(...)` etc.
+    The bridge registers coroutine wrappers on the async bot which run the handler
+    bodies on a bounded thread pool, so a slow handler never blocks the event loop.
+    Bot API calls made from those threads are scheduled on the event loop and
+    awaited there, which keeps all Telegram I/O on a single aiohttp session.
+    Handlers that are coroutine functions are registered as they are and run on
+    the loop: slow handlers use them to wait without holding a thread.
+    """
+
+    def __init__(self, bot: AsyncTeleBot, max_workers: int = 32) -> None:
+        """
+        Args:
+            bot: AsyncTeleBot instance
+            max_workers: Number of threads running sync handler bodies
+        """
+        self.bot = bot
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="handler")
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Bind the event loop that owns the async bot."""
+        self.loop = loop
+
+    def wait(self, awaitable: Any) -> Any:
+        """Run an awaitable on the bot loop and block the calling thread until it is done."""
+        if self.loop is None:
+            raise RuntimeError("Event loop is not bound. Call bind_loop() first.")
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self.loop:
+            raise RuntimeError("Blocking bot call made from the event loop thread; await the async bot instead.")
+
+        async def _await():
+            return await awaitable
+
+        return asyncio.run_coroutine_threadsafe(_await(), self.loop).result()
+
+    def to_coroutine(self, func: Callable) -> Callable:
+        """Wrap a sync handler into a coroutine that runs it on the executor."""
+        if inspect.iscoroutinefunction(func):
+            return func
+
+        # functools.wraps keeps the original signature, which telebot inspects
+        # to decide whether to pass the `data` dictionary.
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+        return wrapper
+
+    def _handler_decorator(self, name: str) -> Callable:
+        register = getattr(self.bot, name)
+
+        def decorator_factory(*args, **kwargs):
+            def decorator(func):
+                register(*args, **kwargs)(self.to_coroutine(func))
+                return func
+
+            return decorator
+
+        return decorator_factory
+
+    def __getattr__(self, name: str) -> Any:
+        """Return a handler decorator, or the async bot's attribute with its coroutines made blocking."""
+        if name in HANDLER_DECORATORS:
+            return self._handler_decorator(name)
+
+        attr = getattr(self.bot, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if inspect.isawaitable(result):
+                return self.wait(result)
+            if hasattr(result, "__aenter__") and not hasattr(result, "__enter__"):
+                return _SyncContextManager(self, result)
+            return result
+
+        return call
+
+    def shutdown(self) -> None:
+        """Wait for running handlers and stop the executor."""
+        self.executor.shutdown(wait=True)
+
+
+async def run_blocking(executor: Executor, func: Callable, *args, **kwargs) -> Any:
+    """
+    Await `func(*args, **kwargs)` run on `executor`.
+
+    Async handlers hand their blocking library calls (yt-dlp, gspread) to a small
+    pool of their own, so a burst of them neither blocks the loop nor takes the
+    threads of the sync handlers.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+class BridgeStateMiddleware(BaseMiddleware):
+    """Async counterpart of StateMiddleware that hands sync state contexts to handlers."""
+
+    def __init__(self, bridge: SyncBotBridge) -> None:
+        """
+        Args:
+            bridge (SyncBotBridge): Bridge wrapping the async bot
+        """
+        self.bridge = bridge
+        self.update_sensitive = False
+        self.update_types = [
+            "message",
+            "callback_query",
+            "inline_query",
+            "edited_message",
+        ]
+
+    async def pre_process(self, message, data):
+        """Attach a sync StateContext bound to the bridge."""
+        state_context = StateContext(message, self.bridge)
+        data["state_context"] = state_context
+        data["state"] = state_context
+
+    async def post_process(self, message, data, exception):
+        """ """
+        pass
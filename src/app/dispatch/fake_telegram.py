@@ -0,0 +1,100 @@
+"""Local stand-in for the Telegram Bot API, used to load-test the bot without network access."""
+import itertools
+import json
+import threading
+import time
+from typing import Any, Optional
+
+from telebot import apihelper
+from telebot.util import CustomRequestResponse
+
+FAKE_BOT_USER = {"id": 1000000001, "is_bot": True, "first_name": "Fake bot", "username": "fake_bot"}
+
+
+class FakeTelegramApi:
+    """
+    Answers Bot API calls locally.
+
+    Install it as telebot's request sender with `install()`: every `bot.send_message`,
+    `bot.edit_message_text`, ... then returns a well-formed result after an optional
+    artificial latency, and the calls are recorded for assertions.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        """
+        Args:
+            latency: Seconds to sleep on every API call, to mimic network round trips
+        """
+        self.latency = latency
+        self.calls: list[tuple[str, dict]] = []
+        self._lock = threading.Lock()
+        self._message_ids = itertools.count(1)
+        self._floods: dict[str, list[int]] = {}
+
+    def install(self) -> "FakeTelegramApi":
+        """Route all telebot API requests to this fake."""
+        apihelper.CUSTOM_REQUEST_SENDER = self
+        return self
+
+    @staticmethod
+    def uninstall() -> None:
+        """Restore telebot's default request sender."""
+        apihelper.CUSTOM_REQUEST_SENDER = None
+
+    def add_flood(self, method_name: str, retry_after: int = 1, times: int = 1) -> None:
+        """Answer the next `times` calls to a method with 429 Too Many Requests."""
+        with self._lock:
+            self._floods.setdefault(method_name, []).extend([retry_after] * times)
+
+    def calls_to(self, method_name: str) -> list[dict]:
+        """Return the parameters of all calls to a Bot API method."""
+        with self._lock:
+            return [params for name, params in self.calls if name == method_name]
+
+    def __call__(self, method, url, params=None, files=None, timeout=None, proxies=None) -> CustomRequestResponse:
+        """Handle one request the way telebot's apihelper would send it."""
+        method_name = url.rsplit("/", 1)[-1]
+        params = dict(params or {})
+        with self._lock:
+            self.calls.append((method_name, params))
+            floods = self._floods.get(method_name)
+            retry_after = floods.pop(0) if floods else None
+        if self.latency:
+            time.sleep(self.latency)
+        if retry_after is not None:
+            error = {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            }
+            return CustomRequestResponse(json.dumps(error), status_code=429, reason="Too Many Requests")
+        return CustomRequestResponse(json.dumps({"ok": True, "result": self._result(method_name, params)}))
+
+    def _result(self, method_name: str, params: dict) -> Any:
+        if method_name == "getMe":
+            return FAKE_BOT_USER
+        if method_name.startswith("send") or method_name == "editMessageText":
+            return {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": int(params.get("chat_id", 0)), "type": "private"},
+                "from": FAKE_BOT_USER,
+                "text": params.get("text", ""),
+            }
+        return True
+
+
+def make_message_update(update_id: int, chat_id: int, text: str, user_id: Optional[int] = None) -> dict:
+    """Build the JSON body Telegram would post to a webhook for a private text message."""
+    user_id = user_id or chat_id
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "text": text,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"},
+        },
+    }
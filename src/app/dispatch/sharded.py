@@ -0,0 +1,160 @@
+"""Worker pool that keeps updates of one chat in order while chats run in parallel."""
+import itertools
+import logging
+import threading
+import time
+from queue import Full, Queue
+from typing import Any, Optional
+
+from telebot import TeleBot
+from telebot.types import Update
+from telebot.util import WorkerThread
+
+from ..metrics import metrics
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+def _update_payload(update: Any) -> Any:
+    """Return the message, callback query, ... carried by a raw update."""
+    if isinstance(update, Update):
+        # Raw updates carry exactly one payload (message, callback_query, ...)
+        for payload in vars(update).values():
+            if payload is not None and not isinstance(payload, int):
+                return payload
+        return None
+    return update
+
+
+def update_shard_key(update: Any) -> Optional[int]:
+    """Return the chat id of an update, falling back to the sender id."""
+    update = _update_payload(update)
+    if update is None:
+        return None
+    chat = getattr(update, "chat", None)
+    if chat is None:
+        # Callback queries carry the chat on the message they are attached to
+        chat = getattr(getattr(update, "message", None), "chat", None)
+    if chat is not None:
+        return chat.id
+    from_user = getattr(update, "from_user", None)
+    if from_user is not None:
+        return from_user.id
+    return None
+
+
+def update_user_id(update: Any) -> Optional[int]:
+    """Return the sender id of an update, falling back to the chat id."""
+    payload = _update_payload(update)
+    from_user = getattr(payload, "from_user", None)
+    if from_user is not None:
+        return from_user.id
+    return update_shard_key(payload)
+
+
+class ShardedWorkerPool:
+    """
+    Drop-in replacement for telebot's ThreadPool.
+
+    Each worker thread owns one queue. Tasks are routed by the chat id of the
+    update they process, so the updates of one chat are handled strictly in the
+    order they were received, and updates of different chats run in parallel.
+    The middleware chain is untouched: the tasks are still telebot's
+    `_run_middlewares_and_handler` calls.
+    """
+
+    def __init__(self, bot: TeleBot, num_workers: int = 4, max_queue_size: int = 0) -> None:
+        """
+        Args:
+            bot: TeleBot instance, used for its exception handler
+            num_workers: Number of shards (one worker thread per shard)
+            max_queue_size: Maximum number of queued tasks per shard, 0 for unbounded
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        self.telebot = bot
+        self.num_threads = num_workers
+        self.queues: list[Queue] = [Queue(maxsize=max_queue_size) for _ in range(num_workers)]
+        self.workers = [
+            WorkerThread(self.on_exception, queue, name=f"ShardWorker{index}") for index, queue in enumerate(self.queues)
+        ]
+        self._round_robin = itertools.count()
+
+        self.exception_event = threading.Event()
+        self.exception_info = None
+
+        for index in range(num_workers):
+            metrics.gauge(f"dispatch.shard_queue_depth.{index}", self.queues[index].qsize)
+
+    def shard_for(self, key: Optional[int]) -> int:
+        """Return the shard index for a shard key."""
+        if key is None:
+            return next(self._round_robin) % self.num_threads
+        return hash(key) % self.num_threads
+
+    def put(self, func, *args, **kwargs) -> None:
+        """Queue a task on the shard of the update passed as its first argument."""
+        self._put(func, args, kwargs, block=True)
+
+    def try_put(self, func, *args, **kwargs) -> bool:
+        """Queue a task like put(), but return False instead of waiting when the shard is full."""
+        try:
+            self._put(func, args, kwargs, block=False)
+        except Full:
+            return False
+        return True
+
+    def _put(self, func, args: tuple, kwargs: dict, block: bool) -> None:
+        key = update_shard_key(args[0]) if args else None
+        shard = self.shard_for(key)
+        enqueued_at = time.monotonic()
+
+        def task():
+            metrics.observe("dispatch.queue_wait_seconds", time.monotonic() - enqueued_at)
+            func(*args, **kwargs)
+
+        self.queues[shard].put((task, (), {}), block=block)
+        metrics.inc("dispatch.updates_total")
+
+    def queue_depths(self) -> list[int]:
+        """Return the number of queued updates per shard."""
+        return [queue.qsize() for queue in self.queues]
+
+    def on_exception(self, worker_thread, exc_info) -> None:
+        """Report a task exception to the bot, like telebot's ThreadPool does."""
+        if self.telebot.exception_handler is not None:
+            handled = self.telebot.exception_handler.handle(exc_info)
+        else:
+            handled = False
+        if not handled:
+            self.exception_info = exc_info
+            self.exception_event.set()
+        worker_thread.continue_event.set()
+
+    def raise_exceptions(self) -> None:
+        """Re-raise the last unhandled task exception."""
+        if self.exception_event.is_set():
+            raise self.exception_info
+
+    def clear_exceptions(self) -> None:
+        """Clear the last task exception."""
+        self.exception_event.clear()
+
+    def close(self) -> None:
+        """Stop the worker threads."""
+        for worker in self.workers:
+            worker.stop()
+        for worker in self.workers:
+            if worker != threading.current_thread():
+                worker.join()
+
+
+def use_sharded_worker_pool(bot: TeleBot, num_workers: int) -> ShardedWorkerPool:
+    """Make a TeleBot created with `threaded=False` dispatch through a ShardedWorkerPool."""
+    pool = ShardedWorkerPool(bot, num_workers)
+    bot.worker_pool = pool
+    bot.threaded = True
+    logger.info(f"Per-chat ordered dispatch enabled with {num_workers} workers")
+    return pool
@@ -0,0 +1,468 @@
+"""Supervisor that fans updates out to worker processes sharded by user id."""
+import itertools
+import logging
+import multiprocessing
+import multiprocessing.connection
+import signal
+import threading
+import time
+from queue import Full, Queue
+from typing import Any, Callable, Optional
+
+from telebot import TeleBot
+from telebot.types import Update
+
+from ..metrics import metrics
+from .sharded import ShardedWorkerPool, update_user_id
+from .webhook import WebhookReceiver
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+HEARTBEAT_INTERVAL = 1.0  # Seconds between heartbeats of a worker
+MAX_RESTART_DELAY = 30.0  # Upper bound of the backoff for workers that keep crashing
+IN_FLIGHT = 16  # Updates handed to a worker process ahead of time, and waiting per shard in it
+
+class _Broadcasts:
+    """Worker process side of the control pipe: its end of the pipe and the callbacks by topic."""
+
+    def __init__(self) -> None:
+        self.control: Optional[multiprocessing.connection.Connection] = None
+        self.subscribers: dict[str, Callable[[Any], None]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, topic: str, payload: Any) -> None:
+        """Send a message to the supervisor, which relays it to the other workers."""
+        if self.control is None:
+            return
+        with self._lock:
+            try:
+                self.control.send((topic, payload))
+            except OSError as e:
+                logger.warning(f"Error publishing {topic}: {e}")
+
+    def receive(self) -> None:
+        """Call the subscribers with the messages relayed by the supervisor, until the pipe is closed."""
+        while True:
+            try:
+                topic, payload = self.control.recv()
+            except (EOFError, OSError):
+                return
+            callback = self.subscribers.get(topic)
+            if callback is None:
+                continue
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception(f"Error handling broadcast {topic}")
+
+
+_broadcasts = _Broadcasts()
+
+
+def publish(topic: str, payload: Any) -> None:
+    """
+    Send `payload` to the `topic` subscriber of every other worker process.
+
+    Keeps the in-memory state of the workers consistent, e.g. drops a record
+    cached by every worker when one of them changes it. Does nothing outside a
+    worker process.
+    """
+    _broadcasts.publish(topic, payload)
+
+
+def subscribe(topic: str, callback: Callable[[Any], None]) -> None:
+    """Call `callback` with the payload of every `topic` message published by another worker process."""
+    _broadcasts.subscribers[topic] = callback
+
+
+class _RunningUpdates:
+    """Updates a worker process accepted and the start times of those being handled."""
+
+    def __init__(self, bot: TeleBot) -> None:
+        """
+        Args:
+            bot: TeleBot created with `threaded=False`
+        """
+        self.bot = bot
+        self.pending = 0
+        self._started: dict[int, float] = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+
+    def accept(self) -> None:
+        """Count an update queued for `handle`."""
+        with self._lock:
+            self.pending += 1
+
+    def handle(self, update: Update) -> None:
+        """Process an accepted update, recording its start time meanwhile."""
+        token = next(self._tokens)
+        with self._lock:
+            self._started[token] = time.time()
+        try:
+            self.bot.process_new_updates([update])
+        except Exception:
+            logger.exception(f"Error handling update {update.update_id}")
+        finally:
+            with self._lock:
+                del self._started[token]
+                self.pending -= 1
+
+    def oldest_start(self) -> float:
+        """Return the start time of the longest running update, 0 if none is running."""
+        with self._lock:
+            return min(self._started.values(), default=0.0)
+
+
+def exit_on_sigterm(signum, frame) -> None:
+    """
+    Signal handler turning SIGTERM into a normal exit.
+
+    SIGTERM otherwise ends the process at once, skipping the exit handlers that write
+    what it still holds, such as the pending activity timestamps.
+    """
+    raise SystemExit(0)
+
+
+def _send_heartbeats(running: _RunningUpdates, heartbeat, busy_since, in_flight) -> None:
+    while True:
+        heartbeat.value = time.time()
+        busy_since.value = running.oldest_start()
+        in_flight.value = running.pending
+        time.sleep(HEARTBEAT_INTERVAL)
+
+
+def _worker_main(
+    index: int,
+    channel,
+    control,
+    heartbeat,
+    busy_since,
+    in_flight,
+    bot_factory: Callable[[], TeleBot],
+    handler_threads: int,
+) -> None:
+    """Entry point of a worker process: build the bot and process updates from the channel on a sharded pool."""
+    # The supervisor stops a stuck worker with SIGTERM
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
+    _broadcasts.control = control
+    bot = bot_factory()
+    if bot.threaded:
+        # The worker hands updates to its own pool, to know which ones are running and since when
+        raise ValueError("The worker bot must be created with threaded=False")
+    running = _RunningUpdates(bot)
+    # Bounded shards: a full shard stops reading the channel, which holds updates back in the supervisor
+    pool = ShardedWorkerPool(bot, handler_threads, max_queue_size=IN_FLIGHT)
+    threading.Thread(
+        target=_send_heartbeats, args=(running, heartbeat, busy_since, in_flight), name="Heartbeat", daemon=True
+    ).start()
+    threading.Thread(target=_broadcasts.receive, name="Broadcasts", daemon=True).start()
+    logger.info(f"Worker {index} started")
+    while True:
+        update = channel.get()
+        if update is None:
+            break
+        running.accept()
+        pool.put(running.handle, update)
+    while running.pending:
+        time.sleep(0.05)
+    pool.close()
+    logger.info(f"Worker {index} stopped")
+
+
+class _Worker:
+    """
+    A worker process slot.
+
+    Updates wait in `pending`, a queue of the supervisor process, and a forwarder
+    thread moves them to `channel`, the small inter-process queue of the current
+    worker process. A process killed while reading `channel` leaves its lock held,
+    so a restarted worker gets a new channel, and only the updates that were in
+    flight are lost. `control` is the supervisor's end of a pipe carrying the
+    broadcasts of the worker process, and is replaced with it.
+    """
+
+    def __init__(self, context, index: int, queue_size: int) -> None:
+        self.context = context
+        self.index = index
+        self.pending: Queue = Queue(maxsize=queue_size)
+        self.channel = context.Queue(maxsize=IN_FLIGHT)
+        self.control: Optional[multiprocessing.connection.Connection] = None
+        self.heartbeat = context.Value("d", 0.0, lock=False)
+        self.busy_since = context.Value("d", 0.0, lock=False)
+        self.in_flight = context.Value("i", 0, lock=False)
+        self.process = None
+        self.started_at = 0.0
+        self.restart_delay = 0.0
+
+    def forward(self) -> None:
+        """Move updates from `pending` to the channel of the current process, until None is received."""
+        while True:
+            update = self.pending.get()
+            while True:
+                # Hold updates back while the process is down, its channel is about to be replaced
+                if update is not None and not self.is_alive():
+                    time.sleep(0.05)
+                    continue
+                try:
+                    self.channel.put(update, timeout=HEARTBEAT_INTERVAL)
+                    break
+                except Full:
+                    continue
+            if update is None:
+                return
+
+    def start_process(self, bot_factory: Callable[[], TeleBot], handler_threads: int) -> None:
+        """Start a worker process on a fresh channel and control pipe."""
+        if self.process is not None:
+            lost = self._qsize(self.channel) + self.in_flight.value
+            if lost:
+                metrics.inc("supervisor.dropped_total", lost)
+                logger.warning(f"Dropped {lost} updates in flight to worker {self.index}")
+            self.channel.close()
+            self.channel = self.context.Queue(maxsize=IN_FLIGHT)
+        # Only read and written by the supervisor's relay thread from now on, which closes it
+        self.control, control = self.context.Pipe()
+        self.heartbeat.value = time.time()
+        self.busy_since.value = 0.0
+        self.in_flight.value = 0
+        self.started_at = time.monotonic()
+        self.process = self.context.Process(
+            target=_worker_main,
+            args=(
+                self.index,
+                self.channel,
+                control,
+                self.heartbeat,
+                self.busy_since,
+                self.in_flight,
+                bot_factory,
+                handler_threads,
+            ),
+            name=f"BotWorker{self.index}",
+            daemon=True,
+        )
+        self.process.start()
+        # The relay sees the end of the pipe once the worker's end is the only other one
+        control.close()
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    @staticmethod
+    def _qsize(queue) -> int:
+        try:
+            return queue.qsize()
+        except NotImplementedError:
+            # Not available on macOS
+            return 0
+
+
+class Supervisor:
+    """
+    Runs N worker processes, each with the full middleware and handler stack.
+
+    The ingest side (polling loop or webhook receiver) stays in the supervisor
+    process and routes every update by the hash of its sender id, so the FSM
+    state and the per-chat order of a user stay on one worker. Each worker runs
+    its updates on a ShardedWorkerPool, so a slow update only delays the chats
+    of its shard. A monitor thread restarts workers that exit, stop sending
+    heartbeats (sent by a thread of their own) or run one update for longer than
+    `handler_timeout`; updates still waiting for a restarted worker are handled
+    by its replacement. A relay thread passes the messages a worker `publish`es
+    on to the other workers.
+    """
+
+    def __init__(
+        self,
+        bot_factory: Callable[[], TeleBot],
+        num_workers: int = 2,
+        queue_size: int = 1000,
+        health_timeout: float = 30.0,
+        handler_threads: int = 4,
+        handler_timeout: float = 900.0,
+    ) -> None:
+        """
+        Args:
+            bot_factory: Picklable callable building a fully configured TeleBot with `threaded=False`
+                in a worker process
+            num_workers: Number of worker processes
+            queue_size: Number of updates that may wait for each worker
+            health_timeout: Seconds without heartbeat after which a worker is restarted
+            handler_threads: Number of threads (and shards) handling updates in each worker
+            handler_timeout: Seconds an update may run before its worker is considered stuck and restarted
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        self.bot_factory = bot_factory
+        self.health_timeout = health_timeout
+        self.handler_threads = handler_threads
+        self.handler_timeout = handler_timeout
+        # Worker processes are spawned, forking a process that runs threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        self.workers = [_Worker(context, index, queue_size) for index in range(num_workers)]
+        self._forwarders: list[threading.Thread] = []
+        self._stopped = threading.Event()
+
+        metrics.gauge("supervisor.alive_workers", lambda: sum(worker.is_alive() for worker in self.workers))
+        for worker in self.workers:
+            metrics.gauge(f"supervisor.pending.{worker.index}", worker.pending.qsize)
+
+    def start(self) -> None:
+        """Start the worker processes and the health monitor."""
+        for worker in self.workers:
+            worker.start_process(self.bot_factory, self.handler_threads)
+            forwarder = threading.Thread(target=worker.forward, name=f"SupervisorForwarder{worker.index}", daemon=True)
+            forwarder.start()
+            self._forwarders.append(forwarder)
+        threading.Thread(target=self._monitor_loop, name="SupervisorMonitor", daemon=True).start()
+        threading.Thread(target=self._relay_loop, name="SupervisorRelay", daemon=True).start()
+        logger.info(f"Supervisor started {len(self.workers)} worker processes")
+
+    def worker_for(self, update: Update) -> int:
+        """Return the index of the worker handling an update."""
+        user_id = update_user_id(update)
+        return hash(user_id if user_id is not None else update.update_id) % len(self.workers)
+
+    def submit(self, update: Update, block: bool = True) -> bool:
+        """Send an update to its worker. Without `block`, return False if the worker's queue is full."""
+        worker = self.workers[self.worker_for(update)]
+        try:
+            worker.pending.put(update, block=block)
+        except Full:
+            metrics.inc("supervisor.rejected_total")
+            return False
+        metrics.inc("supervisor.updates_total")
+        return True
+
+    def run_polling(self, bot: TeleBot, timeout: int = 60) -> None:
+        """Fetch updates with long polling and fan them out until interrupted."""
+        logger.info("Starting supervisor polling...")
+        offset = None
+        try:
+            while not self._stopped.is_set():
+                try:
+                    updates = bot.get_updates(offset=offset, timeout=timeout, long_polling_timeout=timeout)
+                except Exception as e:
+                    logger.error(f"Failed to get updates: {e}")
+                    time.sleep(1)
+                    continue
+                for update in updates:
+                    # Blocking put: a saturated worker slows down polling instead of growing memory
+                    self.submit(update)
+                    offset = update.update_id + 1
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Let the workers finish their queues, then stop them."""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        for worker in self.workers:
+            try:
+                worker.pending.put(None, timeout=timeout)
+            except Full:
+                logger.warning(f"Queue of worker {worker.index} is still full")
+        deadline = time.monotonic() + timeout
+        for forwarder in self._forwarders:
+            forwarder.join(max(0.0, deadline - time.monotonic()))
+        for worker in self.workers:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                logger.warning(f"Worker {worker.index} did not stop in {timeout}s, terminating it")
+                self._terminate(worker)
+        logger.info("Supervisor stopped")
+
+    def _relay_loop(self) -> None:
+        while not self._stopped.is_set():
+            senders = {worker.control: worker for worker in self.workers if not worker.control.closed}
+            try:
+                ready = multiprocessing.connection.wait(list(senders), timeout=HEARTBEAT_INTERVAL)
+            except OSError:
+                # A pipe was replaced meanwhile
+                continue
+            for control in ready:
+                try:
+                    message = control.recv()
+                except (EOFError, OSError):
+                    # The worker exited, the monitor restarts it on a new pipe
+                    control.close()
+                    continue
+                for worker in self.workers:
+                    if worker is not senders[control] and not worker.control.closed:
+                        try:
+                            worker.control.send(message)
+                        except OSError as e:
+                            logger.warning(f"Error relaying a broadcast to worker {worker.index}: {e}")
+                metrics.inc("supervisor.broadcasts_total")
+
+    def _monitor_loop(self) -> None:
+        while not self._stopped.wait(HEARTBEAT_INTERVAL):
+            for worker in self.workers:
+                self._check(worker)
+
+    def _check(self, worker: _Worker) -> None:
+        """Restart a worker that exited, stopped sending heartbeats or is stuck on an update."""
+        if self._stopped.is_set():
+            return
+        now = time.time()
+        busy_since = worker.busy_since.value
+        if not worker.process.is_alive():
+            logger.error(f"Worker {worker.index} exited with code {worker.process.exitcode}, restarting it")
+        elif now - worker.heartbeat.value > self.health_timeout:
+            logger.error(f"Worker {worker.index} missed heartbeats for {self.health_timeout}s, restarting it")
+            self._terminate(worker)
+        elif busy_since and now - busy_since > self.handler_timeout:
+            logger.error(f"Worker {worker.index} has run an update for {now - busy_since:.0f}s, restarting it")
+            metrics.inc("supervisor.stuck_total")
+            self._terminate(worker)
+        else:
+            return
+
+        # Back off when a worker crashes right after starting (e.g. a broken handler import)
+        if time.monotonic() - worker.started_at < 10 * HEARTBEAT_INTERVAL:
+            worker.restart_delay = min(MAX_RESTART_DELAY, max(HEARTBEAT_INTERVAL, worker.restart_delay * 2))
+            if self._stopped.wait(worker.restart_delay):
+                return
+        else:
+            worker.restart_delay = 0.0
+
+        metrics.inc("supervisor.restarts_total")
+        worker.start_process(self.bot_factory, self.handler_threads)
+
+    @staticmethod
+    def _terminate(worker: _Worker) -> None:
+        """Stop a worker with SIGTERM, which runs its exit handlers, or kill it if it does not exit."""
+        worker.process.terminate()
+        worker.process.join(10 * HEARTBEAT_INTERVAL)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+
+
+class SupervisorWebhookReceiver(WebhookReceiver):
+    """Webhook receiver that hands updates to the supervisor's worker processes."""
+
+    def __init__(self, supervisor: Supervisor, secret_token: str = "") -> None:
+        """
+        Args:
+            supervisor: Started supervisor
+            secret_token: Expected value of the secret token header, empty to accept any request
+        """
+        super().__init__(secret_token)
+        self.supervisor = supervisor
+
+    def submit(self, update: Update, received_at: Optional[float] = None) -> bool:
+        """Send an update to its worker process. Return False if the worker's queue is full."""
+        if not self.supervisor.submit(update, block=False):
+            metrics.inc("webhook.rejected_total")
+            return False
+        metrics.inc("webhook.accepted_total")
+        return True
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self.supervisor.stop()
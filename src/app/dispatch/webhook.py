@@ -0,0 +1,125 @@
+"""Webhook receiver that acknowledges updates at once and handles them on a worker pool."""
+import abc
+import logging
+import math
+import ssl
+import time
+from typing import Optional
+
+from aiohttp import web
+from telebot import TeleBot
+from telebot.types import Update
+
+from ..metrics import metrics
+from .sharded import ShardedWorkerPool
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"  # noqa: S105
+
+
+class WebhookReceiver(abc.ABC):
+    """
+    aiohttp webhook server that validates requests and hands updates to `submit()`.
+
+    A request is answered with 200 as soon as its update is accepted, 429 when
+    `submit()` refuses it (Telegram retries the update later), 403 on a wrong
+    secret token and 400 on an invalid payload.
+    """
+
+    def __init__(self, secret_token: str = "") -> None:
+        """
+        Args:
+            secret_token: Expected value of the secret token header, empty to accept any request
+        """
+        self.secret_token = secret_token
+
+    @abc.abstractmethod
+    def submit(self, update: Update, received_at: Optional[float] = None) -> bool:
+        """Accept an update for handling. Return False to reject it with 429."""
+
+    async def handle_request(self, request: web.Request) -> web.Response:
+        """Validate a webhook request, queue its update and acknowledge it."""
+        received_at = time.monotonic()
+        if self.secret_token and request.headers.get(SECRET_TOKEN_HEADER) != self.secret_token:
+            metrics.inc("webhook.forbidden_total")
+            return web.Response(status=403)
+
+        try:
+            update = Update.de_json(await request.json())
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            logger.warning(f"Invalid webhook payload: {e}")
+            update = None
+        if update is None or update.update_id is None:
+            metrics.inc("webhook.invalid_total")
+            return web.Response(status=400)
+
+        if not self.submit(update, received_at):
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        return web.Response(status=200)
+
+    def make_app(self, path: str = "/webhook") -> web.Application:
+        """Create the aiohttp application serving the webhook path."""
+        app = web.Application(client_max_size=1024**2)
+        app.router.add_post(path, self.handle_request)
+        return app
+
+    def run(self, host: str, port: int, path: str = "/webhook", ssl_context: Optional[ssl.SSLContext] = None) -> None:
+        """Serve the webhook until interrupted."""
+        logger.info(f"Webhook receiver listening on {host}:{port}{path}")
+        try:
+            web.run_app(self.make_app(path), host=host, port=port, ssl_context=ssl_context, print=None)
+        finally:
+            self.close()
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Release the resources used to handle updates."""
+
+
+class QueuedWebhookReceiver(WebhookReceiver):
+    """
+    Webhook server with immediate ack and a bounded ingest queue.
+
+    A request is parsed and validated, put on the queue of its chat shard and
+    answered with 200 right away, so a slow handler never delays Telegram's
+    delivery. A ShardedWorkerPool drains the queues, keeping each chat in order.
+    When a shard is full the request is rejected with 429, and Telegram retries
+    the update later.
+    """
+
+    def __init__(self, bot: TeleBot, num_workers: int = 4, queue_size: int = 1000, secret_token: str = "") -> None:
+        """
+        Args:
+            bot: TeleBot created with `threaded=False`, so updates are handled on the receiver's workers
+            num_workers: Number of worker threads (and shards)
+            queue_size: Total number of updates that may wait for a worker
+            secret_token: Expected value of the secret token header, empty to accept any request
+        """
+        super().__init__(secret_token)
+        self.bot = bot
+        self.pool = ShardedWorkerPool(bot, num_workers, max_queue_size=max(1, math.ceil(queue_size / num_workers)))
+        metrics.gauge("webhook.queue_depth", lambda: sum(self.pool.queue_depths()))
+
+    def submit(self, update: Update, received_at: Optional[float] = None) -> bool:
+        """Queue an update for handling. Return False if its shard is full."""
+        received_at = received_at if received_at is not None else time.monotonic()
+        if not self.pool.try_put(self._handle, update, received_at):
+            metrics.inc("webhook.rejected_total")
+            return False
+        metrics.inc("webhook.accepted_total")
+        return True
+
+    def _handle(self, update: Update, received_at: float) -> None:
+        metrics.observe("webhook.ingest_lag_seconds", time.monotonic() - received_at)
+        try:
+            self.bot.process_new_updates([update])
+        finally:
+            metrics.observe("webhook.ingest_to_done_seconds", time.monotonic() - received_at)
+
+    def close(self) -> None:
+        """Stop the worker threads."""
+        self.pool.close()
+
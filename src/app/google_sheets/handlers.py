@@ -1,14 +1,17 @@
 import logging
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
-from omegaconf import OmegaConf
 from telebot import TeleBot, types
 from telebot.states import State, StatesGroup
+from telebot.states.asyncio.context import StateContext as AsyncStateContext
 from telebot.states.sync.context import StateContext
 
+from ..catalog import catalog
+from ..config import settings
+from ..dispatch.asyncio_bridge import SyncBotBridge, run_blocking
 from ..menu.markup import create_menu_markup
-from ..plugins.google_sheets.client import GoogleSheetsClient
 from ..plugins.google_sheets.utils import is_valid_date, is_valid_phone_number
+from ..plugins.lazy import LazyObject
 from .markup import create_cancel_button, create_worksheet_selection_markup
 
 # Set logging
@@ -16,11 +19,61 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-strings = config.strings
+config = catalog.config("google_sheets")
+strings = catalog.strings("google_sheets")
 
-google_sheets = GoogleSheetsClient(share_emails=config.app.share_emails)
+
+def create_google_sheets_client():
+    """Import gspread and pandas, and authorize the Google Sheets client."""
+    from ..plugins.google_sheets.client import GoogleSheetsClient
+
+    return GoogleSheetsClient(share_emails=config.app.share_emails)
+
+
+# Authorized on first use, registering the handlers stays cheap
+google_sheets = LazyObject(create_google_sheets_client)
+
+# Requests of the async mode run here, at most GOOGLE_SHEETS_WORKERS at once and off the bridge's threads
+sheets_executor = ThreadPoolExecutor(max_workers=settings.GOOGLE_SHEETS_WORKERS, thread_name_prefix="google-sheets")
+
+
+def open_user_sheet(user_id: int):
+    """Return the Google Sheet of the user, creating it if needed."""
+    user_id_str = str(user_id)
+    try:
+        return google_sheets.get_sheet(user_id_str)
+    except Exception:
+        logger.info(f"Google Sheet for user {user_id_str} not found")
+        return google_sheets.create_sheet(user_id_str)
+
+
+def list_worksheets(user_id: int) -> list[str]:
+    """Return the worksheet names of the user's sheet, creating the sheet if needed."""
+    return google_sheets.get_table_names(open_user_sheet(user_id))
+
+
+def add_resource(user_id: int, worksheet_name: str, values: list, create_worksheet: bool = False) -> str:
+    """
+    Add a row to a worksheet of the user's sheet and return the public link of the sheet.
+
+    Args:
+        user_id: Telegram ID of the user
+        worksheet_name: Worksheet receiving the row
+        values: Values of the row
+        create_worksheet: Create the sheet and the worksheet if they don't exist
+    """
+    if create_worksheet:
+        sheet = open_user_sheet(user_id)
+        # Create worksheet for the user if it doesn't exist
+        try:
+            google_sheets.create_worksheet(sheet, worksheet_name)
+        except Exception:
+            logging.info(f"Worksheet {worksheet_name} already exists")
+    else:
+        sheet = google_sheets.get_sheet(str(user_id))
+    google_sheets.add_row(sheet, worksheet_name, values)
+    logger.info(f"Data added to Google Sheet: {values}")
+    return google_sheets.get_public_link(sheet)
 
 
 # Define States
@@ -113,7 +166,6 @@ def register_handlers(bot: TeleBot):
             reply_markup=create_cancel_button(user.lang),
         )
 
-    @bot.message_handler(state=GoogleSheetsState.birthday)
     def get_birthday(message: types.Message, data: dict):
         user = data["user"]
         if not is_valid_date(message.text):
@@ -126,22 +178,13 @@ def register_handlers(bot: TeleBot):
         state = StateContext(message, bot)
         state.add_data(birthday=message.text)
 
-        # Create google sheet for the user
-        user_id_str = str(user.id)
-        try:
-            sheet = google_sheets.get_sheet(user_id_str)
-        except Exception:
-            logger.info(f"Google Sheet for user {user_id_str} not found")
-            sheet = google_sheets.create_sheet(user_id_str)
-
-        # Get existing worksheets
-        worksheet_names = google_sheets.get_table_names(sheet)
+        # Get existing worksheets, creating the google sheet for the user
+        worksheet_names = list_worksheets(user.id)
         markup = create_worksheet_selection_markup(worksheet_names, user.lang)
 
         state.set(GoogleSheetsState.select_worksheet)
         bot.send_message(message.chat.id, strings[user.lang].select_worksheet, reply_markup=markup)
 
-    @bot.callback_query_handler(state=GoogleSheetsState.select_worksheet)
     def choose_worksheet(call: types.CallbackQuery, data: dict):
         user = data["user"]
         state = StateContext(call, bot)
@@ -155,12 +198,9 @@ def register_handlers(bot: TeleBot):
                 reply_markup=create_cancel_button(user.lang),
             )
         else:
-            sheet = google_sheets.get_sheet(str(user.id))
             with state.data() as data_items:
-                google_sheets.add_row(sheet, worksheet_choice, list(data_items.values()))
-                logger.info(f"Data added to Google Sheet: {data_items}")
-
-            public_link = google_sheets.get_public_link(sheet)
+                values = list(data_items.values())
+            public_link = add_resource(user.id, worksheet_choice, values)
 
             bot.send_message(
                 call.message.chat.id,
@@ -168,35 +208,88 @@ def register_handlers(bot: TeleBot):
             )
             state.delete()
 
-    @bot.message_handler(state=GoogleSheetsState.worksheet_name)
     def get_worksheet_name(message: types.Message, data: dict):
         user = data["user"]
         state = StateContext(message, bot)
         worksheet_name = message.text
 
-        user_id_str = str(user.id)
+        with state.data() as data_items:
+            values = list(data_items.values())
+        public_link = add_resource(user.id, worksheet_name, values, create_worksheet=True)
 
-        # Create google sheet for the user
-        try:
-            sheet = google_sheets.get_sheet(user_id_str)
-        except Exception:
-            logger.info(f"Google Sheet for user {user_id_str} not found")
-            sheet = google_sheets.create_sheet(user_id_str)
+        bot.send_message(
+            message.chat.id,
+            strings[user.lang].resource_created.format(public_link=public_link),
+        )
+        state.delete()
 
-        # Create worksheet for the user if it doesn't exist
-        try:
-            google_sheets.create_worksheet(sheet, worksheet_name)
-        except Exception:
-            logging.info(f"Worksheet {worksheet_name} already exists")
+    async def get_birthday_async(message: types.Message, data: dict):
+        async_bot = bot.bot
+        user = data["user"]
+        if not is_valid_date(message.text):
+            await async_bot.send_message(
+                message.chat.id,
+                strings[user.lang].invalid_date_format,
+                reply_markup=create_cancel_button(user.lang),
+            )
+            return
+        state = AsyncStateContext(message, async_bot)
+        await state.add_data(birthday=message.text)
 
-        with state.data() as data_items:
-            google_sheets.add_row(sheet, worksheet_name, list(data_items.values()))
-            logger.info(f"Data added to Google Sheet: {data_items}")
+        worksheet_names = await run_blocking(sheets_executor, list_worksheets, user.id)
+        markup = create_worksheet_selection_markup(worksheet_names, user.lang)
 
-        public_link = google_sheets.get_public_link(sheet)
+        await state.set(GoogleSheetsState.select_worksheet)
+        await async_bot.send_message(message.chat.id, strings[user.lang].select_worksheet, reply_markup=markup)
 
-        bot.send_message(
+    async def choose_worksheet_async(call: types.CallbackQuery, data: dict):
+        async_bot = bot.bot
+        user = data["user"]
+        state = AsyncStateContext(call, async_bot)
+        worksheet_choice = call.data
+
+        if worksheet_choice == "create_new":
+            await state.set(GoogleSheetsState.worksheet_name)
+            await async_bot.send_message(
+                call.message.chat.id,
+                strings[user.lang].enter_worksheet_name,
+                reply_markup=create_cancel_button(user.lang),
+            )
+        else:
+            async with state.data() as data_items:
+                values = list(data_items.values())
+            public_link = await run_blocking(sheets_executor, add_resource, user.id, worksheet_choice, values)
+
+            await async_bot.send_message(
+                call.message.chat.id,
+                strings[user.lang].resource_created.format(public_link=public_link),
+            )
+            await state.delete()
+
+    async def get_worksheet_name_async(message: types.Message, data: dict):
+        async_bot = bot.bot
+        user = data["user"]
+        state = AsyncStateContext(message, async_bot)
+        worksheet_name = message.text
+
+        async with state.data() as data_items:
+            values = list(data_items.values())
+        public_link = await run_blocking(
+            sheets_executor, add_resource, user.id, worksheet_name, values, create_worksheet=True
+        )
+
+        await async_bot.send_message(
             message.chat.id,
             strings[user.lang].resource_created.format(public_link=public_link),
         )
-        state.delete()
+        await state.delete()
+
+    # In async mode the Google Sheets requests are awaited on the event loop instead of holding bridge threads
+    async_mode = isinstance(bot, SyncBotBridge)
+    bot.message_handler(state=GoogleSheetsState.birthday)(get_birthday_async if async_mode else get_birthday)
+    bot.callback_query_handler(state=GoogleSheetsState.select_worksheet)(
+        choose_worksheet_async if async_mode else choose_worksheet
+    )
+    bot.message_handler(state=GoogleSheetsState.worksheet_name)(
+        get_worksheet_name_async if async_mode else get_worksheet_name
+    )
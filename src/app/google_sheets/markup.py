@@ -1,13 +1,12 @@
 import logging
-from pathlib import Path
 
-from omegaconf import OmegaConf
 from telebot.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from ..catalog import catalog
+from ..markup_cache import cached_markup
+
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-strings = config.strings
+strings = catalog.strings("google_sheets")
 
 
 # Set up logging
@@ -15,6 +14,7 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
 
+@cached_markup(key=lambda worksheet_names, lang: (tuple(worksheet_names), lang))
 def create_worksheet_selection_markup(worksheet_names: list[str], lang: str):
     worksheet_buttons = [InlineKeyboardButton(text=name, callback_data=name) for name in worksheet_names]
     worksheet_buttons.append(InlineKeyboardButton(text=strings[lang].create_new_worksheet, callback_data="create_new"))
@@ -24,6 +24,7 @@ def create_worksheet_selection_markup(worksheet_names: list[str], lang: str):
     return markup
 
 
+@cached_markup
 def create_cancel_button(lang):
     cancel_button = InlineKeyboardMarkup(row_width=1)
     cancel_button.add(
@@ -0,0 +1,120 @@
+"""AsyncSession variants of the functions of `items.service`."""
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from ..reference_cache import reference_cache
+from .cache import item_match_cache
+from .models import Item, ItemCategory
+from .search import search_statement, search_terms
+from .service import ItemsPage, items_by_owner_statement, to_page
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+async def read_item_category(db_session: AsyncSession, category_id: int):
+    """Get an item category by ID, from the reference cache"""
+    categories = await reference_cache.rows_async(ItemCategory, db_session)
+    return next((category for category in categories if category.id == category_id), None)
+
+
+async def read_item_categories(db_session: AsyncSession, skip: int = 0, limit: int = 10):
+    """Get all item categories, from the reference cache"""
+    return list((await reference_cache.rows_async(ItemCategory, db_session))[skip : skip + limit])
+
+
+async def create_item(db_session: AsyncSession, name: str, content: str, category: int, owner_id: int):
+    """Create a new item"""
+    item = Item(
+        name=name,
+        content=content,
+        category=category,
+        owner_id=owner_id,
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    )
+    db_session.add(item)
+    await db_session.commit()
+    await db_session.refresh(item)
+    # The inline lookup must show the new item at once
+    item_match_cache.invalidate(owner_id)
+    return item
+
+
+async def read_item(db_session: AsyncSession, item_id: int):
+    """Get an item by ID with its category, in one query or none if the session holds it"""
+    return await db_session.get(Item, item_id, options=[joinedload(Item.item_category)])
+
+
+async def read_items_by_owner(
+    db_session: AsyncSession,
+    owner_id: int,
+    skip: int = 0,
+    limit: int = 10,
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+):
+    """Get the items of a specific owner in id order, see `items_by_owner_statement`"""
+    statement = items_by_owner_statement(owner_id, skip, limit, after_id, before_id)
+    items = (await db_session.scalars(statement)).all()
+    return items[::-1] if before_id is not None else list(items)
+
+
+async def read_items_page(
+    db_session: AsyncSession,
+    owner_id: int,
+    limit: int = 10,
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+) -> ItemsPage:
+    """Get the page of an owner's items after `after_id` or before `before_id`, the first page by default"""
+    items = await read_items_by_owner(db_session, owner_id, limit=limit + 1, after_id=after_id, before_id=before_id)
+    return to_page(items, limit, after_id, before_id)
+
+
+async def search_items(
+    db_session: AsyncSession, owner_id: int, query: str, offset: int = 0, limit: int = 10
+) -> ItemsPage:
+    """Get a page of the items of `owner_id` matching `query`, ranked, from the `offset`-th result"""
+    terms = search_terms(query)
+    if not terms:
+        return ItemsPage(items=[], has_previous=False, has_next=False)
+    statement = search_statement(db_session.bind.dialect.name, owner_id, terms)
+    items = list((await db_session.scalars(statement.offset(offset).limit(limit + 1))).all())
+    return ItemsPage(items=items[:limit], has_previous=offset > 0, has_next=len(items) > limit)
+
+
+async def read_items(db_session: AsyncSession, skip: int = 0, limit: int = 10):
+    """Get all items"""
+    return list((await db_session.scalars(select(Item).offset(skip).limit(limit))).all())
+
+
+async def update_item(db_session: AsyncSession, item_id: int, name: str, content: str, category: int):
+    """Update an item"""
+    item = await db_session.get(Item, item_id)
+    if item:
+        item.name = name
+        item.content = content
+        item.category = category
+        item.updated_at = datetime.utcnow()
+        await db_session.commit()
+        await db_session.refresh(item)
+        item_match_cache.invalidate(item.owner_id)
+    return item
+
+
+async def delete_item(db_session: AsyncSession, item_id: int) -> bool:
+    """Delete an item"""
+    item = await db_session.get(Item, item_id)
+    if item:
+        await db_session.delete(item)
+        await db_session.commit()
+        item_match_cache.invalidate(item.owner_id)
+        return True
+    return False
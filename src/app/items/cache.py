@@ -0,0 +1,113 @@
+"""Short-lived cache of the items matching the inline queries, by user and query."""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from ..config import settings
+from ..metrics import metrics
+
+# Queries kept per user: the keystrokes of a few searches
+MAX_QUERIES_PER_USER = 64
+
+
+def normalize_query(query: str) -> str:
+    """Return the query as looked up: casefolded words separated by one space."""
+    return " ".join(query.casefold().split())
+
+
+@dataclass(frozen=True)
+class ItemMatch:
+    """Read-only copy of the fields of an item shown as an inline result."""
+
+    id: int
+    name: str
+    content: Optional[str] = None
+
+    def matches(self, query: str) -> bool:
+        """Return True if every word of the normalized `query` is part of the name or the content."""
+        text = f"{self.name}\n{self.content or ''}".casefold()
+        return all(word in text for word in query.split())
+
+
+class ItemMatchCache:
+    """
+    Matches of the inline queries of each user, newest items first.
+
+    An inline query is sent on every keystroke. The matches of a query also
+    hold those of every longer query starting with it, since its words are
+    parts of the longer query's words: once the matches of a prefix are cached
+    complete, the following keystrokes filter them in memory instead of
+    querying the database. Entries expire after `ttl` seconds; changes to the
+    items of a user in this process invalidate that user's entries at once.
+    """
+
+    def __init__(self, ttl: float = 30.0, maxsize: int = 5000) -> None:
+        """
+        Args:
+            ttl: Seconds an entry is trusted, 0 disables the cache
+            maxsize: Number of users kept, the least recently active are dropped
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # user id -> normalized query -> (matches, complete, expiry)
+        self._users: OrderedDict[int, dict[str, tuple[tuple[ItemMatch, ...], bool, float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        metrics.gauge("items.inline_cache_hit_ratio", self.hit_ratio)
+        metrics.gauge("items.inline_cache_users", lambda: len(self._users))
+
+    def get(self, user_id: int, query: str) -> Optional[tuple[ItemMatch, ...]]:
+        """Return the matches of the normalized `query`, or None if neither it nor a complete prefix is cached."""
+        now = time.monotonic()
+        with self._lock:
+            queries = self._users.get(user_id)
+            if queries is not None:
+                self._users.move_to_end(user_id)
+                for end in range(len(query), -1, -1):
+                    entry = queries.get(query[:end])
+                    if entry is None or entry[2] <= now:
+                        continue
+                    matches, complete, _ = entry
+                    if end == len(query):
+                        self.hits += 1
+                        return matches
+                    if complete:
+                        self.hits += 1
+                        return tuple(match for match in matches if match.matches(query))
+            self.misses += 1
+        return None
+
+    def put(self, user_id: int, query: str, matches: tuple[ItemMatch, ...], complete: bool) -> None:
+        """Store the matches of the normalized `query`, `complete` if no match was left out."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            queries = self._users.setdefault(user_id, {})
+            self._users.move_to_end(user_id)
+            queries[query] = (matches, complete, time.monotonic() + self.ttl)
+            if len(queries) > MAX_QUERIES_PER_USER:
+                # Dicts keep insertion order, drop the oldest query
+                del queries[next(iter(queries))]
+            if len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """Drop the cached matches of `user_id`."""
+        with self._lock:
+            self._users.pop(int(user_id), None)
+
+    def clear(self) -> None:
+        """Drop all cached matches."""
+        with self._lock:
+            self._users.clear()
+
+    def hit_ratio(self) -> float:
+        """Return the share of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+item_match_cache = ItemMatchCache(ttl=settings.INLINE_RESULT_CACHE_TTL, maxsize=settings.INLINE_RESULT_CACHE_SIZE)
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 
+from ..database.core import upsert_rows
 from .models import ItemCategory
 
 
@@ -10,9 +11,6 @@ def init_item_categories_table(db_session: Session):
         {"id": 2, "name": "Category B"},
     ]
 
-    # Add and commit data
-    for item_category_data in item_categories_data:
-        item_category = ItemCategory(**item_category_data)
-        db_session.add(item_category)
-
+    # Insert or update in one statement, seeding again is a no-op
+    upsert_rows(db_session, ItemCategory, item_categories_data)
     db_session.commit()
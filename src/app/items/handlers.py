@@ -1,35 +1,53 @@
 import logging
-from pathlib import Path
-from typing import Any, Dict
+import re
+from typing import Any, Dict, Optional
 
-from omegaconf import OmegaConf
 from telebot import TeleBot, types
 from telebot.states import State, StatesGroup
 
+from ..catalog import catalog
+from ..config import settings
 from ..menu.markup import create_menu_markup
 from .markup import (
     create_cancel_button,
     create_categories_list_markup,
+    create_export_formats_markup,
+    create_inline_results,
     create_item_menu_markup,
     create_items_list_markup,
     create_items_menu_markup,
+    create_search_results_markup,
 )
+from .search import lookup_items, search_items
 from .service import (
     create_item,
     delete_item,
     read_item,
     read_item_categories,
-    read_item_category,
-    read_items,
+    read_items_page,
 )
+from .transfer_jobs import start_export, start_import
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-strings = config.strings
+strings = catalog.strings("items")
+
+# Callback data of the "My items" pages: the first page, or the items (a)fter / (b)efore an item id
+MY_ITEMS_CALLBACK = re.compile(r"my_items(?:_([ab])(\d+))?")
+
+# Number of items per page of "My items" and of the search results
+ITEMS_PAGE_SIZE = 10
+
+# Number of results per answer to an inline query, Telegram accepts up to 50
+INLINE_PAGE_SIZE = 20
+
+# Callback data of the search result pages: the offset of the page
+SEARCH_CALLBACK = re.compile(r"search_(\d+)")
+
+# Callback data of the export formats of the user's items
+EXPORT_ITEMS_CALLBACK = re.compile(r"export_items_(csv|json|md)")
 
 
 class ItemState(StatesGroup):
@@ -42,6 +60,8 @@ class ItemState(StatesGroup):
     content = State()  # Entering item content
     category = State()  # Selecting item category
     delete_item = State()  # Deleting an item
+    search = State()  # Browsing search results
+    import_items = State()  # Sending a file of items to import
 
 
 def register_handlers(bot: TeleBot) -> None:
@@ -118,24 +138,27 @@ def register_handlers(bot: TeleBot) -> None:
             reply_markup=create_menu_markup(user.lang),
         )
 
-    @bot.callback_query_handler(func=lambda call: call.data == "my_items")
+    @bot.callback_query_handler(func=lambda call: MY_ITEMS_CALLBACK.fullmatch(call.data or ""))
     def show_my_items(call: types.CallbackQuery, data: Dict[str, Any]) -> None:
         """
-        Display the user's items.
+        Display a page of the user's items.
 
         Args:
-            call: The callback query
+            call: The callback query, with the page cursor embedded in data
             data: The data dictionary containing user and database session
         """
         user = data["user"]
         db_session = data["db_session"]
         data["state"].set(ItemState.my_items)
 
-        # Get all items and filter by current user
-        items = read_items(db_session)
-        user_items = [item for item in items if item.owner_id == user.id]
+        direction, item_id = MY_ITEMS_CALLBACK.fullmatch(call.data).groups()
+        cursor = {"after_id": int(item_id)} if direction == "a" else {"before_id": int(item_id)} if direction else {}
+        page = read_items_page(db_session, user.id, limit=ITEMS_PAGE_SIZE, **cursor)
+        if not page.items and cursor:
+            # The items around the cursor were deleted meanwhile
+            page = read_items_page(db_session, user.id, limit=ITEMS_PAGE_SIZE)
 
-        if not user_items:
+        if not page.items:
             # Show empty state with back button
             markup = types.InlineKeyboardMarkup()
             markup.add(types.InlineKeyboardButton(strings[user.lang].back_to_menu, callback_data="menu"))
@@ -148,10 +171,161 @@ def register_handlers(bot: TeleBot) -> None:
             )
             return
 
-        # Show list of user's items
-        markup = create_items_list_markup(user.lang, user_items)
+        # Show the page of user's items, turning pages in place
+        markup = create_items_list_markup(user.lang, page.items, page.has_previous, page.has_next)
+        if direction:
+            bot.edit_message_text(
+                chat_id=user.id,
+                message_id=call.message.message_id,
+                text=strings[user.lang].your_items,
+                reply_markup=markup,
+            )
+            return
         bot.send_message(chat_id=user.id, text=strings[user.lang].your_items, reply_markup=markup)
 
+    def show_search_results(user, query: str, offset: int, db_session, message_id: Optional[int] = None) -> None:
+        """Send the page of results at `offset`, or edit the message `message_id` with it."""
+        page = search_items(db_session, user.id, query, offset=offset, limit=ITEMS_PAGE_SIZE)
+        if page.items:
+            text = strings[user.lang].search_results.format(query=query)
+            markup = create_search_results_markup(
+                user.lang, page.items, offset, ITEMS_PAGE_SIZE, page.has_previous, page.has_next
+            )
+        else:
+            text = strings[user.lang].no_search_results.format(query=query)
+            markup = create_items_menu_markup(user.lang)
+
+        if message_id is None:
+            bot.send_message(chat_id=user.id, text=text, reply_markup=markup)
+        else:
+            bot.edit_message_text(chat_id=user.id, message_id=message_id, text=text, reply_markup=markup)
+
+    @bot.message_handler(commands=["search"])
+    def search_command(message: types.Message, data: Dict[str, Any]) -> None:
+        """
+        Search the user's items for the words following the command.
+
+        Args:
+            message: The message with the command and the query
+            data: The data dictionary containing user, database session and state
+        """
+        user = data["user"]
+        query = message.text.partition(" ")[2].strip()
+        if not query:
+            bot.send_message(user.id, strings[user.lang].search_usage)
+            return
+
+        # Kept for the page buttons, the callback data cannot hold the query
+        data["state"].set(ItemState.search)
+        data["state"].add_data(search_query=query)
+        show_search_results(user, query, 0, data["db_session"])
+
+    @bot.callback_query_handler(func=lambda call: SEARCH_CALLBACK.fullmatch(call.data or ""))
+    def search_page(call: types.CallbackQuery, data: Dict[str, Any]) -> None:
+        """
+        Show another page of the search results.
+
+        Args:
+            call: The callback query with the page offset embedded in data
+            data: The data dictionary containing user, database session and state
+        """
+        user = data["user"]
+        with data["state"].data() as data_items:
+            query = (data_items or {}).get("search_query")
+        if not query:
+            bot.send_message(user.id, strings[user.lang].search_usage)
+            return
+
+        offset = int(SEARCH_CALLBACK.fullmatch(call.data).group(1))
+        show_search_results(user, query, offset, data["db_session"], message_id=call.message.message_id)
+
+    @bot.inline_handler(func=lambda inline_query: True)
+    def inline_lookup(inline_query: types.InlineQuery, data: Dict[str, Any]) -> None:
+        """
+        Answer an inline query with the user's items containing its words.
+
+        Args:
+            inline_query: The inline query, with the offset of the next page after the first one
+            data: The data dictionary containing user and database session
+        """
+        user = data["user"]
+        # Mostly served from the cache while the user types
+        matches = lookup_items(data["db_session"], user.id, inline_query.query)
+
+        offset = int(inline_query.offset) if (inline_query.offset or "").isdigit() else 0
+        next_offset = offset + INLINE_PAGE_SIZE
+        bot.answer_inline_query(
+            inline_query.id,
+            create_inline_results(matches[offset:next_offset]),
+            cache_time=settings.INLINE_CACHE_TIME,
+            is_personal=True,
+            next_offset=str(next_offset) if next_offset < len(matches) else "",
+        )
+
+    @bot.callback_query_handler(func=lambda call: call.data == "import_items")
+    def ask_import_file(call: types.CallbackQuery, data: Dict[str, Any]) -> None:
+        """
+        Ask for the file of items to import.
+
+        Args:
+            call: The callback query
+            data: The data dictionary containing user and state
+        """
+        user = data["user"]
+        data["state"].set(ItemState.import_items)
+
+        bot.edit_message_text(
+            chat_id=user.id,
+            message_id=call.message.message_id,
+            text=strings[user.lang].send_import_file,
+            reply_markup=create_cancel_button(user.lang),
+            parse_mode="Markdown",
+        )
+
+    @bot.message_handler(state=ItemState.import_items, content_types=["document"])
+    def process_import_file(message: types.Message, data: Dict[str, Any]) -> None:
+        """
+        Queue the import of the items of the sent file, the dispatcher does not wait for it.
+
+        Args:
+            message: The message with the document
+            data: The data dictionary containing user and state
+        """
+        user = data["user"]
+        if start_import(bot, user, message.document):
+            data["state"].delete()
+
+    @bot.callback_query_handler(func=lambda call: call.data == "export_items")
+    def choose_export_format(call: types.CallbackQuery, data: Dict[str, Any]) -> None:
+        """
+        Ask for the format of the export of the user's items.
+
+        Args:
+            call: The callback query
+            data: The data dictionary containing user information
+        """
+        user = data["user"]
+
+        bot.edit_message_text(
+            chat_id=user.id,
+            message_id=call.message.message_id,
+            text=strings[user.lang].choose_export_format,
+            reply_markup=create_export_formats_markup(user.lang),
+        )
+
+    @bot.callback_query_handler(func=lambda call: EXPORT_ITEMS_CALLBACK.fullmatch(call.data or ""))
+    def export_user_items(call: types.CallbackQuery, data: Dict[str, Any]) -> None:
+        """
+        Queue the export of the user's items in the chosen format, the file is sent when written.
+
+        Args:
+            call: The callback query with the format embedded in data
+            data: The data dictionary containing user information
+        """
+        user = data["user"]
+        export_format = EXPORT_ITEMS_CALLBACK.fullmatch(call.data).group(1)
+        start_export(bot, user, export_format)
+
     @bot.callback_query_handler(func=lambda call: call.data.startswith("view_item_"))
     def view_item(call: types.CallbackQuery, data: Dict[str, Any]) -> None:
         """
@@ -176,9 +350,8 @@ def register_handlers(bot: TeleBot) -> None:
             )
             return
 
-        # Get category name for display
-        category = read_item_category(db_session, item.category)
-        category_name = category.name if category else "Unknown"
+        # Loaded with the item
+        category_name = item.item_category.name if item.item_category else "Unknown"
 
         # Format item details message
         message_text = strings[user.lang].item_details.format(
@@ -1,15 +1,19 @@
 import logging
-from pathlib import Path
 
-from omegaconf import OmegaConf
-from telebot.types import InlineKeyboardButton, InlineKeyboardMarkup
+from telebot.types import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+)
 
+from ..catalog import catalog
+from ..markup_cache import cached_markup
+from .cache import ItemMatch
 from .models import Item
 
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-strings = config.strings
+strings = catalog.strings("items")
 
 
 # Set up logging
@@ -17,15 +21,34 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
 
+@cached_markup
 def create_items_menu_markup(lang: str) -> InlineKeyboardMarkup:
     """Create the items menu markup"""
     markup = InlineKeyboardMarkup()
     markup.add(InlineKeyboardButton(strings[lang].create_item, callback_data="create_item"))
     markup.add(InlineKeyboardButton(strings[lang].my_items, callback_data="my_items"))
+    markup.row(
+        InlineKeyboardButton(strings[lang].import_items, callback_data="import_items"),
+        InlineKeyboardButton(strings[lang].export_items, callback_data="export_items"),
+    )
     markup.add(InlineKeyboardButton(strings[lang].back_to_menu, callback_data="menu"))
     return markup
 
 
+@cached_markup
+def create_export_formats_markup(lang: str) -> InlineKeyboardMarkup:
+    """Create the markup choosing the format of the items export"""
+    markup = InlineKeyboardMarkup()
+    markup.row(
+        InlineKeyboardButton("CSV", callback_data="export_items_csv"),
+        InlineKeyboardButton("JSON", callback_data="export_items_json"),
+        InlineKeyboardButton("Markdown (zip)", callback_data="export_items_md"),
+    )
+    markup.add(InlineKeyboardButton(strings[lang].cancel, callback_data="item"))
+    return markup
+
+
+@cached_markup
 def create_item_menu_markup(lang: str, item_id: int) -> InlineKeyboardMarkup:
     """Create the item menu markup"""
     markup = InlineKeyboardMarkup()
@@ -35,16 +58,71 @@ def create_item_menu_markup(lang: str, item_id: int) -> InlineKeyboardMarkup:
     return markup
 
 
-def create_items_list_markup(lang: str, items: list[Item]) -> InlineKeyboardMarkup:
-    """Create the items menu markup"""
+@cached_markup(
+    key=lambda lang, items, has_previous=False, has_next=False: (
+        lang,
+        tuple((item.id, item.name) for item in items),
+        has_previous,
+        has_next,
+    )
+)
+def create_items_list_markup(
+    lang: str, items: list[Item], has_previous: bool = False, has_next: bool = False
+) -> InlineKeyboardMarkup:
+    """
+    Create the items list markup
+
+    The page buttons carry the cursor: `my_items_b<id>` shows the items before
+    the first one of the page, `my_items_a<id>` those after the last one.
+    """
     markup = InlineKeyboardMarkup()
     for item in items:
         markup.add(InlineKeyboardButton(item.name, callback_data=f"view_item_{item.id}"))
 
+    pages = []
+    if has_previous and items:
+        pages.append(InlineKeyboardButton(strings[lang].previous_page, callback_data=f"my_items_b{items[0].id}"))
+    if has_next and items:
+        pages.append(InlineKeyboardButton(strings[lang].next_page, callback_data=f"my_items_a{items[-1].id}"))
+    if pages:
+        markup.row(*pages)
+
     markup.add(InlineKeyboardButton(strings[lang].back_to_menu, callback_data="menu"))
     return markup
 
 
+@cached_markup(
+    key=lambda lang, items, offset, page_size, has_previous=False, has_next=False: (
+        lang,
+        tuple((item.id, item.name) for item in items),
+        offset,
+        page_size,
+        has_previous,
+        has_next,
+    )
+)
+def create_search_results_markup(
+    lang: str, items: list[Item], offset: int, page_size: int, has_previous: bool = False, has_next: bool = False
+) -> InlineKeyboardMarkup:
+    """Create the search results markup, the page buttons carry the offset of the page they show"""
+    markup = InlineKeyboardMarkup()
+    for item in items:
+        markup.add(InlineKeyboardButton(item.name, callback_data=f"view_item_{item.id}"))
+
+    pages = []
+    if has_previous:
+        previous_offset = max(offset - page_size, 0)
+        pages.append(InlineKeyboardButton(strings[lang].previous_page, callback_data=f"search_{previous_offset}"))
+    if has_next:
+        pages.append(InlineKeyboardButton(strings[lang].next_page, callback_data=f"search_{offset + page_size}"))
+    if pages:
+        markup.row(*pages)
+
+    markup.add(InlineKeyboardButton(strings[lang].back_to_menu, callback_data="menu"))
+    return markup
+
+
+@cached_markup(key=lambda lang, categories: (lang, tuple((category.id, category.name) for category in categories)))
 def create_categories_list_markup(lang: str, categories: list[str]) -> InlineKeyboardMarkup:
     """Create the categories list markup"""
     markup = InlineKeyboardMarkup()
@@ -53,6 +131,7 @@ def create_categories_list_markup(lang: str, categories: list[str]) -> InlineKey
     return markup
 
 
+@cached_markup
 def create_cancel_button(lang: str) -> InlineKeyboardMarkup:
     """Create a cancel button for the items menu"""
     cancel_button = InlineKeyboardMarkup(row_width=1)
@@ -60,3 +139,16 @@ def create_cancel_button(lang: str) -> InlineKeyboardMarkup:
         InlineKeyboardButton(strings[lang].cancel, callback_data="item"),
     )
     return cancel_button
+
+
+def create_inline_results(matches: list[ItemMatch]) -> list[InlineQueryResultArticle]:
+    """Create the inline query results of the items, sending the name and content when chosen"""
+    return [
+        InlineQueryResultArticle(
+            id=str(match.id),
+            title=match.name,
+            description=(match.content or "")[:100],
+            input_message_content=InputTextMessageContent(f"{match.name}\n\n{match.content or ''}".strip()),
+        )
+        for match in matches
+    ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from ..models import Base, TimeStampMixin
@@ -17,6 +17,7 @@ class Item(Base, TimeStampMixin):
     """Item model"""
 
     __tablename__ = "items"
+    __table_args__ = (Index("ix_items_owner_id_id", "owner_id", "id"),)
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
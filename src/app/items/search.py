@@ -0,0 +1,120 @@
+"""Owner-scoped full-text search over the items."""
+import logging
+import re
+
+from sqlalchemy import Select, and_, column, func, literal_column, or_, select, table
+from sqlalchemy.orm import Session
+
+from .cache import ItemMatch, item_match_cache, normalize_query
+from .models import Item
+from .service import ItemsPage
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+# Words of a query, without the operators of the FTS5 and tsquery syntaxes
+TERM = re.compile(r"[^\W_]+")
+
+# Words beyond this are ignored, each one narrows the results
+MAX_TERMS = 8
+
+# Matches of an inline query at most, newest first
+INLINE_MAX_MATCHES = 200
+
+# Items of the owner fetched at a time while looking for the matches of an inline query
+INLINE_BATCH_SIZE = 500
+
+# Index maintained by the migration v0005_items_search on SQLite
+items_fts = table("items_fts", column("rowid"))
+
+
+def search_terms(query: str) -> list[str]:
+    """Return the words of `query` to look up, lowercased."""
+    return TERM.findall(query.lower())[:MAX_TERMS]
+
+
+def search_statement(dialect: str, owner_id: int, terms: list[str]) -> Select:
+    """
+    Select the items of `owner_id` containing every term as a word, best matches first.
+
+    Terms match whole words: a prefix expands to every indexed word starting
+    with it and costs a scan of their matches over all owners.
+
+    SQLite intersects the owner token of the FTS5 index with the terms and
+    ranks the items with a term in the name first, then the latest updated:
+    BM25 would read the matches of the terms over all owners for their
+    frequency. PostgreSQL uses the GIN index of the owner and `search_vector`
+    and ranks by `ts_rank`, with matches in the name weighing more. Other
+    dialects fall back to unranked LIKE patterns.
+    """
+    statement = select(Item).where(Item.owner_id == owner_id)
+    if dialect == "sqlite":
+        owner = f'owner_id : "{int(owner_id)}"'
+        words = " ".join(f'"{term}"' for term in terms)
+        any_word = " OR ".join(f'"{term}"' for term in terms)
+        fts_match = literal_column("items_fts").op("MATCH")
+        in_name = Item.id.in_(select(items_fts.c.rowid).where(fts_match(f"{owner} AND name : ({any_word})")))
+        return (
+            statement.join(items_fts, items_fts.c.rowid == Item.id)
+            .where(fts_match(f"{owner} AND {{name content}} : ({words})"))
+            .order_by(in_name.desc(), Item.updated_at.desc(), Item.id.desc())
+        )
+    if dialect == "postgresql":
+        search_vector = literal_column("items.search_vector")
+        query = func.to_tsquery("simple", " & ".join(terms))
+        return statement.where(search_vector.op("@@")(query)).order_by(
+            func.ts_rank(search_vector, query).desc(), Item.id
+        )
+    patterns = [f"%{term}%" for term in terms]
+    return statement.where(
+        and_(*(or_(Item.name.ilike(pattern), Item.content.ilike(pattern)) for pattern in patterns))
+    ).order_by(Item.id)
+
+
+def search_items(db_session: Session, owner_id: int, query: str, offset: int = 0, limit: int = 10) -> ItemsPage:
+    """Get a page of the items of `owner_id` matching `query`, ranked, from the `offset`-th result"""
+    terms = search_terms(query)
+    if not terms:
+        return ItemsPage(items=[], has_previous=False, has_next=False)
+    statement = search_statement(db_session.get_bind().dialect.name, owner_id, terms)
+    items = list(db_session.scalars(statement.offset(offset).limit(limit + 1)).all())
+    return ItemsPage(items=items[:limit], has_previous=offset > 0, has_next=len(items) > limit)
+
+
+def lookup_items(db_session: Session, owner_id: int, query: str) -> tuple[ItemMatch, ...]:
+    """
+    Get the items of `owner_id` whose name or content contains every word of `query`, newest first.
+
+    Serves the inline queries, sent on every keystroke: words match anywhere
+    in the text, so the matches of a query hold those of the queries typed
+    after it and the cache answers most keystrokes. A miss reads the owner's
+    items newest first through the (owner_id, id) index, in batches, and keeps
+    those that match until `INLINE_MAX_MATCHES` do. Items are matched with
+    `ItemMatch.matches` on both paths: SQL `lower()` only folds ASCII on SQLite.
+    """
+    query = normalize_query(query)
+    matches = item_match_cache.get(owner_id, query)
+    if matches is not None:
+        return matches
+
+    statement = select(Item.id, Item.name, Item.content).where(Item.owner_id == owner_id).order_by(Item.id.desc())
+    if not query:
+        statement = statement.limit(INLINE_MAX_MATCHES + 1)
+    found: list[ItemMatch] = []
+    complete = True
+    result = db_session.execute(statement.execution_options(yield_per=INLINE_BATCH_SIZE))
+    try:
+        for row in result:
+            match = ItemMatch(id=row.id, name=row.name, content=row.content)
+            if not match.matches(query):
+                continue
+            if len(found) == INLINE_MAX_MATCHES:
+                complete = False
+                break
+            found.append(match)
+    finally:
+        result.close()
+    matches = tuple(found)
+    item_match_cache.put(owner_id, query, matches, complete=complete)
+    return matches
@@ -1,23 +1,31 @@
 import logging
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
 
+from ..reference_cache import reference_cache
+from .cache import item_match_cache
 from .models import Item, ItemCategory
 
 # Set up logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
+# Read on every item creation and view, written by migrations only
+reference_cache.register(ItemCategory)
+
 
 def read_item_category(db_session: Session, category_id: int):
-    """Get an item category by ID"""
-    return db_session.query(ItemCategory).filter(ItemCategory.id == category_id).first()
+    """Get an item category by ID, from the reference cache"""
+    return reference_cache.get(ItemCategory, category_id, db_session)
 
 
 def read_item_categories(db_session: Session, skip: int = 0, limit: int = 10):
-    """Get all item categories"""
-    return db_session.query(ItemCategory).offset(skip).limit(limit).all()
+    """Get all item categories, from the reference cache"""
+    return list(reference_cache.rows(ItemCategory, db_session)[skip : skip + limit])
 
 
 def create_item(db_session: Session, name: str, content: str, category: int, owner_id: int):
@@ -33,17 +41,76 @@ def create_item(db_session: Session, name: str, content: str, category: int, own
     db_session.add(item)
     db_session.commit()
     db_session.refresh(item)
+    # The inline lookup must show the new item at once
+    item_match_cache.invalidate(owner_id)
     return item
 
 
 def read_item(db_session: Session, item_id: int):
-    """Get an item by ID"""
-    return db_session.query(Item).filter(Item.id == item_id).first()
-
-
-def read_items_by_owner(db_session: Session, owner_id: int, skip: int = 0, limit: int = 10):
-    """Get all items by a specific owner"""
-    return db_session.query(Item).filter(Item.owner_id == owner_id).offset(skip).limit(limit).all()
+    """Get an item by ID with its category, in one query or none if the session holds it"""
+    return db_session.get(Item, item_id, options=[joinedload(Item.item_category)])
+
+
+def items_by_owner_statement(
+    owner_id: int, skip: int = 0, limit: int = 10, after_id: Optional[int] = None, before_id: Optional[int] = None
+):
+    """
+    Select the items of an owner in id order, `limit` at a time.
+
+    With `after_id` the page starts after that item, with `before_id` it ends
+    before it; both are served by the (owner_id, id) index whatever the page.
+    `skip` is an OFFSET, it reads the skipped rows.
+    """
+    statement = select(Item).where(Item.owner_id == owner_id)
+    if after_id is not None:
+        statement = statement.where(Item.id > after_id)
+    if before_id is not None:
+        # The closest items before the cursor, in id order once reversed by the caller
+        return statement.where(Item.id < before_id).order_by(Item.id.desc()).offset(skip).limit(limit)
+    return statement.order_by(Item.id).offset(skip).limit(limit)
+
+
+def read_items_by_owner(
+    db_session: Session,
+    owner_id: int,
+    skip: int = 0,
+    limit: int = 10,
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+):
+    """Get the items of a specific owner in id order, see `items_by_owner_statement`"""
+    items = db_session.scalars(items_by_owner_statement(owner_id, skip, limit, after_id, before_id)).all()
+    return items[::-1] if before_id is not None else list(items)
+
+
+@dataclass
+class ItemsPage:
+    """One page of the items of an owner"""
+
+    items: list[Item]
+    has_previous: bool
+    has_next: bool
+
+
+def to_page(items: list[Item], limit: int, after_id: Optional[int], before_id: Optional[int]) -> ItemsPage:
+    """Make a page of `limit` items out of `limit + 1` items read towards the cursor"""
+    more = len(items) > limit
+    if before_id is not None:
+        # The extra item is the oldest one
+        return ItemsPage(items=items[-limit:] if more else items, has_previous=more, has_next=True)
+    return ItemsPage(items=items[:limit], has_previous=after_id is not None, has_next=more)
+
+
+def read_items_page(
+    db_session: Session,
+    owner_id: int,
+    limit: int = 10,
+    after_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+) -> ItemsPage:
+    """Get the page of an owner's items after `after_id` or before `before_id`, the first page by default"""
+    items = read_items_by_owner(db_session, owner_id, limit=limit + 1, after_id=after_id, before_id=before_id)
+    return to_page(items, limit, after_id, before_id)
 
 
 def read_items(db_session: Session, skip: int = 0, limit: int = 10):
@@ -61,6 +128,7 @@ def update_item(db_session: Session, item_id: int, name: str, content: str, cate
         item.updated_at = datetime.utcnow()
         db_session.commit()
         db_session.refresh(item)
+        item_match_cache.invalidate(item.owner_id)
     return item
 
 
@@ -70,5 +138,6 @@ def delete_item(db_session: Session, item_id: int) -> bool:
     if item:
         db_session.delete(item)
         db_session.commit()
+        item_match_cache.invalidate(item.owner_id)
         return True
     return False
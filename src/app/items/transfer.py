@@ -0,0 +1,293 @@
+"""Bulk import of items from CSV, JSON or Markdown files and streaming export of a user's items."""
+import csv
+import io
+import json
+import logging
+import re
+import time
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from pathlib import PurePosixPath
+from typing import Callable, Iterable, Iterator, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..reference_cache import reference_cache
+from .cache import item_match_cache
+from .models import Item, ItemCategory
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+# Largest file a bot can download
+MAX_IMPORT_BYTES = 20 * 1024 * 1024
+
+# Limits keeping an item viewable in one message
+MAX_NAME_LENGTH = 256
+MAX_CONTENT_LENGTH = 3500
+
+# Errors listed in the import report at most
+MAX_REPORTED_ERRORS = 20
+
+# Called with the number of items imported or exported so far
+ProgressCallback = Callable[[int], None]
+
+
+class ItemImportError(ValueError):
+    """The file cannot be imported at all, e.g. an unsupported format or invalid JSON."""
+
+
+@dataclass
+class TransferReport:
+    """Result of an import or an export of items."""
+
+    items: int = 0
+    seconds: float = 0.0
+    # Rows left out of an import, e.g. "line 3: name is empty"
+    errors: list[str] = field(default_factory=list)
+    skipped: int = 0
+
+
+def parse_csv(data: bytes) -> Iterator[tuple[str, dict]]:
+    """Yield the position and fields of each row of a CSV file with a `name` column."""
+    reader = csv.DictReader(io.StringIO(data.decode("utf-8-sig")))
+    if "name" not in (reader.fieldnames or []):
+        raise ItemImportError("the CSV file needs a header row with a name column")
+    for row in reader:
+        yield f"line {reader.line_num}", row
+
+
+def parse_json(data: bytes) -> Iterator[tuple[str, dict]]:
+    """Yield the position and fields of each object of a JSON list, or of its `items` key."""
+    try:
+        document = json.loads(data.decode("utf-8-sig"))
+    except ValueError as e:
+        raise ItemImportError(f"invalid JSON: {e}") from e
+    records = document.get("items") if isinstance(document, dict) else document
+    if not isinstance(records, list):
+        raise ItemImportError("the JSON file needs a list of items")
+    for number, record in enumerate(records, start=1):
+        yield f"item {number}", record if isinstance(record, dict) else {"name": None}
+
+
+def parse_markdown(name: str, text: str) -> dict:
+    """Return the fields of a Markdown note: its `# ` title, or file name, and the rest."""
+    lines = text.strip().splitlines()
+    if lines and lines[0].startswith("# "):
+        return {"name": lines[0][2:].strip(), "content": "\n".join(lines[1:]).strip()}
+    return {"name": PurePosixPath(name).stem, "content": text.strip()}
+
+
+def parse_markdown_zip(data: bytes) -> Iterator[tuple[str, dict]]:
+    """Yield the position and fields of each Markdown file of a zip archive."""
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile as e:
+        raise ItemImportError(f"invalid zip archive: {e}") from e
+    with archive:
+        entries = [
+            entry
+            for entry in archive.infolist()
+            if not entry.is_dir() and entry.filename.lower().endswith(".md") and "__MACOSX" not in entry.filename
+        ]
+        # The archive is small, its content may not be
+        if sum(entry.file_size for entry in entries) > 5 * MAX_IMPORT_BYTES:
+            raise ItemImportError("the archive holds too much text")
+        for entry in entries:
+            yield entry.filename, parse_markdown(entry.filename, archive.read(entry).decode("utf-8-sig", "replace"))
+
+
+def parse_items(file_name: str, data: bytes) -> Iterator[tuple[str, dict]]:
+    """Yield the position and fields of each item of a .csv, .json, .md or .zip (Markdown notes) file."""
+    suffix = PurePosixPath(file_name or "").suffix.lower()
+    if suffix == ".csv":
+        return parse_csv(data)
+    if suffix == ".json":
+        return parse_json(data)
+    if suffix == ".zip":
+        return parse_markdown_zip(data)
+    if suffix == ".md":
+        return iter([(file_name, parse_markdown(file_name, data.decode("utf-8-sig", "replace")))])
+    raise ItemImportError(f"unsupported file type {suffix or file_name!r}, send a .csv, .json, .md or .zip file")
+
+
+def category_ids(db_session: Optional[Session] = None) -> dict[str, int]:
+    """Return the item category ids by lowercased name and by id as text."""
+    categories = reference_cache.rows(ItemCategory, db_session)
+    by_key = {category.name.lower(): category.id for category in categories}
+    by_key.update({str(category.id): category.id for category in categories})
+    return by_key
+
+
+def validate_items(
+    records: Iterable[tuple[str, dict]], owner_id: int, categories: dict[str, int], max_items: int
+) -> tuple[list[dict], list[str]]:
+    """Return the rows to insert for `owner_id` and the errors of the records left out."""
+    default_category = min(categories.values()) if categories else None
+    now = datetime.now()
+    rows, errors = [], []
+    for position, record in records:
+        name = str(record.get("name") or "").strip()
+        content = str(record.get("content") or "").strip()
+        category = str(record.get("category") or "").strip().lower()
+        if not name:
+            errors.append(f"{position}: name is empty")
+        elif len(name) > MAX_NAME_LENGTH:
+            errors.append(f"{position}: name is longer than {MAX_NAME_LENGTH} characters")
+        elif len(content) > MAX_CONTENT_LENGTH:
+            errors.append(f"{position}: content is longer than {MAX_CONTENT_LENGTH} characters")
+        elif category and category not in categories:
+            errors.append(f"{position}: unknown category {record.get('category')!r}")
+        elif len(rows) >= max_items:
+            raise ItemImportError(f"the file holds more than {max_items} items")
+        else:
+            rows.append(
+                {
+                    "name": name,
+                    "content": content or None,
+                    "category": categories[category] if category else default_category,
+                    "owner_id": owner_id,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+    return rows, errors
+
+
+def insert_items(
+    bind: Engine, rows: list[dict], chunk_size: int = 1000, progress: Optional[ProgressCallback] = None
+) -> int:
+    """
+    Insert `rows` into `items` with one multi-row statement and one commit per chunk.
+
+    Short transactions let the bot's updates write between the chunks. On an
+    error the chunks already committed stay, the count of which is logged.
+    """
+    inserted = 0
+    rows_iterator = iter(rows)
+    with Session(bind) as session:
+        while chunk := list(islice(rows_iterator, chunk_size)):
+            session.execute(insert(Item), chunk)
+            session.commit()
+            inserted += len(chunk)
+            if progress is not None:
+                progress(inserted)
+    return inserted
+
+
+def import_items(
+    bind: Engine,
+    owner_id: int,
+    file_name: str,
+    data: bytes,
+    chunk_size: int = 1000,
+    max_items: int = 50000,
+    progress: Optional[ProgressCallback] = None,
+) -> TransferReport:
+    """Validate the items of a file and insert the valid ones for `owner_id`."""
+    started = time.perf_counter()
+    if len(data) > MAX_IMPORT_BYTES:
+        raise ItemImportError(f"the file is larger than {MAX_IMPORT_BYTES // 2**20} MB")
+    with Session(bind) as session:
+        categories = category_ids(session)
+    rows, errors = validate_items(parse_items(file_name, data), owner_id, categories, max_items)
+    try:
+        imported = insert_items(bind, rows, chunk_size, progress)
+    finally:
+        # Also after a partial import
+        item_match_cache.invalidate(owner_id)
+    report = TransferReport(
+        items=imported, seconds=time.perf_counter() - started, errors=errors[:MAX_REPORTED_ERRORS], skipped=len(errors)
+    )
+    logger.info(f"Imported {report.items} items for user {owner_id} in {report.seconds:.2f}s, {report.skipped} skipped")
+    return report
+
+
+def markdown_file_name(item_id: int, name: str) -> str:
+    """Return a file name of the item, unique by its id."""
+    slug = re.sub(r"[^\w-]+", "-", name, flags=re.UNICODE).strip("-")[:50]
+    return f"{item_id}-{slug or 'item'}.md"
+
+
+def export_items(
+    bind: Engine,
+    owner_id: int,
+    path: str,
+    export_format: str = "csv",
+    chunk_size: int = 1000,
+    progress: Optional[ProgressCallback] = None,
+) -> TransferReport:
+    """
+    Write the items of `owner_id` to `path` as CSV, JSON or a zip of Markdown notes.
+
+    The items are fetched `chunk_size` at a time and written as they come, in
+    the formats `import_items` reads back.
+    """
+    if export_format not in ITEM_EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {export_format!r}, expected one of {sorted(ITEM_EXPORT_FORMATS)}")
+    started = time.perf_counter()
+    with Session(bind) as session:
+        names = {category.id: category.name for category in reference_cache.rows(ItemCategory, session)}
+        statement = (
+            select(Item.id, Item.name, Item.content, Item.category, Item.created_at)
+            .where(Item.owner_id == owner_id)
+            .order_by(Item.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        rows = (
+            {
+                "id": row.id,
+                "name": row.name,
+                "content": row.content or "",
+                "category": names.get(row.category, ""),
+                "created_at": row.created_at.isoformat(sep=" ", timespec="seconds") if row.created_at else "",
+            }
+            for row in session.execute(statement)
+        )
+        count = 0
+        for count in ITEM_EXPORT_FORMATS[export_format][1](rows, path):
+            if progress is not None and count % chunk_size == 0:
+                progress(count)
+    return TransferReport(items=count, seconds=time.perf_counter() - started)
+
+
+def write_csv(rows: Iterable[dict], path: str) -> Iterator[int]:
+    """Write `rows` to a CSV file with a header row, yielding the number written after each."""
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=["name", "content", "category", "created_at"], extrasaction="ignore")
+        writer.writeheader()
+        for count, row in enumerate(rows, start=1):
+            writer.writerow(row)
+            yield count
+
+
+def write_json(rows: Iterable[dict], path: str) -> Iterator[int]:
+    """Write `rows` as a JSON list, one object per line, yielding the number written after each."""
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("[")
+        for count, row in enumerate(rows, start=1):
+            fields = {key: row[key] for key in ("name", "content", "category", "created_at")}
+            file.write(("," if count > 1 else "") + "\n  " + json.dumps(fields, ensure_ascii=False))
+            yield count
+        file.write("\n]\n")
+
+
+def write_markdown_zip(rows: Iterable[dict], path: str) -> Iterator[int]:
+    """Write each of `rows` as a Markdown note of a zip archive, yielding the number written after each."""
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for count, row in enumerate(rows, start=1):
+            archive.writestr(markdown_file_name(row["id"], row["name"]), f"# {row['name']}\n\n{row['content']}\n")
+            yield count
+
+
+# Export format -> (file suffix, writer yielding the number of items written)
+ITEM_EXPORT_FORMATS = {
+    "csv": (".csv", write_csv),
+    "json": (".json", write_json),
+    "md": (".zip", write_markdown_zip),
+}
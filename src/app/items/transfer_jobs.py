@@ -0,0 +1,154 @@
+"""Background imports and exports of the users' items, off the dispatcher threads."""
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from ..catalog import catalog
+from ..config import settings
+from ..database.core import engine
+from .transfer import ITEM_EXPORT_FORMATS, MAX_IMPORT_BYTES, ItemImportError, export_items, import_items
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+# Load configuration
+strings = catalog.strings("items")
+
+# Imports and exports of all users share these threads, the dispatcher only queues them
+_executor = ThreadPoolExecutor(max_workers=settings.ITEM_TRANSFER_WORKERS, thread_name_prefix="item-transfer")
+
+# One import or export per user at a time
+_running_users: set[int] = set()
+_running_lock = threading.Lock()
+
+
+class TransferProgress:
+    """Edits a status message with the number of items processed so far, at most every `interval` seconds."""
+
+    def __init__(self, bot, chat_id: int, message_id: int, lang: str, interval: float = 3.0) -> None:
+        """
+        Args:
+            bot: Bot sending the status message
+            chat_id: Chat of the status message
+            message_id: Id of the status message
+            lang: Language of the user
+            interval: Minimum seconds between two edits
+        """
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.lang = lang
+        self.interval = interval
+        self._last_update = time.monotonic()
+
+    def __call__(self, items: int) -> None:
+        """Edit the status message with the number of items processed if it is due."""
+        now = time.monotonic()
+        if now - self._last_update < self.interval:
+            return
+        self._last_update = now
+        try:
+            text = strings[self.lang].transfer_progress.format(items=items)
+            self.bot.edit_message_text(text, self.chat_id, self.message_id)
+        except Exception as e:
+            # Progress is informative, the transfer goes on
+            logger.warning(f"Error reporting transfer progress: {e}")
+
+
+def _claim(bot, user) -> bool:
+    with _running_lock:
+        if user.id in _running_users:
+            claimed = False
+        else:
+            _running_users.add(user.id)
+            claimed = True
+    if not claimed:
+        bot.send_message(user.id, strings[user.lang].transfer_running)
+    return claimed
+
+
+def _release(user_id: int) -> None:
+    with _running_lock:
+        _running_users.discard(user_id)
+
+
+def start_import(bot, user, document) -> bool:
+    """Queue the import of the items of a Telegram `document` and return False if it is refused at once."""
+    if document.file_size and document.file_size > MAX_IMPORT_BYTES:
+        bot.send_message(user.id, strings[user.lang].import_too_large.format(size_mb=MAX_IMPORT_BYTES // 2**20))
+        return False
+    if not _claim(bot, user):
+        return False
+    try:
+        status = bot.send_message(user.id, strings[user.lang].import_started)
+        progress = TransferProgress(bot, user.id, status.message_id, user.lang)
+        _executor.submit(_run_import, bot, user, document.file_id, document.file_name, progress)
+    except Exception:
+        _release(user.id)
+        raise
+    return True
+
+
+def _run_import(bot, user, file_id: str, file_name: str, progress: TransferProgress) -> None:
+    try:
+        data = bot.download_file(bot.get_file(file_id).file_path)
+        report = import_items(
+            engine,
+            user.id,
+            file_name,
+            data,
+            chunk_size=settings.ITEM_IMPORT_CHUNK_SIZE,
+            max_items=settings.ITEM_IMPORT_MAX_ITEMS,
+            progress=progress,
+        )
+        text = strings[user.lang].import_done.format(items=report.items, seconds=report.seconds)
+        if report.skipped:
+            text += "\n\n" + strings[user.lang].import_skipped.format(skipped=report.skipped)
+            text += "\n" + "\n".join(report.errors)
+        bot.send_message(user.id, text)
+    except ItemImportError as e:
+        bot.send_message(user.id, strings[user.lang].import_failed.format(error=e))
+    except Exception as e:
+        logger.error(f"Error importing items of user {user.id}: {e}")
+        bot.send_message(user.id, strings[user.lang].import_failed.format(error=e))
+    finally:
+        _release(user.id)
+
+
+def start_export(bot, user, export_format: str) -> bool:
+    """Queue the export of the user's items as `export_format` and return False if one of theirs runs."""
+    if not _claim(bot, user):
+        return False
+    try:
+        status = bot.send_message(user.id, strings[user.lang].export_started)
+        progress = TransferProgress(bot, user.id, status.message_id, user.lang)
+        _executor.submit(_run_export, bot, user, export_format, progress)
+    except Exception:
+        _release(user.id)
+        raise
+    return True
+
+
+def _run_export(bot, user, export_format: str, progress: TransferProgress) -> None:
+    suffix = ITEM_EXPORT_FORMATS[export_format][0]
+    file_name = f"items_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}"
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, file_name)
+            report = export_items(engine, user.id, path, export_format, progress=progress)
+            if not report.items:
+                bot.send_message(user.id, strings[user.lang].no_items)
+                return
+            with open(path, "rb") as file:
+                caption = strings[user.lang].export_done.format(items=report.items)
+                bot.send_document(user.id, file, caption=caption, visible_file_name=file_name)
+    except Exception as e:
+        logger.error(f"Error exporting items of user {user.id}: {e}")
+        bot.send_message(user.id, f"Error: ```{str(e)}```", parse_mode="Markdown")
+    finally:
+        _release(user.id)
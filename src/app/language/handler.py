@@ -1,11 +1,10 @@
 import logging
-from pathlib import Path
 
-from omegaconf import OmegaConf
 from telebot import TeleBot
 from telebot.states import State, StatesGroup
 from telebot.types import CallbackQuery
 
+from ..catalog import catalog
 from ..users.service import update_user
 from .markup import create_lang_menu_markup
 
@@ -13,9 +12,7 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-strings = config.strings
+strings = catalog.strings("language")
 
 
 class LanguageState(StatesGroup):
@@ -1,21 +1,47 @@
+import argparse
+import asyncio
 import logging
+import secrets
+import signal
+import ssl
+import sys
+from urllib.parse import urlparse
 
 import telebot
 from dotenv import find_dotenv, load_dotenv
+from telebot import asyncio_filters
+from telebot.async_telebot import AsyncTeleBot
 from telebot.states.sync.middleware import StateMiddleware
 
 from .admin.handlers import register_handlers as admin_handlers
 from .config import settings
-from .database.core import SessionLocal, create_tables, drop_tables
-from .items.data import init_item_categories_table
+from .database.core import SessionLocal, drop_tables, engine
+from .database.migrate import migrate
+from .dispatch.asyncio_bridge import BridgeStateMiddleware, SyncBotBridge
+from .dispatch.sharded import use_sharded_worker_pool
+from .dispatch.supervisor import Supervisor, SupervisorWebhookReceiver, exit_on_sigterm, publish, subscribe
+from .dispatch.webhook import QueuedWebhookReceiver
 from .items.handlers import register_handlers as items_handlers
 from .language.handler import register_handlers as language_handlers
 from .menu.handlers import register_handlers as menu_handlers
-from .middleware.antiflood import AntifloodMiddleware
-from .middleware.database import DatabaseMiddleware
-from .middleware.user import UserCallbackMiddleware, UserMessageMiddleware
+from .middleware.antiflood import AntifloodMiddleware, AsyncAntifloodMiddleware
+from .middleware.database import AsyncDatabaseMiddleware, DatabaseMiddleware
+from .middleware.user import (
+    AsyncUserCallbackMiddleware,
+    AsyncUserInlineQueryMiddleware,
+    AsyncUserMessageMiddleware,
+    UserCallbackMiddleware,
+    UserInlineQueryMiddleware,
+    UserMessageMiddleware,
+)
+from .outbound.scheduler import OutboundScheduler
+from .outbound.transport import PooledTransport, configure_async_transport
 from .public_message.handlers import register_handlers as public_message_handlers
-from .users.data import init_roles_table, init_superuser
+from .reference_cache import reference_cache
+from .startup import run_startup_report
+from .users.activity import activity_tracker
+from .users.cache import user_cache
+from .users.data import init_superuser
 from .users.handlers import register_handlers as users_handlers
 
 # Set up logging
@@ -34,33 +60,182 @@ def start_bot():
         raise ValueError("BOT_TOKEN environment variable is required")
 
     logger.info(
-        f"Initializing {settings.PROJECT_NAME} v{settings.PROJECT_VERSION} with {settings.COMMUNICATION_STRATEGY} strategy"
+        f"Initializing {settings.PROJECT_NAME} v{settings.PROJECT_VERSION} "
+        f"with {settings.COMMUNICATION_STRATEGY} strategy in {settings.DISPATCH_MODE} dispatch mode"
     )
 
+    # Container stops send SIGTERM
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
     try:
-        bot = telebot.TeleBot(settings.BOT_TOKEN, use_class_middlewares=True)
-        _setup_middlewares(bot)
+        if settings.DISPATCH_MODE == "async":
+            asyncio.run(_run_async_bot())
+        elif settings.DISPATCH_PROCESSES > 1:
+            _run_supervisor()
+        else:
+            _run_sync_bot()
+
+    except Exception as e:
+        logging.critical(f"Failed to start bot: {str(e)}")
+        raise
+    finally:
+        activity_tracker.stop()
+
+
+def create_sync_bot(own_worker_pool: bool = True) -> telebot.TeleBot:
+    """
+    Create a TeleBot with all middlewares and handlers registered.
+
+    Args:
+        own_worker_pool: Process updates on the bot's worker threads. If False, the bot is
+            created with `threaded=False` and the caller runs `process_new_updates` on its own workers.
+    """
+    _setup_transport()
+    if not own_worker_pool:
+        bot = telebot.TeleBot(settings.BOT_TOKEN, use_class_middlewares=True, threaded=False)
+    elif settings.DISPATCH_ORDERED:
+        bot = telebot.TeleBot(settings.BOT_TOKEN, use_class_middlewares=True, threaded=False)
+        use_sharded_worker_pool(bot, settings.DISPATCH_WORKERS)
+    else:
+        bot = telebot.TeleBot(settings.BOT_TOKEN, use_class_middlewares=True, num_threads=settings.DISPATCH_WORKERS)
+    # Worker processes share Telegram's global limit
+    _setup_outbound(bot, processes=max(1, settings.DISPATCH_PROCESSES))
+    _setup_middlewares(bot)
+
+    _register_core_handlers(bot)
+    if settings.USE_PLUGINS:
+        _register_plugins_handlers(bot)
+
+    bot.add_custom_filter(telebot.custom_filters.StateFilter(bot))
+    return bot
+
 
-        _register_core_handlers(bot)
-        if settings.USE_PLUGINS:
-            _register_plugins_handlers(bot)
+def create_worker_bot() -> telebot.TeleBot:
+    """Create the bot of a supervisor worker process, which runs `process_new_updates` on its own pool."""
+    # A user's record is changed on the worker of the admin, the worker of the user must not serve the cached one
+    user_cache.on_invalidate(lambda user_id: publish("user_cache.invalidate", user_id))
+    subscribe("user_cache.invalidate", lambda user_id: user_cache.invalidate(user_id, propagate=False))
+    return create_sync_bot(own_worker_pool=False)
 
-        bot.add_custom_filter(telebot.custom_filters.StateFilter(bot))
 
-        bot_info = bot.get_me()
-        logger.info(f"Bot {bot_info.username} (ID: {bot_info.id}) initialized successfully")
+def _run_sync_bot():
+    """Run the bot on TeleBot, one dispatcher thread per in-flight update."""
+    # The queued receiver handles updates on its own worker pool
+    queued_webhook = settings.COMMUNICATION_STRATEGY == "webhook" and settings.WEBHOOK_SERVER == "queued"
+    bot = create_sync_bot(own_worker_pool=not queued_webhook)
+
+    bot_info = bot.get_me()
+    logger.info(f"Bot {bot_info.username} (ID: {bot_info.id}) initialized successfully")
+
+    if settings.COMMUNICATION_STRATEGY == "polling":
+        _start_polling_loop(bot)
+    elif settings.COMMUNICATION_STRATEGY == "webhook":
+        _set_webhook(bot)
+    else:
+        logging.critical(f"Unsupported communication strategy: {settings.COMMUNICATION_STRATEGY}")
+        raise ValueError(f"Unsupported communication strategy: {settings.COMMUNICATION_STRATEGY}")
+
 
+def _run_supervisor():
+    """
+    Run the ingest loop in this process and the handlers in DISPATCH_PROCESSES worker processes.
+
+    Each worker builds the bot with create_worker_bot, so the middlewares and handlers
+    are registered exactly as in single-process mode, and runs them on DISPATCH_WORKERS
+    threads sharded by chat. Updates are routed by sender id, which keeps the FSM state
+    of a user on one worker; the workers tell each other which cached users to drop.
+    """
+    _setup_transport()
+    ingest_bot = telebot.TeleBot(settings.BOT_TOKEN, threaded=False)
+    bot_info = ingest_bot.get_me()
+    logger.info(f"Bot {bot_info.username} (ID: {bot_info.id}) initialized successfully")
+
+    supervisor = Supervisor(
+        create_worker_bot,
+        num_workers=settings.DISPATCH_PROCESSES,
+        queue_size=settings.WEBHOOK_QUEUE_SIZE,
+        health_timeout=settings.SUPERVISOR_HEALTH_TIMEOUT,
+        handler_threads=settings.DISPATCH_WORKERS,
+        handler_timeout=settings.SUPERVISOR_HANDLER_TIMEOUT,
+    )
+    supervisor.start()
+
+    if settings.COMMUNICATION_STRATEGY == "polling":
+        ingest_bot.remove_webhook()
+        supervisor.run_polling(ingest_bot)
+    elif settings.COMMUNICATION_STRATEGY == "webhook":
+        receiver = SupervisorWebhookReceiver(supervisor, secret_token=_webhook_secret_token())
+        _serve_webhook(ingest_bot, receiver)
+    else:
+        supervisor.stop()
+        logging.critical(f"Unsupported communication strategy: {settings.COMMUNICATION_STRATEGY}")
+        raise ValueError(f"Unsupported communication strategy: {settings.COMMUNICATION_STRATEGY}")
+
+
+async def _run_async_bot():
+    """
+    Run the bot on AsyncTeleBot.
+
+    Telegram I/O and middlewares run on the event loop. The feature handlers are
+    registered through SyncBotBridge, which runs the bodies of sync handlers on a
+    bounded thread pool. The slow plugin handlers (LLM replies, downloads, Google
+    Sheets) register `async def` variants on the bridge, which wait on the loop.
+    """
+    configure_async_transport(settings.HTTP_POOL_MAXSIZE, settings.HTTP_READ_TIMEOUT)
+    bot = AsyncTeleBot(settings.BOT_TOKEN)
+    bridge = SyncBotBridge(bot, max_workers=settings.ASYNC_HANDLER_WORKERS)
+    bridge.bind_loop(asyncio.get_running_loop())
+    # Sends of the sync handlers go through the bridge to the async bot's methods
+    _setup_outbound(bot)
+    _setup_async_middlewares(bot, bridge)
+
+    _register_core_handlers(bridge)
+    if settings.USE_PLUGINS:
+        _register_plugins_handlers(bridge)
+
+    bot.add_custom_filter(asyncio_filters.StateFilter(bot))
+
+    bot_info = await bot.get_me()
+    logger.info(f"Bot {bot_info.username} (ID: {bot_info.id}) initialized successfully")
+
+    try:
         if settings.COMMUNICATION_STRATEGY == "polling":
-            _start_polling_loop(bot)
+            logger.info("Starting async bot polling...")
+            await bot.polling(non_stop=True, interval=0, timeout=60, request_timeout=90)
         elif settings.COMMUNICATION_STRATEGY == "webhook":
-            _set_webhook(bot)
+            await _set_async_webhook(bot)
         else:
             logging.critical(f"Unsupported communication strategy: {settings.COMMUNICATION_STRATEGY}")
             raise ValueError(f"Unsupported communication strategy: {settings.COMMUNICATION_STRATEGY}")
-
-    except Exception as e:
-        logging.critical(f"Failed to start bot: {str(e)}")
-        raise
+    finally:
+        await asyncio.to_thread(bridge.shutdown)
+        await bot.close_session()
+
+
+def _setup_transport():
+    """Send Bot API calls through a shared keep-alive connection pool."""
+    if not settings.HTTP_POOLED_TRANSPORT:
+        return
+    PooledTransport(
+        pool_connections=settings.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+        connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+        read_timeout=settings.HTTP_READ_TIMEOUT,
+        http2=settings.HTTP2_ENABLED,
+    ).install()
+
+
+def _setup_outbound(bot, processes: int = 1):
+    """Route outgoing messages through the OutboundScheduler."""
+    if not settings.OUTBOUND_ENABLED:
+        return
+    scheduler = OutboundScheduler(
+        global_rate=settings.OUTBOUND_GLOBAL_RATE / processes,
+        chat_rate=settings.OUTBOUND_CHAT_RATE,
+        chat_burst=settings.OUTBOUND_CHAT_BURST,
+        group_rate=settings.OUTBOUND_GROUP_RATE,
+        max_retries=settings.OUTBOUND_MAX_RETRIES,
+    )
+    scheduler.install(bot)
 
 
 def _setup_middlewares(bot):
@@ -73,6 +248,23 @@ def _setup_middlewares(bot):
     bot.setup_middleware(DatabaseMiddleware(bot))
     bot.setup_middleware(UserMessageMiddleware(bot))
     bot.setup_middleware(UserCallbackMiddleware(bot))
+    bot.setup_middleware(UserInlineQueryMiddleware(bot))
+
+
+def _setup_async_middlewares(bot, bridge):
+    """Configure AsyncTeleBot middlewares, mirroring _setup_middlewares."""
+    if settings.ANTIFLOOD_ENABLED:
+        logger.info(f"Enabling antiflood (window: {settings.ANTIFLOOD_RATE_LIMIT}s)")
+        bot.setup_middleware(AsyncAntifloodMiddleware(bot, settings.ANTIFLOOD_RATE_LIMIT))
+
+    bot.setup_middleware(BridgeStateMiddleware(bridge))
+    # Loaded in async mode only, the async engine needs its asyncio driver
+    from .database.async_core import AsyncSessionLocal
+
+    bot.setup_middleware(AsyncDatabaseMiddleware(bot, async_session_factory=AsyncSessionLocal))
+    bot.setup_middleware(AsyncUserMessageMiddleware(bot))
+    bot.setup_middleware(AsyncUserCallbackMiddleware(bot))
+    bot.setup_middleware(AsyncUserInlineQueryMiddleware(bot))
 
 
 def _register_core_handlers(bot):
@@ -90,7 +282,7 @@ def _register_core_handlers(bot):
 
 
 def _register_plugins_handlers(bot):
-    """Register all plugin handlers."""
+    """Register all plugin handlers. Their clients and heavy dependencies are loaded on first use."""
 
     from .chatgpt.handlers import register_handlers as chatgpt_handlers
     from .google_sheets.handlers import register_handlers as google_sheets_handlers
@@ -118,7 +310,9 @@ def _set_webhook(bot):
     If webhook URL is set in environment variables, use it.
     Otherwise, use the HOST public ip and SSL certificate for the webhook.
     """
-    if not settings.WEBHOOK_URL:
+    if settings.WEBHOOK_SERVER == "queued":
+        _run_queued_webhook(bot)
+    elif not settings.WEBHOOK_URL:
         logger.info(f"Setting bot webhook with host {settings.HOST} and port {settings.PORT}...")
         bot.run_webhooks(
             listen=settings.HOST,
@@ -131,29 +325,100 @@ def _set_webhook(bot):
         bot.run_webhooks(webhook_url=settings.WEBHOOK_URL)
 
 
+def _run_queued_webhook(bot):
+    """
+    Serve the webhook with QueuedWebhookReceiver.
+
+    With WEBHOOK_URL set, TLS is expected to be terminated in front of the bot and
+    the receiver listens on plain HTTP. Otherwise it serves HTTPS on HOST:PORT with
+    the (self-signed) certificate, which is uploaded to Telegram.
+    """
+    receiver = QueuedWebhookReceiver(
+        bot,
+        num_workers=settings.DISPATCH_WORKERS,
+        queue_size=settings.WEBHOOK_QUEUE_SIZE,
+        secret_token=_webhook_secret_token(),
+    )
+    _serve_webhook(bot, receiver)
+
+
+def _webhook_secret_token() -> str:
+    """Return the configured webhook secret token, or a random one."""
+    return settings.WEBHOOK_SECRET_TOKEN or secrets.token_urlsafe(32)
+
+
+def _serve_webhook(bot, receiver):
+    """Register the webhook of a WebhookReceiver with Telegram and serve it."""
+    bot.remove_webhook()
+    if settings.WEBHOOK_URL:
+        path = urlparse(settings.WEBHOOK_URL).path or "/"
+        logger.info(f"Setting queued bot webhook {settings.WEBHOOK_URL}...")
+        bot.set_webhook(url=settings.WEBHOOK_URL, secret_token=receiver.secret_token)
+        receiver.run(host=settings.HOST, port=settings.PORT, path=path)
+    else:
+        path = settings.WEBHOOK_PATH
+        url = f"https://{settings.HOST}:{settings.PORT}{path}"
+        logger.info(f"Setting queued bot webhook {url}...")
+        with open(settings.WEBHOOK_SSL_CERT, "rb") as certificate:
+            bot.set_webhook(url=url, certificate=certificate, secret_token=receiver.secret_token)
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(settings.WEBHOOK_SSL_CERT, settings.WEBHOOK_SSL_PRIVKEY)
+        receiver.run(host=settings.HOST, port=settings.PORT, path=path, ssl_context=ssl_context)
+
+
+async def _set_async_webhook(bot):
+    """Set the webhook for AsyncTeleBot, see _set_webhook."""
+    if not settings.WEBHOOK_URL:
+        logger.info(f"Setting async bot webhook with host {settings.HOST} and port {settings.PORT}...")
+        await bot.run_webhooks(
+            listen=settings.HOST,
+            port=settings.PORT,
+            certificate=settings.WEBHOOK_SSL_CERT,
+            certificate_key=settings.WEBHOOK_SSL_PRIVKEY,
+        )
+    else:
+        logger.info(f"Setting async bot webhook {settings.WEBHOOK_URL}...")
+        await bot.run_webhooks(webhook_url=settings.WEBHOOK_URL)
+
+
 def init_db():
     """Initialize the database for applications."""
-    # Create tables
-    create_tables()
+    # Apply pending migrations, only a version check when the schema is up to date
+    migrate(engine)
 
     # Create a new database session directly using SessionLocal
     db_session = SessionLocal()
 
-    init_roles_table(db_session)
-
-    # Add admin to user table
+    # Add admin to user table, one upsert as the setting may change between launches
     if settings.SUPERUSER_USER_ID:
         init_superuser(db_session, settings.SUPERUSER_USER_ID, settings.SUPERUSER_USERNAME)
         logger.info(f"Superuser {settings.SUPERUSER_USERNAME} added successfully.")
 
-    init_item_categories_table(db_session)
-
     db_session.close()
 
+    # Roles and item categories are read from memory from the first update on
+    reference_cache.load()
+
     logger.info("Database initialized")
 
 
 if __name__ == "__main__":
-    drop_tables()
+    parser = argparse.ArgumentParser(description=f"Run {settings.PROJECT_NAME}")
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="print import time and RSS per module of a cold start, then exit",
+    )
+    parser.add_argument(
+        "--reset-database",
+        action="store_true",
+        help="drop all tables and their data before starting",
+    )
+    args = parser.parse_args()
+    if args.startup_report:
+        sys.exit(run_startup_report(__spec__.name))
+
+    if args.reset_database:
+        drop_tables()
     init_db()
     start_bot()
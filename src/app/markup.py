@@ -1,6 +1,9 @@
 from telebot.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from .markup_cache import cached_markup
 
+
+@cached_markup
 def create_cancel_button(lang: str) -> InlineKeyboardMarkup:
     """Create a cancel button"""
     cancel_button = InlineKeyboardMarkup(row_width=1)
@@ -0,0 +1,130 @@
+"""Cache of inline keyboards serialized once, shared by the markup builders."""
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from telebot.types import InlineKeyboardMarkup
+
+from .catalog import catalog
+from .metrics import metrics
+
+DEFAULT_MAXSIZE = 1024
+
+
+class SerializedMarkup(InlineKeyboardMarkup):
+    """
+    Read-only inline keyboard whose `reply_markup` JSON is computed once.
+
+    telebot calls `to_json()` on every send, this returns the stored string.
+    Instances are shared between updates, so they cannot be changed.
+    """
+
+    def __init__(self, markup: InlineKeyboardMarkup) -> None:
+        """
+        Args:
+            markup: The markup to serialize and copy
+        """
+        super().__init__(keyboard=markup.keyboard, row_width=markup.row_width)
+        self._json = markup.to_json()
+
+    def to_json(self) -> str:
+        """Return the JSON computed when the markup was cached."""
+        return self._json
+
+    def add(self, *args, row_width=None) -> InlineKeyboardMarkup:
+        """Refuse to change the shared markup."""
+        raise TypeError("Cached markups are shared between updates, build a new markup to change it")
+
+    def row(self, *args) -> InlineKeyboardMarkup:
+        """Refuse to change the shared markup."""
+        raise TypeError("Cached markups are shared between updates, build a new markup to change it")
+
+
+class MarkupCache:
+    """
+    LRU cache of serialized markups keyed by (builder, parameters).
+
+    The cache is cleared when the string catalog reloads, since the button
+    labels come from it.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        """
+        Args:
+            maxsize: Number of markups to keep, the least recently used are dropped
+        """
+        self.maxsize = maxsize
+        self._markups: OrderedDict[Hashable, SerializedMarkup] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        catalog.on_reload(lambda _: self.clear())
+        metrics.gauge("markup_cache.size", lambda: len(self._markups))
+        metrics.gauge("markup_cache.hit_ratio", self.hit_ratio)
+
+    def get(self, key: Hashable, build: Callable[[], InlineKeyboardMarkup]) -> SerializedMarkup:
+        """Return the markup stored under `key`, building and serializing it with `build` if needed."""
+        with self._lock:
+            markup = self._markups.get(key)
+            if markup is not None:
+                self._markups.move_to_end(key)
+                self.hits += 1
+                return markup
+            self.misses += 1
+
+        markup = SerializedMarkup(build())
+        with self._lock:
+            self._markups[key] = markup
+            if len(self._markups) > self.maxsize:
+                self._markups.popitem(last=False)
+        return markup
+
+    def hit_ratio(self) -> float:
+        """Return the share of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self) -> None:
+        """Drop all markups."""
+        with self._lock:
+            self._markups.clear()
+
+    def __len__(self) -> int:
+        """Return the number of cached markups."""
+        return len(self._markups)
+
+
+markup_cache = MarkupCache()
+
+
+def cached_markup(
+    builder: Optional[Callable[..., InlineKeyboardMarkup]] = None,
+    *,
+    key: Optional[Callable[..., Optional[Hashable]]] = None,
+) -> Any:
+    """
+    Decorator caching the serialized markup of a builder per parameter set.
+
+    By default the builder's arguments form the key, which suits builders taking
+    only `lang` and other hashable values. Builders of dynamic markups pass `key`,
+    a function of the same arguments returning a hashable key for the parameter
+    sets worth caching, or None to build the markup without caching it.
+
+    The undecorated builder is available as `uncached`.
+    """
+
+    def decorator(builder: Callable[..., InlineKeyboardMarkup]) -> Callable[..., InlineKeyboardMarkup]:
+        name = f"{builder.__module__}.{builder.__qualname__}"
+
+        @functools.wraps(builder)
+        def wrapper(*args, **kwargs) -> InlineKeyboardMarkup:
+            params = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            if params is None:
+                return builder(*args, **kwargs)
+            return markup_cache.get((name, params), lambda: builder(*args, **kwargs))
+
+        wrapper.uncached = builder
+        return wrapper
+
+    return decorator(builder) if builder is not None else decorator
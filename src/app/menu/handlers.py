@@ -1,11 +1,10 @@
 import logging
-from pathlib import Path
 
-from omegaconf import OmegaConf
 from telebot.states import State
 from telebot.states.sync.context import StateContext, StatesGroup
 from telebot.types import Message
 
+from ..catalog import catalog
 from .markup import create_admin_menu_markup, create_menu_markup
 
 # Set up logging
@@ -13,9 +12,7 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-strings = config.strings
+strings = catalog.strings("menu")
 
 
 class MenuStates(StatesGroup):
@@ -1,15 +1,14 @@
-from pathlib import Path
-
-from omegaconf import OmegaConf
 from telebot.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from ..catalog import catalog
+from ..markup_cache import cached_markup
+
 # Load configurations
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-strings = config.strings
+strings = catalog.strings("menu")
 
 
+@cached_markup
 def create_menu_markup(lang: str) -> InlineKeyboardMarkup:
     """Create the menu markup."""
     menu_markup = InlineKeyboardMarkup(row_width=1)
@@ -18,6 +17,7 @@ def create_menu_markup(lang: str) -> InlineKeyboardMarkup:
     return menu_markup
 
 
+@cached_markup
 def create_admin_menu_markup(lang: str) -> InlineKeyboardMarkup:
     """Create the admin menu markup."""
     menu_markup = InlineKeyboardMarkup(row_width=1)
@@ -26,6 +26,7 @@ def create_admin_menu_markup(lang: str) -> InlineKeyboardMarkup:
     return menu_markup
 
 
+@cached_markup
 def create_menu_button_markup(lang: str) -> InlineKeyboardMarkup:
     """Create the main menu button."""
     return InlineKeyboardMarkup().add(InlineKeyboardButton(strings[lang].title, callback_data="menu"))
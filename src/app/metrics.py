@@ -0,0 +1,117 @@
+"""In-process metrics registry shared by the dispatch, outbound and database layers."""
+import threading
+from collections import deque
+from typing import Callable
+
+
+class Summary:
+    """Count, sum, max and percentiles over a bounded window of recent observations."""
+
+    def __init__(self, window: int = 1024) -> None:
+        """
+        Args:
+            window: Number of recent observations the percentiles are computed over
+        """
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def percentile(self, q: float) -> float:
+        """Return the q-th percentile (0..100) of the recent window."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def as_dict(self) -> dict:
+        """Return the summary as a plain dictionary."""
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": self.max,
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry of counters, gauges and summaries."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+        self._gauges: dict[str, Callable[[], float]] = {}
+        self._summaries: dict[str, Summary] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """Increment a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def gauge(self, name: str, func: Callable[[], float]) -> None:
+        """Register a gauge read from `func` when a snapshot is taken."""
+        with self._lock:
+            self._gauges[name] = func
+
+    def observe(self, name: str, value: float) -> None:
+        """Record an observation (e.g. a latency in seconds) in a summary."""
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                summary = self._summaries[name] = Summary()
+            summary.observe(value)
+
+    def counter(self, name: str) -> float:
+        """Return the current value of a counter."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict:
+        """Return all metrics as a dictionary keyed by metric name."""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            summaries = {name: summary.as_dict() for name, summary in self._summaries.items()}
+        result: dict = dict(counters)
+        for name, func in gauges.items():
+            try:
+                result[name] = func()
+            except Exception:
+                # A broken gauge must not break the snapshot
+                result[name] = None
+        result.update(summaries)
+        return dict(sorted(result.items()))
+
+    def reset(self) -> None:
+        """Drop all metrics."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+
+def format_snapshot(snapshot: dict) -> str:
+    """Format a snapshot as `name: value` lines."""
+    lines = []
+    for name, value in snapshot.items():
+        if isinstance(value, dict):
+            text = ", ".join(f"{key}={val:.4g}" if isinstance(val, float) else f"{key}={val}" for key, val in value.items())
+        elif isinstance(value, float):
+            text = f"{value:.4g}"
+        else:
+            text = str(value)
+        lines.append(f"{name}: {text}")
+    return "\n".join(lines)
+
+
+metrics = MetricsRegistry()
@@ -1,4 +1,7 @@
 from telebot import TeleBot
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_handler_backends import BaseMiddleware as AsyncBaseMiddleware
+from telebot.asyncio_handler_backends import CancelUpdate as AsyncCancelUpdate
 from telebot.handler_backends import BaseMiddleware, CancelUpdate
 
 
@@ -32,3 +35,33 @@ class AntifloodMiddleware(BaseMiddleware):
     def post_process(self, message, data, exception):
         """ """
         pass
+
+
+class AsyncAntifloodMiddleware(AsyncBaseMiddleware):
+    """Middleware to prevent flooding for AsyncTeleBot"""
+
+    def __init__(self, bot: AsyncTeleBot, limit: int) -> None:
+        """Middleware to prevent flooding
+        Args:
+            bot (AsyncTeleBot): AsyncTeleBot instance
+            limit (int): Limit in seconds
+        """
+        self.bot = bot
+        self.last_time: dict[str, str] = {}
+        self.limit = limit
+        self.update_types = ["message"]
+
+    async def pre_process(self, message, data):
+        """Check if the user is flooding the chat with messages."""
+        if message.from_user.id not in self.last_time:
+            self.last_time[message.from_user.id] = message.date
+            return
+        if message.date - self.last_time[message.from_user.id] < self.limit:
+            # User is flooding
+            await self.bot.send_message(message.chat.id, "You are making request too often")
+            return AsyncCancelUpdate()
+        self.last_time[message.from_user.id] = message.date
+
+    async def post_process(self, message, data, exception):
+        """ """
+        pass
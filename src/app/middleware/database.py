@@ -1,11 +1,21 @@
+import asyncio
 import logging
 import os
+import re
+import threading
+from typing import Any, Callable, Optional
 
+from sqlalchemy import event
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from telebot import TeleBot
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_handler_backends import BaseMiddleware as AsyncBaseMiddleware
 from telebot.handler_backends import BaseMiddleware
 
 from ..database.core import SessionLocal
+from ..metrics import metrics
 
 # Set logging
 log_level = os.environ.get("LOG_LEVEL", "INFO").upper()
@@ -13,6 +23,180 @@ logging.basicConfig(level=getattr(logging, log_level, None))
 logger = logging.getLogger(__name__)
 
 
+class LazySession:
+    """
+    Proxy for `data["db_session"]` creating the database session on first use.
+
+    Handlers and services use it like a `Session`. Updates whose handlers never
+    touch the database (menu navigation, cancel buttons, cached users) create no
+    session and check out no connection. Executed statements and flushes are
+    counted, so the middleware only commits sessions that wrote something.
+    """
+
+    def __init__(self, factory: Callable[[], Session] = SessionLocal) -> None:
+        """
+        Args:
+            factory: Callable creating the session on first use
+        """
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_session", None)
+
+    @property
+    def created(self) -> bool:
+        """Return True if the session was created."""
+        return self._session is not None
+
+    def get(self) -> Session:
+        """Create the session if needed and return it."""
+        if self._session is None:
+            session = self._factory()
+            session.info["usage"] = {"executions": 0, "writes": 0}
+            object.__setattr__(self, "_session", session)
+        return self._session
+
+    @property
+    def usage(self) -> dict:
+        """Return the number of statements executed and of those that wrote."""
+        if self._session is None:
+            return {"executions": 0, "writes": 0}
+        return self._session.info["usage"]
+
+    def __getattr__(self, name: str) -> Any:
+        """Return the attribute of the session, creating it."""
+        return getattr(self.get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set the attribute on the session, creating it."""
+        # Services set options such as expire_on_commit on the session
+        setattr(self.get(), name, value)
+
+    def __enter__(self) -> Session:
+        """Enter the session, creating it."""
+        return self.get().__enter__()
+
+    def __exit__(self, *exc_info) -> None:
+        """Exit the session, which closes it."""
+        self.get().__exit__(*exc_info)
+
+
+def _is_write(orm_execute_state) -> bool:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        return True
+    # Textual statements, such as the user upsert mapped with from_statement()
+    statement = orm_execute_state.statement
+    while getattr(statement, "text", None) is None and getattr(statement, "element", None) is not None:
+        statement = statement.element
+    sql = getattr(statement, "text", None)
+    return sql is not None and not sql.lstrip()[:6].upper().startswith(("SELECT", "WITH"))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _count_execution(orm_execute_state) -> None:
+    usage = orm_execute_state.session.info.get("usage")
+    if usage is not None:
+        usage["executions"] += 1
+        usage["writes"] += _is_write(orm_execute_state)
+
+
+@event.listens_for(Session, "after_flush")
+def _count_flush(session, flush_context) -> None:
+    usage = session.info.get("usage")
+    if usage is not None:
+        usage["writes"] += 1
+
+
+class SessionUsage:
+    """Per-update session usage by kind of update, to see which handlers need the database."""
+
+    KINDS = ("unused", "read", "write")
+
+    def __init__(self, max_labels: int = 100) -> None:
+        """
+        Args:
+            max_labels: Number of kinds of update tracked, others are counted as "other"
+        """
+        self.max_labels = max_labels
+        self._labels: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, label: str, kind: str) -> None:
+        """Count one update of kind `label` whose session was unused, only read or wrote."""
+        metrics.inc(f"db.session_{kind}_total")
+        with self._lock:
+            if label not in self._labels and len(self._labels) >= self.max_labels:
+                label = "other"
+            counts = self._labels.get(label)
+            if counts is None:
+                counts = self._labels[label] = dict.fromkeys(self.KINDS, 0)
+                metrics.gauge(f"db.session_use.{label}", lambda: dict(counts))
+            counts[kind] += 1
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        """Return the counts by label."""
+        with self._lock:
+            return {label: dict(counts) for label, counts in self._labels.items()}
+
+
+session_usage = SessionUsage()
+
+
+def update_label(update) -> str:
+    """Return a low-cardinality name of the kind of update, e.g. `callback:view_item_N` or `command:/menu`."""
+    data = getattr(update, "data", None)
+    if isinstance(data, str):
+        return "callback:" + re.sub(r"\d+", "N", data)[:40]
+    text = getattr(update, "text", None)
+    if isinstance(text, str) and text.startswith("/"):
+        return "command:" + text.split()[0][:40]
+    if getattr(update, "query", None) is not None:
+        return "inline_query"
+    return f"message:{getattr(update, 'content_type', 'other')}"
+
+
+def session_kind(session: Optional[LazySession]) -> str:
+    """Return whether the session of an update was unused, only read or wrote."""
+    if session is None or not session.created:
+        return "unused"
+    real_session = session.get()
+    wrote = session.usage["writes"] or real_session.new or real_session.dirty or real_session.deleted
+    return "write" if wrote else "read"
+
+
+def finish_session(session: LazySession, update, exception) -> None:
+    """Commit, roll back or just close the session of one update, and record its usage."""
+    kind = session_kind(session)
+    session_usage.record(update_label(update), kind)
+    release_session(session, kind, exception)
+
+
+def release_session(session: LazySession, kind: str, exception) -> None:
+    """Commit the session if it wrote, roll it back if the handler failed, and close it."""
+    if kind == "unused":
+        return
+    if kind == "write" or exception:
+        close_session(session.get(), exception)
+    else:
+        # Nothing to commit, closing releases the connection
+        session.get().close()
+
+
+async def finish_async_session(session: LazySession, kind: str, exception) -> None:
+    """Commit, roll back or just close the AsyncSession of one update."""
+    if kind == "unused":
+        return
+    real_session = session.get()
+    try:
+        if exception:
+            await real_session.rollback()
+        elif kind == "write":
+            await real_session.commit()
+    except SQLAlchemyError as e:
+        logger.error(f"Error during async session commit/rollback: {str(e)}")
+        await real_session.rollback()
+    finally:
+        await real_session.close()
+
+
 class DatabaseMiddleware(BaseMiddleware):
     """Middleware to manage database sessions."""
 
@@ -33,34 +217,78 @@ class DatabaseMiddleware(BaseMiddleware):
         logger.info("Database middleware initialized")
 
     def pre_process(self, message, data):
-        """Create a database session and add it to the data dictionary"""
-        try:
-            # Create a new database session directly using SessionLocal
-            session = SessionLocal()
-            data["db_session"] = session
-            return True
-        except SQLAlchemyError as e:
-            logger.error(f"Error creating database session: {str(e)}")
-            return False
+        """Add a lazy database session to the data dictionary"""
+        # The session is only created if a middleware or handler uses it
+        data["db_session"] = LazySession()
 
     def post_process(self, message, data, exception):
-        """Close the database session"""
+        """Commit the database session if it wrote something, and close it"""
         # Get the session from the data dictionary
         session = data.get("db_session")
-        if session:
-            try:
-                # If there was an exception, rollback the session
-                if exception:
-                    logger.warning(f"Rolling back database session due to exception: {str(exception)}")
-                    session.rollback()
-                # Otherwise commit any pending changes
-                else:
-                    session.commit()
-            except SQLAlchemyError as e:
-                logger.error(f"Error during session commit/rollback: {str(e)}")
-                session.rollback()
-            finally:
-                # Always close the session, matching the finally block in get_db()
-                session.close()
+        if session is not None:
+            finish_session(session, message, exception)
         else:
             logger.warning("No database session found in post_process")
+
+
+class AsyncDatabaseMiddleware(AsyncBaseMiddleware):
+    """Middleware to manage database sessions for AsyncTeleBot."""
+
+    def __init__(self, bot: AsyncTeleBot, async_session_factory: Optional[Callable[[], AsyncSession]] = None) -> None:
+        """Middleware to manage database sessions
+
+        Args:
+            bot (AsyncTeleBot): AsyncTeleBot instance
+            async_session_factory: Factory of the AsyncSession added as `async_db_session`, none if not given
+        """
+        self.bot = bot
+        self.async_session_factory = async_session_factory
+        self.update_types = [
+            "message",
+            "callback_query",
+            "inline_query",
+            "edited_message",
+        ]
+        logger.info("Async database middleware initialized")
+
+    async def pre_process(self, message, data):
+        """Add lazy sync and async database sessions to the data dictionary"""
+        # Handler bodies run in threads and use the sync session, async code uses the AsyncSession
+        data["db_session"] = LazySession()
+        if self.async_session_factory is not None:
+            data["async_db_session"] = LazySession(self.async_session_factory)
+
+    async def post_process(self, message, data, exception):
+        """Commit or roll back and close the sessions without blocking the event loop"""
+        session = data.get("db_session")
+        if session is None:
+            logger.warning("No database session found in post_process")
+            return
+        async_session = data.get("async_db_session")
+        kind, async_kind = session_kind(session), session_kind(async_session)
+        # The update wrote if either session wrote
+        usage = max(kind, async_kind, key=SessionUsage.KINDS.index)
+        session_usage.record(update_label(message), usage)
+
+        if async_kind != "unused":
+            await finish_async_session(async_session, async_kind, exception)
+        if kind != "unused":
+            await asyncio.to_thread(release_session, session, kind, exception)
+
+
+def close_session(session, exception) -> None:
+    """Commit the session, or roll it back if the handler failed, and close it."""
+    try:
+        # If there was an exception, rollback the session
+        if exception:
+            logger.warning(f"Rolling back database session due to exception: {str(exception)}")
+            session.rollback()
+        # Otherwise commit any pending changes
+        else:
+            session.commit()
+    except SQLAlchemyError as e:
+        logger.error(f"Error during session commit/rollback: {str(e)}")
+        session.rollback()
+    finally:
+        # Always close the session, matching the finally block in get_db()
+        session.close()
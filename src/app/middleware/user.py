@@ -1,17 +1,78 @@
+import asyncio
 import json
 import logging
 from datetime import datetime
+from typing import Optional
 
 from telebot import TeleBot
-from telebot.handler_backends import BaseMiddleware
-from telebot.types import CallbackQuery, Message
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_handler_backends import BaseMiddleware as AsyncBaseMiddleware
+from telebot.asyncio_handler_backends import CancelUpdate as AsyncCancelUpdate
+from telebot.handler_backends import BaseMiddleware, CancelUpdate
+from telebot.states.asyncio.context import StateContext as AsyncStateContext
+from telebot.types import CallbackQuery, InlineQuery, Message
 
+from ..users import async_service
+from ..users.activity import activity_tracker
+from ..users.cache import UserIdentity, user_cache
 from ..users.service import upsert_user
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+def cached_user(from_user) -> Optional[UserIdentity]:
+    """Return the cached record of the sender if its profile did not change, without querying the database."""
+    user = user_cache.get(from_user.id)
+    if user is not None and user.matches(from_user):
+        return user
+    return None
+
+
+def load_user(db_session, from_user) -> UserIdentity:
+    """Insert or update the sender, commit it and cache the record."""
+    user = upsert_user(
+        db_session,
+        user_id=from_user.id,
+        username=from_user.username,
+        first_name=from_user.first_name,
+        last_name=from_user.last_name,
+    )
+    identity = UserIdentity.from_user(user)
+    # Committed before the handler runs: an open write would hold the SQLite write lock,
+    # or the PostgreSQL row lock, until the handler returns
+    try:
+        db_session.commit()
+    except Exception:
+        # Not cached, the next update of the user writes it again
+        db_session.rollback()
+        raise
+    return user_cache.put(identity)
+
+
+async def load_user_async(data: dict, from_user) -> UserIdentity:
+    """Insert or update the sender without blocking the event loop, commit it and cache the record."""
+    async_db_session = data.get("async_db_session")
+    if async_db_session is None:
+        # Without an async engine the upsert is blocking database I/O, keep it off the event loop
+        return await asyncio.to_thread(load_user, data["db_session"], from_user)
+    user = await async_service.upsert_user(
+        async_db_session,
+        user_id=from_user.id,
+        username=from_user.username,
+        first_name=from_user.first_name,
+        last_name=from_user.last_name,
+    )
+    identity = UserIdentity.from_user(user)
+    # The handler body writes through the sync session, which would wait for the uncommitted user row
+    try:
+        await async_db_session.commit()
+    except Exception:
+        await async_db_session.rollback()
+        raise
+    return user_cache.put(identity)
+
+
 class UserMessageMiddleware(BaseMiddleware):
     """Middleware to log user messages"""
 
@@ -24,13 +85,8 @@ class UserMessageMiddleware(BaseMiddleware):
         """Pre-process the message"""
 
         db_session = data["db_session"]
-        user = upsert_user(
-            db_session,
-            user_id=message.from_user.id,
-            username=message.from_user.username,
-            first_name=message.from_user.first_name,
-            last_name=message.from_user.last_name,
-        )
+        user = cached_user(message.from_user) or load_user(db_session, message.from_user)
+        activity_tracker.touch(user.id)
 
         # Check if user is blocked
         if user.is_blocked:
@@ -68,13 +124,8 @@ class UserCallbackMiddleware(BaseMiddleware):
     def pre_process(self, callback_query: CallbackQuery, data: dict):
         """Pre-process the callback query"""
         db_session = data["db_session"]
-        user = upsert_user(
-            db_session,
-            user_id=callback_query.from_user.id,
-            username=callback_query.from_user.username,
-            first_name=callback_query.from_user.first_name,
-            last_name=callback_query.from_user.last_name,
-        )
+        user = cached_user(callback_query.from_user) or load_user(db_session, callback_query.from_user)
+        activity_tracker.touch(user.id)
 
         # Check if user is blocked
         if user.is_blocked:
@@ -98,3 +149,132 @@ class UserCallbackMiddleware(BaseMiddleware):
     def post_process(self, callback_query, data, exception):
         """Post-process the callback query"""
         pass
+
+
+class UserInlineQueryMiddleware(BaseMiddleware):
+    """Middleware to log user inline queries"""
+
+    def __init__(self, bot: TeleBot) -> None:
+        """Initialize the middleware."""
+        self.bot = bot
+        self.update_types = ["inline_query"]
+
+    def pre_process(self, inline_query: InlineQuery, data: dict):
+        """Pre-process the inline query"""
+        # Sent on each keystroke: known users are served from the cache without a query
+        user = cached_user(inline_query.from_user) or load_user(data["db_session"], inline_query.from_user)
+        activity_tracker.touch(user.id)
+
+        # Blocked users get no results
+        if user.is_blocked:
+            self.bot.answer_inline_query(inline_query.id, [], is_personal=True)
+            return CancelUpdate()
+
+        logger.debug(f"Inline query of user {user.id}: {inline_query.query!r}, offset {inline_query.offset!r}")
+
+        # Set the user data to the data dictionary
+        data["user"] = user
+
+    def post_process(self, inline_query, data, exception):
+        """Post-process the inline query"""
+        pass
+
+
+class AsyncUserMessageMiddleware(AsyncBaseMiddleware):
+    """Middleware to log user messages for AsyncTeleBot"""
+
+    def __init__(self, bot: AsyncTeleBot) -> None:
+        """Initialize the middleware."""
+        self.bot = bot
+        self.update_types = ["message"]
+
+    async def pre_process(self, message: Message, data: dict):
+        """Pre-process the message"""
+        user = cached_user(message.from_user) or await load_user_async(data, message.from_user)
+        activity_tracker.touch(user.id)
+
+        # Check if user is blocked
+        if user.is_blocked:
+            await self.bot.send_message(user.id, "You have been blocked from using this bot.")
+            return
+
+        event = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "user_id": user.id,
+            "event_type": "message",
+            "state": await AsyncStateContext(message, self.bot).get(),
+            "content": message.text,
+            "content_type": message.content_type,
+        }
+        logger.info(json.dumps(event, ensure_ascii=False))
+
+        # Set the user data to the data dictionary
+        data["user"] = user
+
+    async def post_process(self, message, data, exception):
+        """Post-process the message"""
+        pass
+
+
+class AsyncUserCallbackMiddleware(AsyncBaseMiddleware):
+    """Middleware to log user callbacks for AsyncTeleBot"""
+
+    def __init__(self, bot: AsyncTeleBot) -> None:
+        """Initialize the middleware."""
+        self.bot = bot
+        self.update_types = ["callback_query"]
+
+    async def pre_process(self, callback_query: CallbackQuery, data: dict):
+        """Pre-process the callback query"""
+        user = cached_user(callback_query.from_user) or await load_user_async(data, callback_query.from_user)
+        activity_tracker.touch(user.id)
+
+        # Check if user is blocked
+        if user.is_blocked:
+            await self.bot.answer_callback_query(callback_query.id, "You have been blocked from using this bot.")
+            return
+
+        event = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "user_id": user.id,
+            "event_type": "callback",
+            "state": await AsyncStateContext(callback_query, self.bot).get(),
+            "content": callback_query.data,
+            "content_type": "callback_data",
+        }
+        logger.info(json.dumps(event, ensure_ascii=False))
+
+        # Set the user data to the data dictionary
+        data["user"] = user
+
+    async def post_process(self, callback_query, data, exception):
+        """Post-process the callback query"""
+        pass
+
+
+class AsyncUserInlineQueryMiddleware(AsyncBaseMiddleware):
+    """Middleware to log user inline queries for AsyncTeleBot"""
+
+    def __init__(self, bot: AsyncTeleBot) -> None:
+        """Initialize the middleware."""
+        self.bot = bot
+        self.update_types = ["inline_query"]
+
+    async def pre_process(self, inline_query: InlineQuery, data: dict):
+        """Pre-process the inline query"""
+        user = cached_user(inline_query.from_user) or await load_user_async(data, inline_query.from_user)
+        activity_tracker.touch(user.id)
+
+        # Blocked users get no results
+        if user.is_blocked:
+            await self.bot.answer_inline_query(inline_query.id, [], is_personal=True)
+            return AsyncCancelUpdate()
+
+        logger.debug(f"Inline query of user {user.id}: {inline_query.query!r}, offset {inline_query.offset!r}")
+
+        # Set the user data to the data dictionary
+        data["user"] = user
+
+    async def post_process(self, inline_query, data, exception):
+        """Post-process the inline query"""
+        pass
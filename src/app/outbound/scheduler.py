@@ -0,0 +1,344 @@
+"""Outbound send scheduler: Telegram rate limits and priority lanes for bot API calls."""
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from ..metrics import metrics
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+# Priority lanes, lower is served first
+INTERACTIVE = 0
+BULK = 1
+LANE_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# Bot methods that send or edit messages in a chat, and count against Telegram's limits
+SCHEDULED_METHODS = (
+    "send_message",
+    "send_photo",
+    "send_document",
+    "send_video",
+    "send_animation",
+    "send_audio",
+    "send_voice",
+    "send_video_note",
+    "send_sticker",
+    "send_media_group",
+    "send_location",
+    "send_venue",
+    "send_contact",
+    "send_poll",
+    "send_dice",
+    "copy_message",
+    "forward_message",
+    "edit_message_text",
+    "edit_message_caption",
+    "edit_message_media",
+    "edit_message_reply_markup",
+)
+
+BUCKET_IDLE_SECONDS = 60.0  # Per-chat buckets unused for this long are dropped
+
+_current_lane: ContextVar[int] = ContextVar("outbound_lane", default=INTERACTIVE)
+
+
+@contextmanager
+def send_lane(lane: int):
+    """Send the messages of the enclosed block on another lane, e.g. `with send_lane(BULK):` for broadcasts."""
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def retry_after(exception: Exception) -> Optional[int]:
+    """Return the `retry_after` of a 429 Bot API error, None for other errors."""
+    if getattr(exception, "error_code", None) != 429:
+        return None
+    result_json = getattr(exception, "result_json", None) or {}
+    return int(result_json.get("parameters", {}).get("retry_after", 1))
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `capacity` tokens."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Tokens the bucket holds when full, the burst it allows
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Return the seconds until a token is available."""
+        self._refill(now)
+        pause = max(0.0, self.paused_until - now)
+        if self.tokens >= 1:
+            return pause
+        return max(pause, (1 - self.tokens) / self.rate)
+
+    def take(self, now: float) -> None:
+        """Consume one token."""
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for `seconds`, as asked by a 429 response."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def is_idle(self, now: float) -> bool:
+        """Return True if the bucket is full and was not used recently."""
+        return self.tokens >= self.capacity and now - self.updated > BUCKET_IDLE_SECONDS and now > self.paused_until
+
+
+class _FutureGrant:
+    """Grant of a send awaited on an event loop, set from the dispatcher thread."""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.future = self.loop.create_future()
+
+    def set(self) -> None:
+        self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class _Ticket:
+    """A send waiting for permission."""
+
+    __slots__ = ("chat_id", "lane", "enqueued_at", "granted")
+
+    def __init__(self, chat_id: Any, lane: int, granted: Any = None) -> None:
+        self.chat_id = chat_id
+        self.lane = lane
+        self.enqueued_at = time.monotonic()
+        self.granted = granted if granted is not None else threading.Event()
+
+
+class OutboundScheduler:
+    """
+    Rate limiter for all messages sent by the bot.
+
+    `install(bot)` wraps the send and edit methods of a TeleBot or an
+    AsyncTeleBot on the instance, so handlers keep calling `bot.send_message(...)`
+    unchanged. Each call waits for a token of the global bucket and of the bucket
+    of its chat; a dispatcher thread grants the tokens to interactive sends before
+    bulk ones. The call itself still runs on the caller's thread, or is awaited on
+    the caller's event loop, so the caller gets the result or exception as before.
+    A 429 response pauses the chat for `retry_after` seconds and the call is retried.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        group_rate: float = 20 / 60,
+        max_retries: int = 3,
+    ) -> None:
+        """
+        Args:
+            global_rate: Messages per second over all chats
+            chat_rate: Messages per second in one private chat
+            chat_burst: Messages a chat may receive at once before chat_rate applies
+            group_rate: Messages per second in one group (negative chat id)
+            max_retries: Retries of a call answered with 429
+        """
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.global_bucket = TokenBucket(global_rate, max(1.0, global_rate))
+        self.chat_buckets: dict[Any, TokenBucket] = {}
+        self.lanes: dict[int, deque[_Ticket]] = {lane: deque() for lane in sorted(LANE_NAMES)}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._last_prune = time.monotonic()
+
+        for lane, name in LANE_NAMES.items():
+            metrics.gauge(f"outbound.queue_depth.{name}", self.lanes[lane].__len__)
+
+        self._dispatcher = threading.Thread(target=self._dispatch, name="OutboundScheduler", daemon=True)
+        self._dispatcher.start()
+
+    def install(self, bot: Any) -> Any:
+        """Route the send and edit methods of `bot` through the scheduler."""
+        for name in SCHEDULED_METHODS:
+            method = getattr(bot, name, None)
+            if method is not None:
+                setattr(bot, name, self._wrap(method))
+        logger.info(f"Outbound scheduler installed on {type(bot).__name__}")
+        return bot
+
+    def _wrap(self, method: Callable) -> Callable:
+        signature = inspect.signature(method)
+
+        def chat_id_of(args, kwargs) -> Any:
+            try:
+                return signature.bind_partial(*args, **kwargs).arguments.get("chat_id")
+            except TypeError:
+                return kwargs.get("chat_id")
+
+        if inspect.iscoroutinefunction(method):
+
+            @functools.wraps(method)
+            async def send_async(*args, **kwargs):
+                return await self.call_async(chat_id_of(args, kwargs), method, *args, **kwargs)
+
+            return send_async
+
+        @functools.wraps(method)
+        def send(*args, **kwargs):
+            return self.call(chat_id_of(args, kwargs), method, *args, **kwargs)
+
+        return send
+
+    def call(self, chat_id: Any, method: Callable, *args, **kwargs) -> Any:
+        """Call a bot method once the rate limits allow a message to `chat_id`."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(chat_id)
+            started = time.monotonic()
+            try:
+                result = method(*args, **kwargs)
+            except Exception as e:
+                seconds = retry_after(e)
+                if seconds is None or attempt == self.max_retries:
+                    raise
+                metrics.inc("outbound.retry_after_total")
+                logger.warning(f"Flood limit for chat {chat_id}, retrying in {seconds}s")
+                self.pause(chat_id, seconds)
+                continue
+            finally:
+                metrics.observe("outbound.send_seconds", time.monotonic() - started)
+            metrics.inc("outbound.sent_total")
+            return result
+
+    async def call_async(self, chat_id: Any, method: Callable, *args, **kwargs) -> Any:
+        """Await a coroutine bot method once the rate limits allow a message to `chat_id`."""
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async(chat_id)
+            started = time.monotonic()
+            try:
+                result = await method(*args, **kwargs)
+            except Exception as e:
+                seconds = retry_after(e)
+                if seconds is None or attempt == self.max_retries:
+                    raise
+                metrics.inc("outbound.retry_after_total")
+                logger.warning(f"Flood limit for chat {chat_id}, retrying in {seconds}s")
+                self.pause(chat_id, seconds)
+                continue
+            finally:
+                metrics.observe("outbound.send_seconds", time.monotonic() - started)
+            metrics.inc("outbound.sent_total")
+            return result
+
+    def acquire(self, chat_id: Any) -> None:
+        """Block until a message to `chat_id` may be sent on the current lane."""
+        ticket = _Ticket(chat_id, _current_lane.get())
+        if self._enqueue(ticket):
+            ticket.granted.wait()
+            self._observe_wait(ticket)
+
+    async def acquire_async(self, chat_id: Any) -> None:
+        """Wait without blocking the event loop until a message to `chat_id` may be sent on the current lane."""
+        grant = _FutureGrant()
+        ticket = _Ticket(chat_id, _current_lane.get(), grant)
+        if self._enqueue(ticket):
+            await grant.future
+            self._observe_wait(ticket)
+
+    def _enqueue(self, ticket: _Ticket) -> bool:
+        """Queue a ticket for the dispatcher, return False if the scheduler is closed."""
+        with self._condition:
+            if self._closed:
+                return False
+            self.lanes[ticket.lane].append(ticket)
+            self._condition.notify()
+        return True
+
+    @staticmethod
+    def _observe_wait(ticket: _Ticket) -> None:
+        metrics.observe(f"outbound.wait_seconds.{LANE_NAMES[ticket.lane]}", time.monotonic() - ticket.enqueued_at)
+
+    def pause(self, chat_id: Any, seconds: float) -> None:
+        """Stop sending to a chat (or to all chats if `chat_id` is None) for `seconds`."""
+        with self._condition:
+            bucket = self.global_bucket if chat_id is None else self._chat_bucket(chat_id)
+            bucket.pause(seconds)
+
+    def close(self) -> None:
+        """Stop the dispatcher thread and release all waiting sends."""
+        with self._condition:
+            self._closed = True
+            for lane in self.lanes.values():
+                while lane:
+                    lane.popleft().granted.set()
+            self._condition.notify()
+        self._dispatcher.join()
+
+    def _chat_bucket(self, chat_id: Any) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if isinstance(chat_id, int) and chat_id < 0:
+                bucket = TokenBucket(self.group_rate, 1)
+            else:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _dispatch(self) -> None:
+        with self._condition:
+            while not self._closed:
+                self._condition.wait(self._grant_ready(time.monotonic()))
+
+    def _grant_ready(self, now: float) -> Optional[float]:
+        """Grant every send the buckets allow, and return the seconds until the next one may be granted."""
+        next_wait: Optional[float] = None
+        blocked_chats = set()
+        for lane in self.lanes.values():
+            for ticket in list(lane):
+                global_wait = self.global_bucket.wait_time(now)
+                if global_wait > 0:
+                    return global_wait if next_wait is None else min(next_wait, global_wait)
+                if ticket.chat_id in blocked_chats:
+                    # Keep the order of sends to one chat
+                    continue
+                chat_wait = 0.0 if ticket.chat_id is None else self._chat_bucket(ticket.chat_id).wait_time(now)
+                if chat_wait > 0:
+                    blocked_chats.add(ticket.chat_id)
+                    next_wait = chat_wait if next_wait is None else min(next_wait, chat_wait)
+                    continue
+                self.global_bucket.take(now)
+                if ticket.chat_id is not None:
+                    self.chat_buckets[ticket.chat_id].take(now)
+                lane.remove(ticket)
+                ticket.granted.set()
+
+        if now - self._last_prune > BUCKET_IDLE_SECONDS:
+            self._last_prune = now
+            for chat_id in [chat_id for chat_id, bucket in self.chat_buckets.items() if bucket.is_idle(now)]:
+                del self.chat_buckets[chat_id]
+        return next_wait
@@ -0,0 +1,172 @@
+"""Pooled keep-alive HTTP transport for Bot API calls."""
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from telebot import apihelper, asyncio_helper
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from ..metrics import metrics
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+class PooledTransport:
+    """
+    Request sender for telebot sharing one connection pool between all threads.
+
+    By default telebot keeps a requests session per thread, so every dispatcher
+    thread opens its own TLS connections to api.telegram.org. Installed as
+    `apihelper.CUSTOM_REQUEST_SENDER`, this transport sends all calls through one
+    session whose pool keeps `pool_maxsize` connections alive per host. With
+    `http2=True` it uses an httpx client instead, which multiplexes concurrent
+    calls over a single connection (requires `httpx[http2]`).
+
+    The number of requests and of opened connections is counted, so connection
+    reuse can be checked in the metrics.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 4,
+        pool_maxsize: int = 32,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 30.0,
+        http2: bool = False,
+    ) -> None:
+        """
+        Args:
+            pool_connections: Number of hosts to keep a connection pool for
+            pool_maxsize: Number of keep-alive connections per host
+            connect_timeout: Seconds to wait for a connection
+            read_timeout: Seconds to wait for a response (long polling adds its own timeout)
+            http2: Use HTTP/2 through httpx
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.http2 = http2
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+
+        if http2:
+            try:
+                import httpx
+            except ImportError as e:
+                raise ImportError("HTTP/2 transport requires httpx: pip install 'httpx[http2]'") from e
+            limits = httpx.Limits(
+                max_connections=pool_connections * pool_maxsize, max_keepalive_connections=pool_maxsize
+            )
+            self._client = httpx.Client(http2=True, limits=limits)
+        else:
+            self._client = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+            adapter.poolmanager.pool_classes_by_scheme = {
+                "http": _counting_pool(HTTPConnectionPool, self._on_connection_opened),
+                "https": _counting_pool(HTTPSConnectionPool, self._on_connection_opened),
+            }
+            self._client.mount("http://", adapter)
+            self._client.mount("https://", adapter)
+
+        metrics.gauge("http.connection_reuse_ratio", lambda: self.stats()["reuse_ratio"])
+
+    def install(self) -> "PooledTransport":
+        """Send all telebot API requests through this transport."""
+        apihelper.CONNECT_TIMEOUT = self.connect_timeout
+        apihelper.READ_TIMEOUT = self.read_timeout
+        apihelper.CUSTOM_REQUEST_SENDER = self
+        logger.info(f"Pooled {'HTTP/2' if self.http2 else 'HTTP/1.1'} transport installed")
+        return self
+
+    def __call__(self, method, url, params=None, files=None, timeout=None, proxies=None) -> Any:
+        """Send one request the way telebot's apihelper would."""
+        connect_timeout, read_timeout = timeout or (self.connect_timeout, self.read_timeout)
+        started = time.monotonic()
+        try:
+            if self.http2:
+                import httpx
+
+                if proxies:
+                    raise ValueError("The HTTP/2 transport does not support apihelper.proxy, disable HTTP2_ENABLED")
+                response = self._client.request(
+                    method.upper(),
+                    url,
+                    params=params,
+                    files=files,
+                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                    extensions={"trace": self._trace},
+                )
+                return _HttpxResponse(response)
+            return self._client.request(
+                method, url, params=params, files=files, timeout=(connect_timeout, read_timeout), proxies=proxies
+            )
+        finally:
+            with self._lock:
+                self.requests += 1
+            metrics.inc("http.requests_total")
+            metrics.observe("http.request_seconds", time.monotonic() - started)
+
+    def _on_connection_opened(self) -> None:
+        with self._lock:
+            self.connections_opened += 1
+        metrics.inc("http.connections_opened_total")
+
+    def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self._on_connection_opened()
+
+    def stats(self) -> dict:
+        """Return request and connection counts, and the share of requests sent on a reused connection."""
+        with self._lock:
+            requests_sent, opened = self.requests, self.connections_opened
+        reused = max(0, requests_sent - opened)
+        return {
+            "requests": requests_sent,
+            "connections_opened": opened,
+            "reused": reused,
+            "reuse_ratio": reused / requests_sent if requests_sent else 0.0,
+        }
+
+    def close(self) -> None:
+        """Close the pooled connections and restore telebot's default sender."""
+        if apihelper.CUSTOM_REQUEST_SENDER is self:
+            apihelper.CUSTOM_REQUEST_SENDER = None
+        self._client.close()
+
+
+class _HttpxResponse:
+    """httpx response with the `reason` of a requests response, which telebot's API errors read."""
+
+    def __init__(self, response) -> None:
+        self._response = response
+
+    @property
+    def reason(self) -> str:
+        return self._response.reason_phrase
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+
+def _counting_pool(pool_class: type, on_connection_opened) -> type:
+    """Subclass a urllib3 connection pool to report every new connection."""
+
+    class CountingPool(pool_class):
+        def _new_conn(self):
+            on_connection_opened()
+            return super()._new_conn()
+
+    CountingPool.__name__ = f"Counting{pool_class.__name__}"
+    return CountingPool
+
+
+def configure_async_transport(pool_maxsize: int = 32, read_timeout: Optional[float] = None) -> None:
+    """Apply the pool size and timeout to AsyncTeleBot's aiohttp session."""
+    asyncio_helper.REQUEST_LIMIT = pool_maxsize
+    if read_timeout is not None:
+        asyncio_helper.REQUEST_TIMEOUT = read_timeout
@@ -0,0 +1,61 @@
+"""Deferred construction of heavy plugin clients."""
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+class LazyObject:
+    """
+    Proxy that builds the wrapped object on first attribute access.
+
+    Plugin handler modules are imported at startup only to register their routes.
+    Their clients (and the heavy libraries behind them) are created by `factory`,
+    which should import those libraries itself, the first time a handler uses them.
+    """
+
+    def __init__(self, factory: Callable[[], Any], name: Optional[str] = None) -> None:
+        """
+        Args:
+            factory: Callable importing the dependencies and building the object
+            name: Name used in logs, defaults to the factory's name
+        """
+        self._factory = factory
+        self._name = name or getattr(factory, "__name__", "object")
+        self._instance: Any = None
+        self._callbacks: list[Callable[[Any], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Return True if the object was built."""
+        return self._instance is not None
+
+    def on_load(self, callback: Callable[[Any], None]) -> None:
+        """Call `callback` with the object once it is built."""
+        with self._lock:
+            if self._instance is None:
+                self._callbacks.append(callback)
+                return
+        callback(self._instance)
+
+    def get(self) -> Any:
+        """Build the object if needed and return it."""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    started = time.perf_counter()
+                    instance = self._factory()
+                    for callback in self._callbacks:
+                        callback(instance)
+                    self._instance = instance
+                    logger.info(f"Loaded {self._name} on first use in {time.perf_counter() - started:.2f}s")
+        return self._instance
+
+    def __getattr__(self, name: str) -> Any:
+        """Build the object if needed and return its attribute `name`."""
+        return getattr(self.get(), name)
@@ -1,6 +1,7 @@
-from typing import Dict, List, Optional, Type
+import asyncio
+from typing import Any, Dict, List, Optional, Type
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from PIL.Image import Image
 from pydantic import BaseModel
 
@@ -16,6 +17,7 @@ class OpenAiClient:
     def __init__(self, config: ModelConfig):
         self.config = config
         self.client = OpenAI()
+        self.async_client = AsyncOpenAI()
         print(f"Initialized OpenAiClient with model {config.model_name} and provider {config.provider}")
 
     def _build_messages(self, system_prompt: str, user_text: Optional[str], image: Optional[Image]) -> list[dict]:
@@ -81,33 +83,70 @@ class OpenAiClient:
         Returns plain text.
         """
         cfg = config or self.config
-        if messages is not None:
-            input_messages = self._history_to_messages(system_prompt, messages, image=image)
-        else:
-            input_messages = self._build_messages(system_prompt, user_text, image)
-
+        input_messages = self._input_messages(system_prompt, user_text, messages, image)
         try:
             response = self.client.responses.create(
                 model=cfg.model_name,
                 input=input_messages,
                 temperature=cfg.temperature,
             )
-            # Prefer the convenience field if present
-            text = getattr(response, "output_text", None)
-            if isinstance(text, str) and text.strip():
-                return text
-
-            # Fallback extraction if SDK version doesn't expose output_text
-            try:
-                # response.output is a list of items; each has content with type 'output_text'
-                parts = []
-                for item in getattr(response, "output", []) or []:
-                    for c in getattr(item, "content", []) or []:
-                        if getattr(c, "type", None) == "output_text" and getattr(c, "text", None):
-                            parts.append(c.text)
-                return "\n".join(parts).strip()
-            except Exception:
-                return ""
+        except Exception:
+            return ""
+        return self._output_text(response)
+
+    async def chat_async(
+        self,
+        system_prompt: str,
+        user_text: Optional[str] = None,
+        *,
+        messages: Optional[List[Dict[str, str]]] = None,
+        image: Optional[Image] = None,
+        config: Optional[ModelConfig] = None,
+    ) -> str:
+        """Like chat(), awaiting the reply on the event loop instead of blocking a thread."""
+        cfg = config or self.config
+        if image is not None:
+            # Encoding the image is CPU work
+            input_messages = await asyncio.to_thread(self._input_messages, system_prompt, user_text, messages, image)
+        else:
+            input_messages = self._input_messages(system_prompt, user_text, messages, image)
+        try:
+            response = await self.async_client.responses.create(
+                model=cfg.model_name,
+                input=input_messages,
+                temperature=cfg.temperature,
+            )
+        except Exception:
+            return ""
+        return self._output_text(response)
+
+    def _input_messages(
+        self,
+        system_prompt: str,
+        user_text: Optional[str],
+        messages: Optional[List[Dict[str, str]]],
+        image: Optional[Image],
+    ) -> List[Dict]:
+        if messages is not None:
+            return self._history_to_messages(system_prompt, messages, image=image)
+        return self._build_messages(system_prompt, user_text, image)
+
+    @staticmethod
+    def _output_text(response: Any) -> str:
+        # Prefer the convenience field if present
+        text = getattr(response, "output_text", None)
+        if isinstance(text, str) and text.strip():
+            return text
+
+        # Fallback extraction if SDK version doesn't expose output_text
+        try:
+            # response.output is a list of items; each has content with type 'output_text'
+            parts = []
+            for item in getattr(response, "output", []) or []:
+                for c in getattr(item, "content", []) or []:
+                    if getattr(c, "type", None) == "output_text" and getattr(c, "text", None):
+                        parts.append(c.text)
+            return "\n".join(parts).strip()
         except Exception:
             return ""
 
@@ -1,17 +1,17 @@
 import logging
 import random
 from datetime import datetime, timedelta
-from pathlib import Path
 from typing import Any
 
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.date import DateTrigger
-from omegaconf import OmegaConf
-from telebot import TeleBot
+from telebot import TeleBot, util
+from telebot.states import State, StatesGroup
 from telebot.types import CallbackQuery, Message
 
 from ..admin.markup import create_admin_menu_markup
+from ..catalog import catalog
 from ..markup import create_cancel_button
 from ..users.service import read_users
 from .markup import create_keyboard_markup
@@ -21,9 +21,8 @@ from .service import (
 )
 
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-strings = config.strings
+config = catalog.config("public_message")
+strings = catalog.strings("public_message")
 
 # Define timezone
 timezone = pytz.timezone(config.app.timezone)
@@ -43,6 +42,13 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
 
+class PublicMessageState(StatesGroup):
+    """States for scheduling a public message."""
+
+    datetime_input = State()  # Entering the send date and time
+    message_content = State()  # Entering the message to send
+
+
 def register_handlers(bot: TeleBot):
     """Register public message handlers"""
     logger.info("Registering `public message` handlers")
@@ -81,7 +87,7 @@ def register_handlers(bot: TeleBot):
         user = data["user"]
 
         # Replace the message with the menu
-        sent_message = bot.edit_message_text(
+        bot.edit_message_text(
             strings[user.lang].enter_datetime_prompt.format(
                 timezone=config.app.timezone,
                 datetime_example=datetime.now(timezone).strftime("%Y-%m-%d %H:%M"),
@@ -92,22 +98,24 @@ def register_handlers(bot: TeleBot):
             parse_mode="Markdown",
         )
 
-        bot.register_next_step_handler(sent_message, get_datetime_input, bot, data)
+        # States work with both TeleBot and AsyncTeleBot, unlike next step handlers
+        data["state"].set(PublicMessageState.datetime_input)
 
     @bot.callback_query_handler(func=lambda call: call.data == "list_scheduled_messages")
     def list_scheduled_messages_handler(call: CallbackQuery, data: dict):
         user = data["user"]
         list_scheduled_messages(bot, user, scheduled_messages)
 
-    def get_datetime_input(message: Message, bot: TeleBot, data: dict):
+    @bot.message_handler(state=PublicMessageState.datetime_input)
+    def get_datetime_input(message: Message, data: dict):
         user = data["user"]
         try:
             user_datetime = datetime.strptime(message.text, "%Y-%m-%d %H:%M")
             user_datetime_localized = timezone.localize(user_datetime)
 
             if user_datetime_localized < datetime.now(timezone):
-                sent_message = bot.send_message(user.id, strings[user.lang].past_datetime_error)
-                sent_message = bot.send_message(
+                bot.send_message(user.id, strings[user.lang].past_datetime_error)
+                bot.send_message(
                     message.chat.id,
                     strings[user.lang].enter_datetime_prompt.format(
                         timezone=config.app.timezone,
@@ -116,21 +124,29 @@ def register_handlers(bot: TeleBot):
                     reply_markup=create_cancel_button(user.lang),
                     parse_mode="Markdown",
                 )
-                bot.register_next_step_handler(sent_message, get_datetime_input, bot, data)
                 return
 
             user_data[user.id] = {"datetime": user_datetime_localized}
-            sent_message = bot.send_message(user.id, strings[user.lang].record_message_prompt)
-            bot.register_next_step_handler(sent_message, get_message_content, bot, data, user_data, scheduler)
+            bot.send_message(user.id, strings[user.lang].record_message_prompt)
+            data["state"].set(PublicMessageState.message_content)
 
-        except ValueError:
-            sent_message = bot.send_message(user.id, strings[user.lang].invalid_datetime_format)
-            sent_message = bot.send_message(
+        except (TypeError, ValueError):
+            bot.send_message(user.id, strings[user.lang].invalid_datetime_format)
+            bot.send_message(
                 message.chat.id,
-                strings[user.lang].enter_datetime_prompt.format(timezone=config.app.timezone),
+                strings[user.lang].enter_datetime_prompt.format(
+                    timezone=config.app.timezone,
+                    datetime_example=datetime.now(timezone).strftime("%Y-%m-%d %H:%M"),
+                ),
                 reply_markup=create_cancel_button(user.lang),
+                parse_mode="Markdown",
             )
-            bot.register_next_step_handler(sent_message, get_datetime_input, bot, data)
+
+    # Any content, as the next step handler this state replaces
+    @bot.message_handler(state=PublicMessageState.message_content, content_types=util.content_type_media)
+    def get_message_content_handler(message: Message, data: dict):
+        data["state"].delete()
+        get_message_content(message, bot, data, user_data, scheduler)
 
 
 def get_message_content(
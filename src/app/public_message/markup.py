@@ -1,14 +1,13 @@
-from pathlib import Path
-
-from omegaconf import OmegaConf
 from telebot.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from ..catalog import catalog
+from ..markup_cache import cached_markup
+
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-strings = config.strings
+strings = catalog.strings("public_message")
 
 
+@cached_markup
 def create_keyboard_markup(lang: str) -> InlineKeyboardMarkup:
     """Create an InlineKeyboardMarkup object for the public message menu"""
     keyboard_markup = InlineKeyboardMarkup()
@@ -1,17 +1,15 @@
 import logging
-from pathlib import Path
 from typing import Optional
 
-from omegaconf import OmegaConf
 from telebot import TeleBot
 from telebot.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from ..catalog import catalog
+from ..outbound.scheduler import BULK, send_lane
 from ..users.models import User
 
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-strings = config.strings
+strings = catalog.strings("public_message")
 
 # Logging
 # Set up logging
@@ -45,16 +43,18 @@ def send_scheduled_message(
     message_photo: Optional[str] = None,
 ):
     """Send a scheduled message to a user"""
-    if media_type == "text":
-        print(f"Sending scheduled message: {message_text}")
-        bot.send_message(user_id, message_text)
-    if media_type == "photo":
-        bot.send_photo(
-            chat_id=user_id,
-            caption=message_text or "",
-            photo=message_photo,
-            disable_notification=False,
-        )
+    # Broadcasts yield to interactive replies in the outbound scheduler
+    with send_lane(BULK):
+        if media_type == "text":
+            print(f"Sending scheduled message: {message_text}")
+            bot.send_message(user_id, message_text)
+        if media_type == "photo":
+            bot.send_photo(
+                chat_id=user_id,
+                caption=message_text or "",
+                photo=message_photo,
+                disable_notification=False,
+            )
 
 
 def list_scheduled_messages(bot: TeleBot, user: User, scheduled_messages: dict[str, dict]):
@@ -0,0 +1,158 @@
+"""Process-wide cache of the reference tables (roles, item categories) read on hot paths."""
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from .config import settings
+from .database.core import SessionLocal
+from .metrics import metrics
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+class ReferenceCache:
+    """
+    Copies of the rows of small, rarely written tables, loaded at startup.
+
+    The rows are detached copies ordered by primary key, shared between
+    threads: read their columns, do not change them or add them to a session
+    (set foreign keys to their ids instead). A commit writing to a
+    registered table through the ORM in this process drops its rows, which are
+    read again on next use; writes of other processes show after `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float = 300.0, session_factory: Callable[[], Session] = SessionLocal) -> None:
+        """
+        Args:
+            ttl: Seconds the rows are trusted, 0 reads the table on every use
+            session_factory: Callable returning a new database session, used when the caller gives none
+        """
+        self.ttl = ttl
+        self.session_factory = session_factory
+        self._models: dict[str, type] = {}
+        # Table name -> (rows, rows by primary key, expiry)
+        self._tables: dict[str, tuple[tuple, dict, float]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, model: type) -> type:
+        """Cache the rows of `model`, whose primary key is one column."""
+        self._models[model.__tablename__] = model
+        return model
+
+    def is_registered(self, table_name: str) -> bool:
+        """Return True if the rows of `table_name` are cached."""
+        return table_name in self._models
+
+    def rows(self, model: type, db_session: Optional[Session] = None) -> tuple:
+        """Return all rows of `model`, read with `db_session` or a new session if they are not cached."""
+        return self._entry(model, db_session)[0]
+
+    async def rows_async(self, model: type, db_session: AsyncSession) -> tuple:
+        """Return all rows of `model`, read with the AsyncSession `db_session` if they are not cached."""
+        rows = self.cached(model)
+        if rows is None:
+            statement = select(model).order_by(*model.__mapper__.primary_key)
+            rows = self.put(model, (await db_session.scalars(statement)).all())
+        return rows
+
+    def get(self, model: type, row_id, db_session: Optional[Session] = None):
+        """Return the row of `model` with primary key `row_id`, or None."""
+        # The entry read, the table may be invalidated meanwhile
+        return self._entry(model, db_session)[1].get(row_id)
+
+    def load(self, db_session: Optional[Session] = None) -> None:
+        """Read the rows of all registered tables, e.g. at startup."""
+        for model in self._models.values():
+            self._load(model, db_session)
+
+    def put(self, model: type, rows: list) -> tuple:
+        """Store copies of the loaded `rows` of `model` and return them, for callers reading without `rows()`."""
+        return self._put(model, rows)[0]
+
+    def cached(self, model: type) -> Optional[tuple]:
+        """Return the cached rows of `model`, or None if they must be read."""
+        entry = self._tables.get(model.__tablename__)
+        return entry[0] if entry is not None and entry[2] > time.monotonic() else None
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        """Drop the rows of `table_name`, of all tables if not given."""
+        with self._lock:
+            if table_name is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(table_name, None)
+
+    def _entry(self, model: type, db_session: Optional[Session]) -> tuple:
+        entry = self._tables.get(model.__tablename__)
+        if entry is None or entry[2] <= time.monotonic():
+            entry = self._load(model, db_session)
+        return entry
+
+    def _put(self, model: type, rows: list) -> tuple:
+        copies = tuple(self._copy(row) for row in rows)
+        by_id = {row.__mapper__.primary_key_from_instance(row)[0]: row for row in copies}
+        entry = (copies, by_id, time.monotonic() + self.ttl)
+        with self._lock:
+            self._tables[model.__tablename__] = entry
+        metrics.inc("reference_cache.loads_total")
+        return entry
+
+    def _load(self, model: type, db_session: Optional[Session]) -> tuple:
+        statement = select(model).order_by(*model.__mapper__.primary_key)
+        if db_session is None:
+            with self.session_factory() as session:
+                rows = session.scalars(statement).all()
+        else:
+            rows = db_session.scalars(statement).all()
+        return self._put(model, rows)
+
+    @staticmethod
+    def _copy(row):
+        # A detached instance with the same identity: never inserted if added to a session
+        mapper = row.__mapper__
+        copy = mapper.class_(**{attribute.key: getattr(row, attribute.key) for attribute in mapper.column_attrs})
+        make_transient_to_detached(copy)
+        return copy
+
+
+reference_cache = ReferenceCache(ttl=settings.REFERENCE_CACHE_TTL)
+
+
+def _written_tables(session: Session) -> set:
+    return session.info.setdefault("reference_tables_written", set())
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_rows(session, flush_context) -> None:
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        table_name = getattr(instance, "__tablename__", None)
+        if table_name is not None and reference_cache.is_registered(table_name):
+            _written_tables(session).add(table_name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_writes(orm_execute_state) -> None:
+    # INSERT/UPDATE/DELETE statements, such as the upserts seeding the reference data
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and reference_cache.is_registered(table.name):
+            _written_tables(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_tables(session) -> None:
+    for table_name in session.info.pop("reference_tables_written", ()):
+        logger.info(f"Reference table {table_name} changed, its cached rows are dropped")
+        reference_cache.invalidate(table_name)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_written_tables(session, previous_transaction) -> None:
+    session.info.pop("reference_tables_written", None)
@@ -0,0 +1,150 @@
+"""Cold-start report: import time and resident memory per module."""
+import importlib
+import importlib.abc
+import os
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+# Optional plugin dependencies that should only be imported on first use
+HEAVY_MODULES = ("markitdown", "PIL", "openai", "langchain_openai", "langchain_fireworks", "pandas", "gspread", "yt_dlp")
+TOP_MODULES = 30
+
+
+def current_rss_kb() -> int:
+    """Return the resident set size of this process in KB."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        # Not Linux: fall back to the peak RSS
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+
+@dataclass
+class ModuleImport:
+    """Measurements of one module import."""
+
+    name: str
+    cumulative: float  # Seconds, including the modules it imported
+    self_time: float  # Seconds, excluding the modules it imported
+    rss_kb: int  # RSS growth during the import, including the modules it imported
+
+
+class _TimedLoader:
+    """Loader proxy measuring `exec_module` of the wrapped loader."""
+
+    def __init__(self, loader, profiler: "ImportProfiler") -> None:
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        self._profiler.exec_module(self._loader, module)
+
+    def __getattr__(self, name: str):
+        return getattr(self._loader, name)
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """Meta path finder recording the import time and RSS growth of every module loaded after `install()`."""
+
+    def __init__(self) -> None:
+        """Initialize the profiler, which measures nothing until installed."""
+        self.imports: dict[str, ModuleImport] = {}
+        self._local = threading.local()
+
+    def install(self) -> "ImportProfiler":
+        """Start measuring imports."""
+        sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self) -> None:
+        """Stop measuring imports."""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        """Find the module with the other finders and wrap its loader."""
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def exec_module(self, loader, module) -> None:
+        """Execute a module with `loader` and record the measurements."""
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        rss_before = current_rss_kb()
+        started = time.perf_counter()
+        try:
+            loader.exec_module(module)
+        finally:
+            cumulative = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            self.imports[module.__name__] = ModuleImport(
+                module.__name__, cumulative, cumulative - children, current_rss_kb() - rss_before
+            )
+
+    def slowest(self, count: int = TOP_MODULES) -> list[ModuleImport]:
+        """Return the imports with the highest cumulative time."""
+        return sorted(self.imports.values(), key=lambda item: item.cumulative, reverse=True)[:count]
+
+
+def format_report(phases: list[tuple[str, float, int]], profiler: ImportProfiler) -> str:
+    """Format phase timings, the slowest imports and the state of the heavy plugin dependencies."""
+    lines = [f"{'phase':<40}{'time ms':>10}{'RSS MB':>10}"]
+    for name, seconds, rss_kb in phases:
+        lines.append(f"{name:<40}{seconds * 1000:>10.1f}{rss_kb / 1024:>10.1f}")
+
+    lines += ["", f"{'module':<50}{'cum ms':>10}{'self ms':>10}{'RSS +KB':>10}"]
+    for item in profiler.slowest():
+        lines.append(f"{item.name:<50}{item.cumulative * 1000:>10.1f}{item.self_time * 1000:>10.1f}{item.rss_kb:>10}")
+
+    lines += ["", f"{len(profiler.imports)} modules imported"]
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    deferred = [name for name in HEAVY_MODULES if name not in sys.modules]
+    lines.append(f"Heavy plugin dependencies loaded at startup: {', '.join(loaded) or 'none'}")
+    lines.append(f"Deferred to first use or not installed: {', '.join(deferred) or 'none'}")
+    return "\n".join(lines)
+
+
+def profile_startup(module_name: str) -> str:
+    """Import the entry point `module_name`, build the bot as `start_bot` would and return the report."""
+    phases = [("interpreter", 0.0, current_rss_kb())]
+    profiler = ImportProfiler().install()
+
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    phases.append((f"import {module_name}", time.perf_counter() - started, current_rss_kb()))
+
+    started = time.perf_counter()
+    module.create_sync_bot(own_worker_pool=False)
+    phases.append(("create bot, middlewares and handlers", time.perf_counter() - started, current_rss_kb()))
+
+    profiler.uninstall()
+    return format_report(phases, profiler)
+
+
+def run_startup_report(module_name: str) -> int:
+    """Print the startup report of `module_name`, measured in a fresh interpreter."""
+    return subprocess.call([sys.executable, "-m", __spec__.name, module_name])  # noqa: S603
+
+
+if __name__ == "__main__":
+    print(profile_startup(sys.argv[1]))
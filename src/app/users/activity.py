@@ -0,0 +1,126 @@
+"""Write-behind tracking of the users' last activity."""
+import logging
+import threading
+import time
+from datetime import datetime
+from multiprocessing import util
+from typing import Callable, Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database.core import SessionLocal
+from ..metrics import metrics
+from .models import User
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+class ActivityTracker:
+    """
+    Collects `last_message_timestamp` of active users in memory and writes them in bulk.
+
+    Writing the timestamp on every update costs a row write per click. The tracker
+    keeps the latest timestamp per user and a background thread writes them every
+    `flush_interval` seconds with one executemany UPDATE. When `max_pending` users
+    are waiting a flush starts at once; beyond twice that, new timestamps are dropped
+    until it completes. Pending timestamps are written when the process exits.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        flush_interval: float = 5.0,
+        max_pending: int = 10000,
+    ) -> None:
+        """
+        Args:
+            session_factory: Callable returning a new database session
+            flush_interval: Seconds between two writes
+            max_pending: Number of users waiting for the write before a flush is forced
+        """
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        metrics.gauge("users.activity_pending", lambda: len(self._pending))
+
+    def touch(self, user_id: int, seen_at: Optional[datetime] = None) -> None:
+        """Record activity of `user_id`, written at the next flush."""
+        seen_at = seen_at or datetime.now()
+        with self._lock:
+            if len(self._pending) >= 2 * self.max_pending and user_id not in self._pending:
+                metrics.inc("users.activity_dropped_total")
+                return
+            self._pending[user_id] = max(seen_at, self._pending.get(user_id, seen_at))
+            full = len(self._pending) >= self.max_pending
+            if self._thread is None:
+                self._start()
+        if full:
+            self._wakeup.set()
+
+    def _start(self) -> None:
+        self._thread = threading.Thread(target=self._flush_loop, name="activity-flush", daemon=True)
+        self._thread.start()
+        # Runs at exit in the main process and in multiprocessing workers, which skip atexit handlers.
+        # On SIGTERM only if a handler turns it into an exit, as start_bot and the supervisor's workers do
+        util.Finalize(self, self.stop, exitpriority=10)
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Write the pending timestamps with one bulk UPDATE and return the number of users written."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            table = User.__table__
+            statement = (
+                update(table)
+                .where(table.c.id == bindparam("user_id"))
+                .values(last_message_timestamp=bindparam("seen_at"))
+            )
+            started = time.perf_counter()
+            try:
+                with self.session_factory() as session:
+                    session.execute(
+                        statement, [{"user_id": user_id, "seen_at": seen_at} for user_id, seen_at in pending.items()]
+                    )
+                    session.commit()
+            except Exception as e:
+                logger.error(f"Error writing the activity of {len(pending)} users: {e}")
+                with self._lock:
+                    # Retry at the next flush, keeping newer timestamps recorded meanwhile
+                    for user_id, seen_at in pending.items():
+                        self._pending[user_id] = max(seen_at, self._pending.get(user_id, seen_at))
+                return 0
+            metrics.observe("users.activity_flush_seconds", time.perf_counter() - started)
+            metrics.inc("users.activity_written_total", len(pending))
+            return len(pending)
+
+    def stop(self) -> None:
+        """Stop the background thread and write the pending timestamps."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+
+activity_tracker = ActivityTracker(
+    flush_interval=settings.ACTIVITY_FLUSH_INTERVAL, max_pending=settings.ACTIVITY_MAX_PENDING
+)
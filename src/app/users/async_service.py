@@ -0,0 +1,161 @@
+"""AsyncSession variants of the functions of `users.service`."""
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..reference_cache import reference_cache
+from .cache import user_cache
+from .models import Role, User
+from .service import upsert_statement
+
+# Set up logging
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+async def read_user(db_session: AsyncSession, user_id: Optional[int] = None, username: Optional[str] = None) -> User:
+    """Read user by user_id or username"""
+    if user_id is not None:
+        statement = select(User).where(User.id == user_id)
+    elif username is not None:
+        statement = select(User).where(User.username == username)
+    else:
+        raise ValueError("Either user_id or username must be provided")
+    return (await db_session.scalars(statement.limit(1))).first()
+
+
+async def read_role(db_session: AsyncSession, role_id: int) -> Optional[Role]:
+    """Read a role by id, from the reference cache"""
+    roles = await reference_cache.rows_async(Role, db_session)
+    return next((role for role in roles if role.id == role_id), None)
+
+
+async def read_roles(db_session: AsyncSession) -> list[Role]:
+    """Read all roles, from the reference cache"""
+    return list(await reference_cache.rows_async(Role, db_session))
+
+
+async def read_users(db_session: AsyncSession, user_ids: Optional[list[int]] = None) -> list[User]:
+    """Read users by user_ids"""
+    statement = select(User)
+    if user_ids:
+        statement = statement.where(User.id.in_(user_ids))
+    return list((await db_session.scalars(statement)).all())
+
+
+async def create_user(
+    db_session: AsyncSession,
+    user_id: int,
+    username: Optional[str] = None,
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+    phone_number: Optional[str] = None,
+    lang: Optional[str] = None,
+    role_id: Optional[int] = 1,
+    is_blocked: Optional[bool] = False,
+) -> User:
+    """Create a new user, see `users.service.create_user`."""
+    db_session.expire_on_commit = False
+
+    try:
+        user = User(
+            id=user_id,
+            username=username,
+            first_name=first_name,
+            last_name=last_name,
+            first_message_timestamp=datetime.now(),
+            last_message_timestamp=datetime.now(),
+            phone_number=phone_number,
+            lang=lang,
+            role_id=role_id,
+            is_blocked=is_blocked,
+        )
+        db_session.add(user)
+        await db_session.commit()
+    except Exception as e:
+        await db_session.rollback()
+        logger.error(f"Error adding user with name {username}: {e}")
+        raise
+    finally:
+        await db_session.close()
+    return user
+
+
+async def update_user(
+    db_session: AsyncSession,
+    user_id: int,
+    username: Optional[str] = None,
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+    phone_number: Optional[str] = None,
+    lang: Optional[str] = None,
+    role_id: Optional[int] = None,
+    is_blocked: Optional[bool] = None,
+) -> User:
+    """Update an existing user, see `users.service.update_user`."""
+    db_session.expire_on_commit = False
+    values = {
+        "username": username,
+        "first_name": first_name,
+        "last_name": last_name,
+        "phone_number": phone_number,
+        "lang": lang,
+        "role_id": role_id,
+        "is_blocked": is_blocked,
+    }
+    try:
+        user = await db_session.get(User, int(user_id))
+        if user:
+            for name, value in values.items():
+                if value is not None:
+                    setattr(user, name, value)
+            await db_session.commit()
+            # Admin actions and language changes must not be hidden by the middleware cache
+            user_cache.invalidate(user_id)
+        else:
+            logger.error(f"User with ID {user_id} not found.")
+            raise ValueError(f"User with ID {user_id} not found.")
+    except Exception as e:
+        await db_session.rollback()
+        logger.error(f"Error updating user with ID {user_id}: {e}")
+        raise
+    finally:
+        await db_session.close()
+    return user
+
+
+async def upsert_user(
+    db_session: AsyncSession,
+    user_id: int,
+    username: Optional[str] = None,
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+    lang: Optional[str] = None,
+    role_id: Optional[int] = None,
+    is_blocked: Optional[bool] = None,
+) -> User:
+    """Insert or update a user with one statement, see `users.service.upsert_user`."""
+    statement, params = upsert_statement(
+        db_session.get_bind().dialect.name,
+        user_id,
+        username=username,
+        first_name=first_name,
+        last_name=last_name,
+        lang=lang,
+        role_id=role_id,
+        is_blocked=is_blocked,
+    )
+    try:
+        user = (
+            await db_session.scalars(statement, params, execution_options={"populate_existing": True})
+        ).one()
+    except Exception as e:
+        await db_session.rollback()
+        logger.error(f"Error upserting user with ID {user_id}: {e}")
+        raise
+    # Admin actions must not be hidden by the middleware cache
+    user_cache.invalidate(user.id)
+    return user
@@ -0,0 +1,118 @@
+"""In-process TTL/LRU cache of user records read by the user middlewares."""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Callable, Optional
+
+from ..config import settings
+from ..metrics import metrics
+from .models import User
+
+
+@dataclass(frozen=True)
+class UserIdentity:
+    """Read-only copy of a user record, safe to share between threads and sessions."""
+
+    id: int
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    phone_number: Optional[str] = None
+    lang: Optional[str] = None
+    role_id: Optional[int] = None
+    is_blocked: Optional[bool] = None
+    first_message_timestamp: Optional[datetime] = None
+    last_message_timestamp: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserIdentity":
+        """Copy the columns of a loaded `User`."""
+        return cls(**{field.name: getattr(user, field.name) for field in fields(cls)})
+
+    def matches(self, from_user) -> bool:
+        """Return True if the Telegram profile of `from_user` is the one stored."""
+        return (self.username, self.first_name, self.last_name) == (
+            from_user.username,
+            from_user.first_name,
+            from_user.last_name,
+        )
+
+
+class UserCache:
+    """
+    Identity cache letting the user middlewares skip the upsert of known users.
+
+    Entries expire after `ttl` seconds, so changes made by another process are
+    picked up within that time. Changes made through `update_user` invalidate
+    the entry at once in this process, and in the other processes told by the
+    `on_invalidate` listeners (the supervisor's workers).
+    """
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 10000) -> None:
+        """
+        Args:
+            ttl: Seconds an entry is trusted, 0 disables the cache
+            maxsize: Number of users kept, the least recently seen are dropped
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._users: OrderedDict[int, tuple[UserIdentity, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._listeners: list[Callable[[int], None]] = []
+        self.hits = 0
+        self.misses = 0
+        metrics.gauge("users.cache_hit_ratio", self.hit_ratio)
+        metrics.gauge("users.cache_size", lambda: len(self._users))
+
+    def get(self, user_id: int) -> Optional[UserIdentity]:
+        """Return the cached user, or None if it is missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._users.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._users[user_id]
+            self.misses += 1
+        return None
+
+    def put(self, user: User) -> UserIdentity:
+        """Store a copy of `user` and return it."""
+        identity = user if isinstance(user, UserIdentity) else UserIdentity.from_user(user)
+        if self.ttl <= 0:
+            return identity
+        with self._lock:
+            self._users[identity.id] = (identity, time.monotonic() + self.ttl)
+            self._users.move_to_end(identity.id)
+            if len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+        return identity
+
+    def invalidate(self, user_id: int, propagate: bool = True) -> None:
+        """Drop the cached record of `user_id`, and tell the listeners unless `propagate` is False."""
+        with self._lock:
+            self._users.pop(int(user_id), None)
+        if propagate:
+            for callback in self._listeners:
+                callback(int(user_id))
+
+    def on_invalidate(self, callback: Callable[[int], None]) -> None:
+        """Call `callback` with the user id after every invalidation made in this process."""
+        self._listeners.append(callback)
+
+    def clear(self) -> None:
+        """Drop all cached records."""
+        with self._lock:
+            self._users.clear()
+
+    def hit_ratio(self) -> float:
+        """Return the share of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+user_cache = UserCache(ttl=settings.USER_CACHE_TTL, maxsize=settings.USER_CACHE_SIZE)
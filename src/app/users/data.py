@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 
+from ..database.core import upsert_rows
 from ..users.models import Role
 from .service import upsert_user
 
@@ -12,11 +13,8 @@ def init_roles_table(db_session: Session):
         {"id": 2, "name": "user", "description": "User"},
     ]
 
-    # Add and commit data
-    for system_role_data in system_roles_data:
-        system_role = Role(**system_role_data)
-        db_session.add(system_role)
-
+    # Insert or update in one statement, seeding again is a no-op
+    upsert_rows(db_session, Role, system_roles_data)
     db_session.commit()
 
 
@@ -1,25 +1,22 @@
 """Handler to show information about the application configuration."""
 import logging
-import os
-from datetime import datetime
-from pathlib import Path
 
 from omegaconf import OmegaConf
 from telebot.states import State, StatesGroup
 from telebot.types import CallbackQuery, Message
 
-from ..database.core import export_all_tables
+from ..admin.export import start_export
+from ..catalog import catalog
 from .markup import create_cancel_button, create_users_menu_markup
-from .service import read_user, upsert_user
+from .service import read_role, read_user, upsert_user
 
 # Set up logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-app_strings = config.strings
+config = catalog.config("users")
+app_strings = catalog.strings("users")
 
 
 # States
@@ -74,15 +71,13 @@ def register_handlers(bot):
                 return
 
         # Send the user data
-        format_message = (
-            f"id: `{retrieved_user.id}`\nusername: `{retrieved_user.username}`\nrole: `{retrieved_user.role.name}`"
-        )
+        role = read_role(db_session, retrieved_user.role_id)
         format_message = app_strings[user.lang].user_info_template.format(
             user_id=retrieved_user.id,
             username=retrieved_user.username,
             first_name=retrieved_user.first_name,
             last_name=retrieved_user.last_name,
-            role=retrieved_user.role.name,
+            role=role.name if role else retrieved_user.role_id,
             is_blocked=retrieved_user.is_blocked,
         )
 
@@ -151,17 +146,5 @@ def register_handlers(bot):
             bot.send_message(call.from_user.id, app_strings[user.lang].no_rights[user.lang])
             return
 
-        # Export data
-        export_dir = f'./data/{datetime.now().strftime("%Y%m%d_%H%M%S")}'
-        os.makedirs(export_dir)
-        try:
-            export_all_tables(export_dir)
-            for table in config.db.tables:
-                # save as excel in temp folder and send to a user
-                filename = f"{export_dir}/{table}.csv"
-                bot.send_document(user.id, open(filename, "rb"))
-                # remove the file
-                os.remove(filename)
-        except Exception as e:
-            bot.send_message(user.id, str(e))
-            logger.error(f"Error exporting data: {e}")
+        # The export runs in the background and uploads one archive
+        start_export(bot, user)
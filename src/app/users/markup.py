@@ -1,16 +1,14 @@
-from pathlib import Path
-
-from omegaconf import OmegaConf
 from telebot.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from ..catalog import catalog
+from ..markup_cache import cached_markup
 from ..users.models import User
 
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-app_strings = config.strings
+app_strings = catalog.strings("users")
 
 
+@cached_markup(key=lambda lang, user: (lang, user.id, user.role_id, user.is_blocked))
 def create_users_menu_markup(lang: str, retrieved_user: User) -> InlineKeyboardMarkup:
     """Create the users menu markup."""
     menu_markup = InlineKeyboardMarkup(row_width=1)
@@ -51,6 +49,7 @@ def create_users_menu_markup(lang: str, retrieved_user: User) -> InlineKeyboardM
     return menu_markup
 
 
+@cached_markup
 def create_cancel_button(lang: str) -> InlineKeyboardMarkup:
     """Create a cancel button for the admin menu."""
     cancel_button = InlineKeyboardMarkup(row_width=1)
@@ -23,7 +23,7 @@ class User(Base):
     id = Column(BigInteger, primary_key=True)
     first_message_timestamp = Column(DateTime)
     last_message_timestamp = Column(DateTime)
-    username = Column(String)
+    username = Column(String, index=True)
     first_name = Column(String)
     last_name = Column(String)
     phone_number = Column(String)
@@ -31,5 +31,6 @@ class User(Base):
     role_id = Column(Integer, ForeignKey("roles.id"), default=2)
     is_blocked = Column(Boolean, default=False)
 
-    role = relationship("Role", backref="users", lazy="joined")
+    # Not joined to every user read, the role names come from the reference cache (`read_role`)
+    role = relationship("Role", backref="users")
     items = relationship("Item", back_populates="owner")
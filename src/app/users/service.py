@@ -1,15 +1,22 @@
+import functools
 import logging
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import bindparam, select, text
 from sqlalchemy.orm import Session
 
-from .models import User
+from ..reference_cache import reference_cache
+from .cache import user_cache
+from .models import Role, User
 
 # Set up logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
+# Read to show users, written by migrations only
+reference_cache.register(Role)
+
 
 def read_user(db_session: Session, user_id: Optional[int] = None, username: Optional[str] = None) -> User:
     """Read user by user_id or username"""
@@ -22,6 +29,16 @@ def read_user(db_session: Session, user_id: Optional[int] = None, username: Opti
     return result
 
 
+def read_role(db_session: Session, role_id: int) -> Optional[Role]:
+    """Read a role by id, from the reference cache"""
+    return reference_cache.get(Role, role_id, db_session)
+
+
+def read_roles(db_session: Session) -> list[Role]:
+    """Read all roles, from the reference cache"""
+    return list(reference_cache.rows(Role, db_session))
+
+
 def read_users(db_session: Session, user_ids: Optional[list[int]] = None) -> list[User]:
     """Read users by user_ids"""
     if user_ids:
@@ -129,8 +146,9 @@ def update_user(
                 user.role_id = role_id
             if is_blocked is not None:
                 user.is_blocked = is_blocked
-            user.last_message_timestamp = datetime.now()
             db_session.commit()
+            # Admin actions and language changes must not be hidden by the middleware cache
+            user_cache.invalidate(user_id)
         else:
             logger.error(f"User with ID {user_id} not found.")
             raise ValueError(f"User with ID {user_id} not found.")
@@ -143,6 +161,50 @@ def update_user(
     return user
 
 
+UPSERT_DIALECTS = {"postgresql", "sqlite"}
+
+
+@functools.cache
+def _upsert_statement(update_fields: tuple[str, ...]):
+    """
+    Build the upsert of a user updating `update_fields` on conflict.
+
+    The ON CONFLICT syntax is shared by PostgreSQL and SQLite. The dialect
+    `insert()` constructs are compiled again on every execution because
+    SQLAlchemy does not cache them, this textual statement is compiled once.
+    """
+    table = User.__table__
+    columns = [column.name for column in table.columns]
+    # last_message_timestamp is written in bulk by the activity tracker, a no-op update still returns the row
+    updates = update_fields or ("id",)
+    # Identifiers of the mapped table only, the values are bound parameters
+    sql = (
+        f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join(':' + name for name in columns)}) "  # noqa: S608
+        f"ON CONFLICT (id) DO UPDATE SET {', '.join(f'{name} = excluded.{name}' for name in updates)} "
+        f"RETURNING {', '.join(columns)}"
+    )
+    statement = text(sql).bindparams(*[bindparam(column.name, type_=column.type) for column in table.columns])
+    return select(User).from_statement(statement.columns(*table.columns))
+
+
+def upsert_statement(dialect: str, user_id: int, **values):
+    """Return the upsert statement writing the `values` that are not None and its parameters."""
+    if dialect not in UPSERT_DIALECTS:
+        raise NotImplementedError(f"Upsert is not supported for the {dialect} dialect")
+    update_fields = tuple(name for name, value in values.items() if value is not None)
+
+    now = datetime.now()
+    params = {"id": int(user_id), "first_message_timestamp": now, "last_message_timestamp": now}
+    for column in User.__table__.columns:
+        if column.name not in params:
+            # A new user gets the column defaults for the fields that are not given
+            value = values.get(column.name)
+            if value is None and column.default is not None and column.default.is_scalar:
+                value = column.default.arg
+            params[column.name] = value
+    return _upsert_statement(update_fields), params
+
+
 def upsert_user(
     db_session: Session,
     user_id: int,
@@ -150,11 +212,16 @@ def upsert_user(
     first_name: Optional[str] = None,
     last_name: Optional[str] = None,
     lang: Optional[str] = None,
-    role_id: Optional[str] = None,
+    role_id: Optional[int] = None,
     is_blocked: Optional[bool] = None,
 ) -> User:
     """
-    Insert or update a user.
+    Insert or update a user with one INSERT ... ON CONFLICT DO UPDATE ... RETURNING statement.
+
+    Only the fields that are not None are written, a new user gets the column
+    defaults for the others. The caller's session is neither committed nor
+    closed, the change is part of its transaction; the user middlewares commit
+    it at once, before the handler runs.
 
     Args:
         user_id: The user's ID.
@@ -168,36 +235,22 @@ def upsert_user(
     Returns:
         The user object.
     """
-
-    db_session.expire_on_commit = False
+    statement, params = upsert_statement(
+        db_session.get_bind().dialect.name,
+        user_id,
+        username=username,
+        first_name=first_name,
+        last_name=last_name,
+        lang=lang,
+        role_id=role_id,
+        is_blocked=is_blocked,
+    )
     try:
-        user = db_session.query(User).filter(User.id == user_id).first()
-        if user:
-            user = update_user(
-                db_session,
-                user_id=user_id,
-                username=username,
-                first_name=first_name,
-                last_name=last_name,
-                lang=lang,
-                role_id=role_id,
-                is_blocked=is_blocked,
-            )
-        else:
-            user = create_user(
-                db_session,
-                user_id=user_id,
-                username=username,
-                first_name=first_name,
-                last_name=last_name,
-                lang=lang,
-                role_id=role_id,
-                is_blocked=is_blocked,
-            )
+        user = db_session.scalars(statement, params, execution_options={"populate_existing": True}).one()
     except Exception as e:
         db_session.rollback()
         logger.error(f"Error upserting user with ID {user_id}: {e}")
         raise
-    finally:
-        db_session.close()
+    # Admin actions must not be hidden by the middleware cache
+    user_cache.invalidate(user.id)
     return user
@@ -1,18 +1,22 @@
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
-from omegaconf import OmegaConf
 from telebot import TeleBot, types
 from telebot.states import State, StatesGroup  # Correct import for sync/async
+from telebot.states.asyncio.context import StateContext as AsyncStateContext
 from telebot.states.sync.context import (
     StateContext,
 )
 
 # Import StateContext if using sync
+from ..catalog import catalog
+from ..config import settings
+from ..dispatch.asyncio_bridge import SyncBotBridge, run_blocking
 from ..menu.markup import create_menu_markup  # Assuming menu markup is in parent dir
-from ..plugins.yt_dlp.client import DownloadError, YtDlpClient
+from ..plugins.lazy import LazyObject
 from .markup import (
     create_back_to_menu_button,
     create_cancel_button,
@@ -23,9 +27,7 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 # Load configuration
-CURRENT_DIR = Path(__file__).parent
-config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-strings = config.strings
+strings = catalog.strings("yt_dlp")
 
 
 YOUTUBE_URL_PATTERN = (
@@ -33,6 +35,33 @@ YOUTUBE_URL_PATTERN = (
 )
 
 
+def create_yt_dlp_client():
+    """Import yt_dlp and build the download client."""
+    from ..plugins.yt_dlp.client import YtDlpClient
+
+    return YtDlpClient()
+
+
+def load_download_error() -> type[Exception]:
+    """Import the client module, which pulls in yt_dlp, and return its DownloadError."""
+    from ..plugins.yt_dlp.client import DownloadError
+
+    return DownloadError
+
+
+def remove_download(path: Path) -> None:
+    """Delete a downloaded file once it was sent."""
+    try:
+        path.unlink()
+        logger.info(f"Deleted temporary file: {path}")
+    except OSError as e:
+        logger.error(f"Error deleting file {path}: {e}")
+
+
+# Downloads of the async mode run here, at most YT_DLP_WORKERS at once and off the bridge's threads
+download_executor = ThreadPoolExecutor(max_workers=settings.YT_DLP_WORKERS, thread_name_prefix="yt-dlp")
+
+
 class YouTubeDLState(StatesGroup):
     """States for YouTube download conversation flow."""
 
@@ -48,7 +77,7 @@ def register_handlers(bot: TeleBot) -> None:  # Pass state_storage if needed
         bot: The Telegram bot instance.
     """
     logger.info("Registering YouTube Downloader handlers")
-    client = YtDlpClient()  # single reusable client instance
+    client = LazyObject(create_yt_dlp_client)  # single reusable client instance, built on first download
 
     # Handler to trigger the YouTube download feature (e.g., from main menu)
     @bot.callback_query_handler(func=lambda call: call.data == "yt_dlp")
@@ -126,10 +155,6 @@ def register_handlers(bot: TeleBot) -> None:  # Pass state_storage if needed
         )
 
     # Handler for format selection (callback query)
-    @bot.callback_query_handler(
-        func=lambda call: call.data.startswith("ydl_format_"),
-        state=YouTubeDLState.awaiting_format,
-    )
     def process_format_selection(call: types.CallbackQuery, data: dict[str, Any]) -> None:
         """Processes the format selection and starts the download."""
         user = data["user"]
@@ -163,6 +188,9 @@ def register_handlers(bot: TeleBot) -> None:  # Pass state_storage if needed
             reply_markup=None,  # Remove buttons
         )
 
+        # Imported here: the client module pulls in yt_dlp
+        from ..plugins.yt_dlp.client import DownloadError
+
         try:
             # Perform the download using the client
             downloaded_file_path = client.download_youtube_content(url, download_type)
@@ -180,11 +208,7 @@ def register_handlers(bot: TeleBot) -> None:  # Pass state_storage if needed
                     )
 
                 # Clean up the downloaded file after sending
-                try:
-                    downloaded_file_path.unlink()
-                    logger.info(f"Deleted temporary file: {downloaded_file_path}")
-                except OSError as e:
-                    logger.error(f"Error deleting file {downloaded_file_path}: {e}")
+                remove_download(downloaded_file_path)
 
             else:
                 raise DownloadError("Downloaded file path not found after download.")
@@ -207,6 +231,82 @@ def register_handlers(bot: TeleBot) -> None:  # Pass state_storage if needed
             # Always clear state afterwards
             state.delete()
 
+    def download(url: str, download_type: str) -> Path:
+        """Download the content on the calling thread, where the client is built on first use."""
+        downloaded_file_path = client.download_youtube_content(url, download_type)
+        if not (downloaded_file_path and downloaded_file_path.exists()):
+            raise load_download_error()("Downloaded file path not found after download.")
+        return downloaded_file_path
+
+    async def process_format_selection_async(call: types.CallbackQuery, data: dict[str, Any]) -> None:
+        """Like process_format_selection, awaiting the download instead of holding a bridge thread."""
+        async_bot = bot.bot
+        user = data["user"]
+        state = AsyncStateContext(call, async_bot)
+        lang = user.lang if hasattr(user, "lang") else "en"
+        download_type = call.data.split("_")[-1]  # "video" or "audio"
+
+        if download_type not in ["video", "audio"]:
+            await async_bot.answer_callback_query(call.id, strings[lang].invalid_format)
+            return
+
+        async with state.data() as data_items:
+            url = data_items.get("youtube_url")
+
+        if not url:
+            logger.error("URL not found in state during format selection.")
+            await async_bot.edit_message_text(
+                chat_id=call.message.chat.id,
+                message_id=call.message.message_id,
+                text=strings[lang].download_error.format(error="Internal state error."),
+                reply_markup=create_back_to_menu_button(lang),
+            )
+            await state.delete()
+            return
+
+        await async_bot.edit_message_text(
+            chat_id=call.message.chat.id,
+            message_id=call.message.message_id,
+            text=strings[lang].downloading,
+            reply_markup=None,
+        )
+
+        # Imported on the download pool: yt_dlp must not be loaded on the event loop
+        download_error = await run_blocking(download_executor, load_download_error)
+
+        try:
+            downloaded_file_path = await run_blocking(download_executor, download, url, download_type)
+            with open(downloaded_file_path, "rb") as file:
+                await async_bot.send_document(
+                    call.message.chat.id,
+                    file,
+                    caption=strings[lang].download_success.format(filename=downloaded_file_path.name),
+                )
+            remove_download(downloaded_file_path)
+
+        except download_error as e:
+            logger.error(f"Download failed for URL {url}: {e}")
+            await async_bot.send_message(
+                call.message.chat.id,
+                strings[lang].download_error.format(error=str(e)),
+                reply_markup=create_back_to_menu_button(lang),
+            )
+        except Exception as e:  # Catch unexpected errors
+            logger.exception(f"Unexpected error during download/send for URL {url}: {e}")
+            await async_bot.send_message(
+                call.message.chat.id,
+                strings[lang].download_error.format(error="An unexpected error occurred."),
+                reply_markup=create_back_to_menu_button(lang),
+            )
+        finally:
+            await state.delete()
+
+    # In async mode the download is awaited on the event loop
+    bot.callback_query_handler(
+        func=lambda call: call.data.startswith("ydl_format_"),
+        state=YouTubeDLState.awaiting_format,
+    )(process_format_selection_async if isinstance(bot, SyncBotBridge) else process_format_selection)
+
     # Handler for cancel button during format selection
     @bot.callback_query_handler(
         func=lambda call: call.data == "ydl_cancel",
@@ -1,33 +1,29 @@
 import logging
-from pathlib import Path
 
-from omegaconf import OmegaConf
 from telebot.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-# Load configuration
-CURRENT_DIR = Path(__file__).parent
-try:
-    config = OmegaConf.load(CURRENT_DIR / "config.yaml")
-    strings = config.strings
-except FileNotFoundError:
-    logging.error(f"Config file not found at {CURRENT_DIR / 'config.yaml'}")
-    # Provide default strings or handle the error appropriately
-    strings = OmegaConf.create(
-        {
-            "en": {
-                "video": "Video (mp4)",
-                "audio": "Audio (mp3)",
-                "cancel": "Cancel",
-                "back_to_menu": "⬅️ Back to Menu",
-            }
+from ..catalog import catalog
+from ..markup_cache import cached_markup
+
+# Load configuration, with basic fallback strings if the config file is missing
+strings = catalog.strings(
+    "yt_dlp",
+    default={
+        "en": {
+            "video": "Video (mp4)",
+            "audio": "Audio (mp3)",
+            "cancel": "Cancel",
+            "back_to_menu": "⬅️ Back to Menu",
         }
-    )  # Basic fallback
+    },
+)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
 
+@cached_markup
 def create_format_selection_markup(lang: str) -> InlineKeyboardMarkup:
     """Creates markup for selecting video or audio format."""
     markup = InlineKeyboardMarkup(row_width=2)
@@ -39,6 +35,7 @@ def create_format_selection_markup(lang: str) -> InlineKeyboardMarkup:
     return markup
 
 
+@cached_markup
 def create_cancel_button(lang: str, callback_data: str = "menu") -> InlineKeyboardMarkup:
     """Creates a generic cancel button."""
     markup = InlineKeyboardMarkup(row_width=1)
@@ -48,6 +45,7 @@ def create_cancel_button(lang: str, callback_data: str = "menu") -> InlineKeyboa
     return markup
 
 
+@cached_markup
 def create_back_to_menu_button(lang: str) -> InlineKeyboardMarkup:
     """Creates a button to go back to the main menu."""
     markup = InlineKeyboardMarkup(row_width=1)
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Settings require these variables, provide dummy values for tests
+os.environ.setdefault("BOT_TOKEN", "1234567890:" + "A" * 35)
+os.environ.setdefault("SUPERUSER_USERNAME", "admin")
+os.environ.setdefault("SUPERUSER_USER_ID", "1")
+
+# Imported once the settings can be loaded, the models register their tables on Base
+import app.chatgpt.models  # noqa: E402, F401
+import app.items.models  # noqa: E402, F401
+import app.users.models  # noqa: E402, F401
+from app.models import Base  # noqa: E402
+
+
+class StatementLog(list):
+    """SQL statements run on an engine, in order."""
+
+    def __init__(self, engine) -> None:
+        super().__init__()
+        # Whether each statement ran as one executemany
+        self.executemany: list[bool] = []
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, connection, cursor, statement, parameters, context, executemany) -> None:
+        self.append(statement)
+        self.executemany.append(executemany)
+
+    def clear(self) -> None:
+        super().clear()
+        self.executemany.clear()
+
+
+@pytest.fixture
+def engine():
+    """In-memory database with all tables, one connection shared by every thread of the test."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def session(session_factory):
+    with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+def statements(engine):
+    """Statements run from the moment the test asks for them, after the seed data of autouse fixtures."""
+    return StatementLog(engine)
@@ -0,0 +1,53 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.users.activity import ActivityTracker
+from app.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def users(session_factory):
+    with session_factory() as session:
+        session.add_all([User(id=user_id, last_message_timestamp=datetime(2024, 1, 1)) for user_id in range(1, 4)])
+        session.commit()
+
+
+def last_seen(factory) -> dict:
+    with factory() as session:
+        return {user.id: user.last_message_timestamp for user in session.query(User)}
+
+
+def test_flush_writes_latest_timestamps_in_one_statement(session_factory, statements):
+    tracker = ActivityTracker(session_factory, flush_interval=60)
+
+    now = datetime.now()
+    tracker.touch(1, now - timedelta(seconds=5))
+    tracker.touch(1, now)
+    tracker.touch(1, now - timedelta(seconds=1))
+    tracker.touch(2, now)
+
+    assert last_seen(session_factory)[1] == datetime(2024, 1, 1)
+    statements.clear()
+    assert tracker.flush() == 2
+    assert statements.executemany == [True]  # One executemany
+    assert last_seen(session_factory) == {1: now, 2: now, 3: datetime(2024, 1, 1)}
+    assert tracker.flush() == 0
+    tracker.stop()
+
+
+def test_full_buffer_forces_a_flush_and_stop_writes_the_rest(session_factory):
+    tracker = ActivityTracker(session_factory, flush_interval=60, max_pending=2)
+
+    now = datetime.now()
+    tracker.touch(1, now)
+    tracker.touch(2, now)
+    deadline = time.monotonic() + 5
+    while last_seen(session_factory)[2] != now and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert last_seen(session_factory)[1] == now
+
+    tracker.touch(3, now)
+    tracker.stop()
+    assert last_seen(session_factory)[3] == now
@@ -0,0 +1,211 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from telebot.async_telebot import AsyncTeleBot
+from telebot.types import Update
+
+from app.chatgpt import async_history, history
+from app.database.async_core import async_database_url
+from app.dispatch.asyncio_bridge import BridgeStateMiddleware, SyncBotBridge
+from app.items import async_service as async_items
+from app.items import service as items
+from app.items.models import ItemCategory
+from app.middleware import database as database_middleware
+from app.middleware.database import AsyncDatabaseMiddleware, LazySession, session_usage
+from app.middleware.user import AsyncUserMessageMiddleware
+from app.models import Base
+from app.users import async_service as async_users
+from app.users import service as users
+from app.users.activity import activity_tracker
+from app.users.cache import user_cache
+from app.users.models import Role
+
+
+class Stack:
+    """Runs a service function of the sync or async stack in its own session, committed afterwards."""
+
+    def __init__(self, factory, modules, is_async):
+        self.factory = factory
+        self.modules = modules
+        self.is_async = is_async
+
+    async def __call__(self, module, name, /, *args, **kwargs):
+        function = getattr(self.modules[module], name)
+        if self.is_async:
+            async with self.factory() as session:
+                result = await function(session, *args, **kwargs)
+                await session.commit()
+                return result
+        with self.factory() as session:
+            result = function(session, *args, **kwargs)
+            session.commit()
+            return result
+
+
+@pytest.fixture(params=["sync", "async"])
+def stack(request, tmp_path):
+    url = f"sqlite:///{tmp_path}/bot.db"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add_all([Role(id=2, name="user"), ItemCategory(id=1, name="notes")])
+        session.commit()
+
+    if request.param == "sync":
+        factory = sessionmaker(bind=engine, expire_on_commit=False)
+        yield Stack(factory, {"users": users, "items": items, "chat": history}, False)
+    else:
+        # NullPool: each test scenario runs in its own event loop
+        async_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+        factory = async_sessionmaker(async_engine, expire_on_commit=False)
+        yield Stack(factory, {"users": async_users, "items": async_items, "chat": async_history}, True)
+        asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+
+def test_users(stack):
+    async def scenario():
+        user = await stack("users", "upsert_user", user_id=5, username="ann", first_name="Ann")
+        assert (user.id, user.lang, user.role_id, user.is_blocked) == (5, "en", 2, False)
+        user = await stack("users", "upsert_user", user_id="5", last_name="Lee")
+        assert (user.username, user.last_name) == ("ann", "Lee")
+
+        await stack("users", "create_user", user_id=6, username="bob", role_id=2)
+        user = await stack("users", "update_user", 6, lang="ru", is_blocked=True)
+        assert (user.lang, user.is_blocked) == ("ru", True)
+        with pytest.raises(ValueError):
+            await stack("users", "update_user", 7, lang="ru")
+
+        assert (await stack("users", "read_user", username="bob")).id == 6
+        assert await stack("users", "read_user", user_id=7) is None
+        assert sorted(user.id for user in await stack("users", "read_users")) == [5, 6]
+        assert [user.id for user in await stack("users", "read_users", [6])] == [6]
+
+    asyncio.run(scenario())
+
+
+def test_items(stack):
+    async def scenario():
+        await stack("users", "upsert_user", user_id=5)
+        assert (await stack("items", "read_item_category", 1)).name == "notes"
+        assert [category.id for category in await stack("items", "read_item_categories")] == [1]
+
+        item = await stack("items", "create_item", name="a", content="x", category=1, owner_id=5)
+        await stack("items", "create_item", name="b", content="y", category=1, owner_id=5)
+        assert (await stack("items", "read_item", item.id)).name == "a"
+        assert [i.name for i in await stack("items", "read_items_by_owner", 5, skip=1)] == ["b"]
+        assert len(await stack("items", "read_items", limit=1)) == 1
+
+        item = await stack("items", "update_item", item.id, name="c", content="z", category=1)
+        assert (item.name, item.content) == ("c", "z")
+        assert await stack("items", "delete_item", item.id)
+        assert not await stack("items", "delete_item", item.id)
+        assert await stack("items", "read_item", item.id) is None
+
+    asyncio.run(scenario())
+
+
+def test_chat_history(stack):
+    async def scenario():
+        await stack("users", "upsert_user", user_id=5)
+        chat = await stack("chat", "get_or_create_chat", 5)
+        assert (await stack("chat", "get_or_create_chat", 5)).id == chat.id
+        for number in range(4):
+            await stack("chat", "save_message", chat, "user" if number % 2 == 0 else "assistant", f"m{number}")
+
+        history = await stack("chat", "get_chat_history", chat, 3)
+        assert [message["content"] for message in history] == ["m1", "m2", "m3"]
+        assert history[0] == {"role": "assistant", "content": "m1"}
+        assert len(await stack("chat", "get_chat_history", chat, 0)) == 4
+
+    asyncio.run(scenario())
+
+
+def test_async_middleware_commits_the_async_session(tmp_path):
+    url = f"sqlite:///{tmp_path}/bot.db"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add(Role(id=2, name="user"))
+        session.commit()
+
+    async def scenario():
+        async_engine = create_async_engine(async_database_url(url))
+        middleware = AsyncDatabaseMiddleware(bot=None, async_session_factory=async_sessionmaker(async_engine))
+        update = SimpleNamespace(data="async_write")
+        data = {}
+        await middleware.pre_process(update, data)
+        await async_users.upsert_user(data["async_db_session"], user_id=9)
+        await middleware.post_process(update, data, None)
+        await async_engine.dispose()
+        return data
+
+    data = asyncio.run(scenario())
+    assert not data["db_session"].created
+    with sessionmaker(bind=engine)() as session:
+        assert users.read_user(session, user_id=9) is not None
+    assert session_usage.snapshot()["callback:async_write"]["write"] >= 1
+    engine.dispose()
+
+
+def test_async_handler_writes_for_a_new_user(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path}/bot.db"
+    engine = create_engine(url, connect_args={"timeout": 0.5})
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        session.add_all([Role(id=2, name="user"), ItemCategory(id=1, name="notes")])
+        session.commit()
+    # Handler bodies write through the sync session of the same database
+    monkeypatch.setattr(
+        database_middleware, "LazySession", lambda session_factory=factory: LazySession(session_factory)
+    )
+    monkeypatch.setattr(activity_tracker, "session_factory", factory)
+    user_cache.clear()
+
+    async def scenario():
+        async_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+        bot = AsyncTeleBot("1234567890:" + "A" * 35)
+        bridge = SyncBotBridge(bot, max_workers=2)
+        bridge.bind_loop(asyncio.get_running_loop())
+        bot.setup_middleware(BridgeStateMiddleware(bridge))
+        bot.setup_middleware(AsyncDatabaseMiddleware(bot, async_session_factory=async_sessionmaker(async_engine)))
+        bot.setup_middleware(AsyncUserMessageMiddleware(bot))
+        errors = []
+
+        @bridge.message_handler(commands=["note"])
+        def note(message, data):
+            try:
+                items.create_item(data["db_session"], "milk", "2 l", 1, data["user"].id)
+            except Exception as e:
+                errors.append(e)
+
+        update = Update.de_json(
+            {
+                "update_id": 1,
+                "message": {
+                    "message_id": 1,
+                    "date": 0,
+                    "text": "/note",
+                    "chat": {"id": 42, "type": "private"},
+                    "from": {"id": 42, "is_bot": False, "first_name": "New"},
+                },
+            }
+        )
+        await bot.process_new_updates([update])
+        bridge.shutdown()
+        await async_engine.dispose()
+        return errors
+
+    assert asyncio.run(scenario()) == []
+    with factory() as session:
+        assert [item.name for item in items.read_items_by_owner(session, 42)] == ["milk"]
+    assert user_cache.get(42).first_name == "New"
+    activity_tracker.flush()
+    user_cache.clear()
+    engine.dispose()
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from telebot import asyncio_filters
+from telebot.async_telebot import AsyncTeleBot
+from telebot.asyncio_handler_backends import BaseMiddleware
+from telebot.types import Update
+
+from app.chatgpt import handlers as chatgpt_handlers
+from app.dispatch.asyncio_bridge import BridgeStateMiddleware, SyncBotBridge
+from app.google_sheets import handlers as sheets_handlers
+from app.plugins.lazy import LazyObject
+
+
+class UserMiddleware(BaseMiddleware):
+    def __init__(self) -> None:
+        self.update_types = ["message", "callback_query"]
+
+    async def pre_process(self, message, data):
+        data["user"] = SimpleNamespace(id=message.from_user.id, lang="en")
+
+    async def post_process(self, message, data, exception):
+        pass
+
+
+class FakeSheets:
+    def __init__(self) -> None:
+        self.threads = []
+
+    def get_sheet(self, name):
+        self.threads.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return name
+
+    def get_table_names(self, sheet):
+        return ["Sheet1"]
+
+
+class FakeChatService:
+    def set_bot(self, bot) -> None:
+        self.bot = bot
+
+    async def handle_text(self, message, user, db_session):
+        await asyncio.sleep(0.2)
+        await self.bot.send_message(message.chat.id, f"reply to {message.text}")
+
+
+def make_update(chat_id: int, text: str) -> Update:
+    return Update.de_json(
+        {
+            "update_id": chat_id,
+            "message": {
+                "message_id": chat_id,
+                "date": 0,
+                "text": text,
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+            },
+        }
+    )
+
+
+async def create_bridge(sent: list) -> SyncBotBridge:
+    bot = AsyncTeleBot("1234567890:" + "A" * 35)
+    # One thread: sync handlers of these chats would run one after another
+    bridge = SyncBotBridge(bot, max_workers=1)
+    bridge.bind_loop(asyncio.get_running_loop())
+    bot.setup_middleware(BridgeStateMiddleware(bridge))
+    bot.setup_middleware(UserMiddleware())
+    bot.add_custom_filter(asyncio_filters.StateFilter(bot))
+
+    async def send_message(chat_id, text, **kwargs):
+        sent.append((chat_id, text))
+
+    bot.send_message = send_message
+    return bridge
+
+
+async def process_at_once(bot: AsyncTeleBot, updates: list[Update]) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(bot.process_new_updates([update]) for update in updates))
+    return time.perf_counter() - started
+
+
+def test_sheets_requests_run_on_their_own_pool(monkeypatch):
+    sheets = FakeSheets()
+    monkeypatch.setattr(sheets_handlers, "google_sheets", sheets)
+
+    async def scenario():
+        sent = []
+        bridge = await create_bridge(sent)
+        sheets_handlers.register_handlers(bridge)
+        bot = bridge.bot
+        for chat_id in (1, 2, 3):
+            await bot.set_state(chat_id, sheets_handlers.GoogleSheetsState.birthday, chat_id)
+
+        elapsed = await process_at_once(bot, [make_update(chat_id, "01-01-2000") for chat_id in (1, 2, 3)])
+        states = [await bot.get_state(chat_id, chat_id) for chat_id in (1, 2, 3)]
+        bridge.shutdown()
+        return sent, states, elapsed
+
+    sent, states, elapsed = asyncio.run(scenario())
+    assert elapsed < 0.5
+    assert sorted(sent) == [(chat_id, "Select worksheet:") for chat_id in (1, 2, 3)]
+    assert states == [sheets_handlers.GoogleSheetsState.select_worksheet.name] * 3
+    assert all(name.startswith("google-sheets") for name in sheets.threads)
+
+
+def test_chatgpt_replies_are_awaited_on_the_loop(monkeypatch):
+    async def scenario():
+        sent = []
+        bridge = await create_bridge(sent)
+        monkeypatch.setattr(chatgpt_handlers, "async_chatgpt_service", LazyObject(FakeChatService))
+        chatgpt_handlers.register_handlers(bridge)
+        bot = bridge.bot
+        for chat_id in (1, 2, 3):
+            await bot.set_state(chat_id, chatgpt_handlers.ChatGptStates.awaiting, chat_id)
+
+        elapsed = await process_at_once(bot, [make_update(chat_id, "hi") for chat_id in (1, 2, 3)])
+        bridge.shutdown()
+        return sent, elapsed
+
+    sent, elapsed = asyncio.run(scenario())
+    assert elapsed < 0.5
+    assert sorted(sent) == [(chat_id, "reply to hi") for chat_id in (1, 2, 3)]
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+from telebot import asyncio_filters
+from telebot.async_telebot import AsyncTeleBot
+from telebot.states import State, StatesGroup
+from telebot.types import Update
+
+from app.dispatch.asyncio_bridge import BridgeStateMiddleware, SyncBotBridge
+
+
+class DemoStates(StatesGroup):
+    waiting = State()
+
+
+def make_update(update_id: int, text: str) -> Update:
+    return Update.de_json(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 0,
+                "text": text,
+                "chat": {"id": 42, "type": "private"},
+                "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+            },
+        }
+    )
+
+
+def test_sync_handlers_run_off_loop_and_await_bot_calls():
+    async def scenario():
+        bot = AsyncTeleBot("1234567890:" + "A" * 35)
+        bridge = SyncBotBridge(bot, max_workers=4)
+        bridge.bind_loop(asyncio.get_running_loop())
+        bot.setup_middleware(BridgeStateMiddleware(bridge))
+        bot.add_custom_filter(asyncio_filters.StateFilter(bot))
+
+        sent = []
+
+        async def fake_send_message(chat_id, text, **kwargs):
+            sent.append((chat_id, text))
+            return text
+
+        bot.send_message = fake_send_message
+        loop_thread = threading.current_thread()
+        handler_threads = []
+
+        @bridge.message_handler(commands=["start"])
+        def start(message, data):
+            handler_threads.append(threading.current_thread())
+            data["state"].set(DemoStates.waiting)
+            data["state"].add_data(step=1)
+            assert bridge.send_message(message.chat.id, "hello") == "hello"
+
+        @bridge.message_handler(state=DemoStates.waiting)
+        def waiting(message, data):
+            with data["state"].data() as state_data:
+                step = state_data["step"]
+            bridge.send_message(message.chat.id, f"step {step}: {message.text}")
+            data["state"].delete()
+
+        await bot.process_new_updates([make_update(1, "/start")])
+        await bot.process_new_updates([make_update(2, "next")])
+        bridge.shutdown()
+        return sent, handler_threads, loop_thread
+
+    sent, handler_threads, loop_thread = asyncio.run(scenario())
+    assert sent == [(42, "hello"), (42, "step 1: next")]
+    assert handler_threads and handler_threads[0] is not loop_thread
+
+
+def test_async_handlers_run_on_the_loop_without_a_thread():
+    async def scenario():
+        bot = AsyncTeleBot("1234567890:" + "A" * 35)
+        bridge = SyncBotBridge(bot, max_workers=1)
+        bridge.bind_loop(asyncio.get_running_loop())
+        threads = []
+
+        @bridge.message_handler(func=lambda message: True)
+        async def slow(message):
+            threads.append(threading.current_thread())
+            await asyncio.sleep(0.2)
+
+        # More slow handlers at once than threads in the pool
+        started = time.perf_counter()
+        await asyncio.gather(*(bot.process_new_updates([make_update(i, str(i))]) for i in range(5)))
+        elapsed = time.perf_counter() - started
+        bridge.shutdown()
+        return threads, elapsed
+
+    threads, elapsed = asyncio.run(scenario())
+    assert len(threads) == 5 and set(threads) == {threading.main_thread()}
+    assert elapsed < 0.6
@@ -0,0 +1,137 @@
+import csv
+import gzip
+import io
+import threading
+import time
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+import app.admin.export as admin_export
+from app.chatgpt.models import Chat
+from app.chatgpt.models import Message as ChatMessage
+from app.database.export import export_archive, load_watermarks, save_watermarks
+from app.items.models import Item, ItemCategory
+from app.users.models import Role, User
+
+
+def add_chat(session_factory, messages=2500):
+    with session_factory() as session:
+        session.add_all([Role(id=2, name="user"), User(id=5, role_id=2, username="ann")])
+        session.add(Chat(id=1, user_id=5))
+        session.add_all([ChatMessage(chat_id=1, role="user", content=f"m{n}") for n in range(messages)])
+        session.commit()
+
+
+def read_table(archive, table):
+    with archive.open(f"{table}.csv.gz") as member:
+        return list(csv.reader(io.TextIOWrapper(gzip.GzipFile(fileobj=member), newline="")))
+
+
+def test_tables_are_streamed_into_one_archive(engine, session_factory, tmp_path):
+    add_chat(session_factory)
+    progress = []
+
+    def record(table, rows):
+        progress.append((table, rows))
+
+    report = export_archive(engine, str(tmp_path / "export.zip"), progress=record, chunk_size=1000)
+    assert report.rows["chatgpt_messages"] == 2500 and report.rows["users"] == 1
+    assert [rows for table, rows in progress if table == "chatgpt_messages"] == [1000, 2000, 2500]
+
+    with zipfile.ZipFile(report.path) as archive:
+        assert set(archive.namelist()) == {f"{table}.csv.gz" for table in report.rows}
+        messages = read_table(archive, "chatgpt_messages")
+        assert messages[0][:4] == ["id", "chat_id", "role", "content"]
+        assert len(messages) == 2501 and messages[-1][3] == "m2499"
+        header, row = read_table(archive, "users")
+        assert dict(zip(header, row))["username"] == "ann"
+
+
+def test_only_requested_tables_are_exported(engine, session_factory, tmp_path):
+    add_chat(session_factory, messages=0)
+    report = export_archive(engine, str(tmp_path / "export.zip"), tables=["users", "roles"])
+    assert report.rows == {"users": 1, "roles": 1}
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+        self.done = threading.Event()
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.sent.append(("message", text))
+        return SimpleNamespace(message_id=1)
+
+    def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        self.sent.append(("edit", text))
+
+    def send_document(self, chat_id, document, caption=None, **kwargs):
+        self.sent.append(("document", zipfile.ZipFile(document).namelist(), caption))
+        self.done.set()
+
+
+def test_export_runs_in_the_background_one_at_a_time(engine, session_factory, tmp_path, monkeypatch):
+    add_chat(session_factory)
+    monkeypatch.setattr(admin_export, "engine", engine)
+    monkeypatch.setattr(admin_export.settings, "EXPORT_DIR", str(tmp_path / "exports"))
+    bot, user = FakeBot(), SimpleNamespace(id=5, lang="en")
+
+    assert admin_export.start_export(bot, user, tables=["users"])
+    assert not admin_export.start_export(bot, user)
+    assert bot.done.wait(10)
+
+    kinds = [entry[0] for entry in bot.sent]
+    assert kinds[:2] == ["message", "message"] and bot.sent[1][1] == "An export is already running"
+    assert bot.sent[-1][1:] == (["users.csv.gz"], "Exported 1 rows of 1 tables in 0s")
+    # The archive is removed after the upload and the next export may start
+    admin_export._export_lock.acquire(timeout=5)
+    admin_export._export_lock.release()
+    assert list((tmp_path / "exports").iterdir()) == []
+
+
+def test_parquet_export_keeps_column_types(engine, session_factory, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    add_chat(session_factory, messages=25)
+    tables = ["users", "chatgpt_messages"]
+    report = export_archive(engine, str(tmp_path / "export.zip"), tables, chunk_size=10, export_format="parquet")
+    with zipfile.ZipFile(report.path) as archive:
+        users = pq.read_table(io.BytesIO(archive.read("users.parquet")))
+        messages = pq.ParquetFile(io.BytesIO(archive.read("chatgpt_messages.parquet")))
+
+    schema = dict(zip(users.schema.names, map(str, users.schema.types)))
+    assert schema["id"] == "int64" and schema["is_blocked"] == "bool"
+    assert schema["first_message_timestamp"] == "timestamp[us]"
+    assert users.column("username").to_pylist() == ["ann"]
+    assert messages.metadata.num_rows == 25 and messages.metadata.num_row_groups == 3
+
+
+def test_incremental_export_streams_the_rows_changed_since_the_watermark(engine, session_factory, tmp_path):
+    add_chat(session_factory, messages=0)
+    with session_factory() as session:
+        session.add(ItemCategory(id=1, name="notes"))
+        session.add_all([Item(id=n, name=f"item{n}", category=1, owner_id=5) for n in range(1, 6)])
+        session.commit()
+    tables = ["items", "users"]
+
+    full = export_archive(engine, str(tmp_path / "full.zip"), tables)
+    assert full.rows == {"items": 5, "users": 1} and full.incremental == set()
+    save_watermarks(engine, full.watermarks)
+    assert load_watermarks(engine) == full.watermarks and "users" not in full.watermarks
+
+    time.sleep(0.01)
+    with session_factory() as session:
+        session.get(Item, 2).name = "renamed"
+        session.add(Item(id=6, name="item6", category=1, owner_id=5))
+        session.commit()
+
+    delta = export_archive(engine, str(tmp_path / "delta.zip"), tables, incremental=True)
+    # Items changed since the watermark, the last row of the full export again; users have no timestamp
+    assert delta.incremental == {"items"} and delta.rows == {"items": 3, "users": 1}
+    with zipfile.ZipFile(delta.path) as archive:
+        header, *rows = read_table(archive, "items")
+    assert sorted(row[header.index("name")] for row in rows) == ["item5", "item6", "renamed"]
+
+    # A full snapshot is still possible on demand
+    assert export_archive(engine, str(tmp_path / "again.zip"), tables).rows["items"] == 6
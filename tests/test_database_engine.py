@@ -0,0 +1,31 @@
+from sqlalchemy import text
+
+from app.config import settings
+from app.database.core import TimedQueuePool, build_engine, pool_status
+from app.metrics import metrics
+
+
+def test_sqlite_connections_use_wal_and_the_configured_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 2)
+    monkeypatch.setattr(settings, "SQLITE_BUSY_TIMEOUT", 1234)
+    engine = build_engine(f"sqlite:///{tmp_path}/bot.db")
+    assert isinstance(engine.pool, TimedQueuePool)
+
+    checkouts = metrics.snapshot().get("db.pool_checkout_seconds", {}).get("count", 0)
+    with engine.connect() as connection:
+        pragmas = [
+            connection.execute(text(f"PRAGMA {name}")).scalar()
+            for name in ("journal_mode", "synchronous", "busy_timeout", "mmap_size")
+        ]
+        assert pool_status(engine)["checked_out"] == 1
+    # synchronous=NORMAL is 1
+    assert pragmas == ["wal", 1, 1234, settings.SQLITE_MMAP_SIZE]
+    assert pool_status(engine) == {"size": 2, "checked_out": 0, "idle": 1, "overflow": 0}
+    assert metrics.snapshot()["db.pool_checkout_seconds"]["count"] == checkouts + 1
+    engine.dispose()
+
+
+def test_null_pool_can_be_selected(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_CLASS", "null")
+    engine = build_engine(f"sqlite:///{tmp_path}/bot.db")
+    assert pool_status(engine) == {"pool": "NullPool"}
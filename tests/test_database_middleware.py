@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app.middleware.database import DatabaseMiddleware, LazySession, session_usage, update_label
+from app.users.models import Role, User
+from app.users.service import read_user, upsert_user
+
+
+@pytest.fixture
+def events(engine, session_factory):
+    with session_factory() as session:
+        session.add(Role(id=2, name="user"))
+        session.commit()
+    events = []
+    event.listen(engine, "checkout", lambda *args: events.append("checkout"))
+    event.listen(engine, "commit", lambda *args: events.append("commit"))
+    return events
+
+
+def run_update(session_factory, update, handler):
+    middleware = DatabaseMiddleware(bot=None)
+    data = {}
+    middleware.pre_process(update, data)
+    data["db_session"] = LazySession(session_factory)
+    exception = None
+    try:
+        handler(data["db_session"])
+    except Exception as e:
+        exception = e
+    middleware.post_process(update, data, exception)
+
+
+def callback(data):
+    return SimpleNamespace(data=data)
+
+
+def test_unused_session_checks_out_no_connection(session_factory, events):
+    before = session_usage.snapshot().get("callback:cancel", {}).get("unused", 0)
+    run_update(session_factory, callback("cancel"), lambda session: None)
+    assert events == []
+    assert session_usage.snapshot()["callback:cancel"]["unused"] == before + 1
+
+
+def test_read_only_session_is_not_committed(session_factory, events):
+    run_update(session_factory, callback("view_user_1"), lambda session: read_user(session, 1))
+    assert events == ["checkout"]
+    assert session_usage.snapshot()["callback:view_user_N"]["read"] >= 1
+
+
+@pytest.mark.parametrize(
+    "handler",
+    [
+        lambda session: session.add(User(id=5, role_id=2)),
+        lambda session: upsert_user(session, user_id=5, username="ann"),
+    ],
+)
+def test_writes_are_committed(session_factory, events, handler):
+    run_update(session_factory, SimpleNamespace(text="/start", content_type="text"), handler)
+    assert "commit" in events
+    with session_factory() as session:
+        assert session.get(User, 5) is not None
+
+
+def test_failed_update_is_rolled_back(session_factory, events):
+    def handler(session):
+        session.add(User(id=5, role_id=2))
+        session.flush()
+        raise ValueError
+
+    run_update(session_factory, callback("save"), handler)
+    assert "commit" not in events
+    with session_factory() as session:
+        assert session.get(User, 5) is None
+
+
+def test_update_labels_have_low_cardinality():
+    assert update_label(callback("delete_item_42")) == "callback:delete_item_N"
+    assert update_label(SimpleNamespace(text="/start ref123", content_type="text")) == "command:/start"
+    assert update_label(SimpleNamespace(text="hello", content_type="text")) == "message:text"
+    assert update_label(SimpleNamespace(query="abc")) == "inline_query"
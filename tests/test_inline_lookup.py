@@ -0,0 +1,93 @@
+import pytest
+
+from app.items import search
+from app.items.cache import ItemMatchCache, item_match_cache
+from app.items.markup import create_inline_results
+from app.items.models import Item
+from app.items.search import lookup_items
+from app.items.service import create_item, delete_item
+from app.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def items(session):
+    session.add_all([User(id=7, username="ann"), User(id=8, username="bob")])
+    session.add_all(
+        [
+            Item(id=1, name="Groceries", content="milk and bread", category=1, owner_id=7),
+            Item(id=2, name="Gym plan", content="squats 5x5", category=1, owner_id=7),
+            Item(id=3, name="Garden", content="plant 100% organic_seeds", category=1, owner_id=7),
+            Item(id=4, name="Groceries of Bob", content="milk", category=1, owner_id=8),
+            Item(id=5, name="Молоко", content="Купить ПОЛЕ", category=1, owner_id=8),
+        ]
+    )
+    session.commit()
+    item_match_cache.clear()
+    yield
+    item_match_cache.clear()
+
+
+def ids(matches):
+    return [match.id for match in matches]
+
+
+def test_keystrokes_after_a_complete_prefix_skip_the_database(session, statements):
+    assert ids(lookup_items(session, 7, "")) == [3, 2, 1]
+    assert len(statements) == 1
+
+    for typed in ("g", "gr", "gro", "groc", "Groc  MI"):
+        matches = lookup_items(session, 7, typed)
+    assert ids(matches) == [1]
+    assert ids(lookup_items(session, 7, "squats")) == [2]
+    assert len(statements) == 1
+    # Owner-scoped
+    assert ids(lookup_items(session, 8, "groc")) == [4]
+
+
+def test_truncated_matches_are_not_narrowed(session, statements, monkeypatch):
+    monkeypatch.setattr(search, "INLINE_MAX_MATCHES", 2)
+    assert ids(lookup_items(session, 7, "")) == [3, 2]
+    # Item 1 may be left out of the cached matches, the database is queried
+    assert ids(lookup_items(session, 7, "milk")) == [1]
+    assert len(statements) == 2
+
+
+def test_wildcards_are_matched_literally(session):
+    assert ids(lookup_items(session, 7, "100%")) == [3]
+    assert ids(lookup_items(session, 7, "c_s")) == [3]
+    assert ids(lookup_items(session, 7, "o%s")) == []
+
+
+def test_non_ascii_words_match_with_and_without_a_cached_prefix(session):
+    assert ids(lookup_items(session, 8, "Молоко")) == [5]
+    assert ids(lookup_items(session, 8, "поле")) == [5]
+    item_match_cache.clear()
+    assert ids(lookup_items(session, 8, "")) == [5, 4]
+    assert ids(lookup_items(session, 8, "молоко")) == [5]
+    assert ids(lookup_items(session, 8, "МОЛ пол")) == [5]
+
+
+def test_item_changes_invalidate_the_owner_matches(session):
+    lookup_items(session, 7, "gro")
+    item = create_item(session, name="Grout", content=None, category=1, owner_id=7)
+    assert ids(lookup_items(session, 7, "gro")) == [item.id, 1]
+    delete_item(session, 1)
+    assert ids(lookup_items(session, 7, "gro")) == [item.id]
+
+
+def test_entries_expire_and_least_recent_users_are_dropped():
+    cache = ItemMatchCache(ttl=60, maxsize=2)
+    for user_id in (1, 2, 3):
+        cache.put(user_id, "", (), complete=True)
+    assert cache.get(1, "a") is None and cache.get(3, "a") == ()
+
+    cache = ItemMatchCache(ttl=0)
+    cache.put(1, "", (), complete=True)
+    assert cache.get(1, "") is None
+
+
+def test_results_send_the_item_text(session):
+    results = create_inline_results(lookup_items(session, 7, "gym"))
+    result = results[0].to_dict()
+    assert result["id"] == "2" and result["title"] == "Gym plan" and result["description"] == "squats 5x5"
+    assert result["input_message_content"]["message_text"] == "Gym plan\n\nsquats 5x5"
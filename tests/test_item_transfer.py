@@ -0,0 +1,185 @@
+import csv
+import io
+import json
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.items import transfer_jobs
+from app.items.cache import item_match_cache
+from app.items.models import Item, ItemCategory
+from app.items.transfer import (
+    ItemImportError,
+    export_items,
+    import_items,
+    parse_items,
+    validate_items,
+)
+from app.reference_cache import reference_cache
+from app.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def users(session_factory, monkeypatch):
+    with session_factory() as session:
+        session.add_all([ItemCategory(id=1, name="Notes"), ItemCategory(id=2, name="Tasks")])
+        session.add_all([User(id=7, username="ann"), User(id=8, username="bob")])
+        session.commit()
+    monkeypatch.setattr(reference_cache, "session_factory", session_factory)
+    reference_cache.invalidate()
+    item_match_cache.clear()
+    yield
+    reference_cache.invalidate()
+    item_match_cache.clear()
+
+
+def owned_items(engine, owner_id):
+    with Session(engine) as session:
+        return session.execute(
+            select(Item.name, Item.content, Item.category).where(Item.owner_id == owner_id).order_by(Item.id)
+        ).all()
+
+
+def csv_file(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=["name", "content", "category"])
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def test_records_are_parsed_from_each_format():
+    assert [record for _, record in parse_items("a.json", b'{"items": [{"name": "milk"}, 3]}')] == [
+        {"name": "milk"},
+        {"name": None},
+    ]
+    assert [record["name"] for _, record in parse_items("a.csv", b"\xef\xbb\xbfname,content\nmilk,2 l\n")] == ["milk"]
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("notes/milk.md", "# Milk\n\n2 litres\n")
+        zip_file.writestr("notes/bread.md", "wholegrain")
+        zip_file.writestr("__MACOSX/notes/._milk.md", "")
+        zip_file.writestr("notes/cover.png", b"\x89PNG")
+    assert [record for _, record in parse_items("notes.zip", archive.getvalue())] == [
+        {"name": "Milk", "content": "2 litres"},
+        {"name": "bread", "content": "wholegrain"},
+    ]
+
+    for file_name, data in [("a.csv", b"title\nmilk\n"), ("a.json", b"{"), ("a.zip", b"PK"), ("a.xlsx", b"")]:
+        with pytest.raises(ItemImportError):
+            list(parse_items(file_name, data))
+
+
+def test_invalid_records_are_reported():
+    categories = {"notes": 1, "1": 1, "tasks": 2, "2": 2}
+    records = [
+        ("line 2", {"name": "milk", "category": "Tasks"}),
+        ("line 3", {"name": " ", "content": "no name"}),
+        ("line 4", {"name": "bread", "category": "Recipes"}),
+        ("line 5", {"name": "x" * 300}),
+        ("line 6", {"name": "eggs", "category": "1"}),
+    ]
+    rows, errors = validate_items(records, 7, categories, max_items=10)
+
+    assert [(row["name"], row["category"], row["owner_id"]) for row in rows] == [("milk", 2, 7), ("eggs", 1, 7)]
+    assert errors == [
+        "line 3: name is empty",
+        "line 4: unknown category 'Recipes'",
+        "line 5: name is longer than 256 characters",
+    ]
+    with pytest.raises(ItemImportError):
+        validate_items(records, 7, categories, max_items=1)
+
+
+def test_items_are_inserted_in_chunks(engine, statements):
+    data = csv_file([{"name": f"item {number}", "content": "text", "category": "Tasks"} for number in range(10_000)])
+    item_match_cache.put(7, "item", (), complete=True)
+    progress = []
+
+    report = import_items(engine, 7, "items.csv", data, chunk_size=1000, progress=progress.append)
+
+    assert report.items == 10_000 and report.skipped == 0
+    inserts = [statement for statement in statements if statement.startswith("INSERT INTO items")]
+    assert len(inserts) == 10
+    assert progress == list(range(1000, 10_001, 1000))
+    assert owned_items(engine, 7)[-1] == ("item 9999", "text", 2)
+    assert item_match_cache.get(7, "item") is None
+
+
+def test_import_keeps_the_valid_items(engine):
+    data = json.dumps([{"name": "milk"}, {"content": "no name"}, {"name": "bread", "category": "Recipes"}]).encode()
+
+    report = import_items(engine, 8, "items.json", data)
+
+    assert (report.items, report.skipped) == (1, 2)
+    assert report.errors == ["item 2: name is empty", "item 3: unknown category 'Recipes'"]
+    assert owned_items(engine, 8) == [("milk", None, 1)]
+
+
+@pytest.mark.parametrize("export_format, suffix", [("csv", ".csv"), ("json", ".json"), ("md", ".zip")])
+def test_export_is_read_back_by_import(engine, tmp_path, export_format, suffix):
+    items = [
+        {"name": "Groceries", "content": "milk, bread\n\"2\" eggs", "category": "Tasks"},
+        {"name": "Ideas/2024", "content": "", "category": "Notes"},
+    ]
+    import_items(engine, 7, "items.csv", csv_file(items))
+    import_items(engine, 8, "items.csv", csv_file([{"name": "not exported", "content": "", "category": ""}]))
+    path = tmp_path / f"items{suffix}"
+
+    report = export_items(engine, 7, str(path), export_format, chunk_size=1)
+
+    assert report.items == 2
+    import_items(engine, 7, path.name, path.read_bytes())
+    imported, exported = owned_items(engine, 7)[:2], owned_items(engine, 7)[2:]
+    if export_format == "md":
+        # The notes do not hold the category
+        assert [row[:2] for row in exported] == [row[:2] for row in imported]
+    else:
+        assert exported == imported
+
+
+class RecordingBot:
+    def __init__(self, file_data):
+        self.file_data = file_data
+        self.messages = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.messages.append(text)
+        return SimpleNamespace(message_id=len(self.messages))
+
+    def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        self.messages.append(text)
+
+    def get_file(self, file_id):
+        return SimpleNamespace(file_path=f"documents/{file_id}")
+
+    def download_file(self, file_path):
+        return self.file_data
+
+
+def test_import_job_reports_to_the_user(engine, monkeypatch):
+    monkeypatch.setattr(transfer_jobs, "engine", engine)
+    queued = []
+    monkeypatch.setattr(transfer_jobs, "_executor", SimpleNamespace(submit=lambda *args: queued.append(args)))
+    bot = RecordingBot(csv_file([{"name": "milk", "content": "", "category": ""}, {"name": "", "content": "x"}]))
+    user = SimpleNamespace(id=7, lang="en")
+    document = SimpleNamespace(file_id="abc", file_name="items.csv", file_size=100)
+
+    assert transfer_jobs.start_import(bot, user, document)
+    # Refused while the first one is queued
+    assert not transfer_jobs.start_import(bot, user, document)
+    assert bot.messages == ["Importing your items...", transfer_jobs.strings["en"].transfer_running]
+
+    function, *args = queued[0]
+    function(*args)
+
+    assert bot.messages[-1].startswith("Imported 1 items in")
+    assert "line 3: name is empty" in bot.messages[-1]
+    assert owned_items(engine, 7) == [("milk", None, 1)]
+    too_large = SimpleNamespace(file_id="abc", file_name="a.csv", file_size=2**30)
+    assert not transfer_jobs.start_import(bot, user, too_large)
+    assert bot.messages[-1] == "The file is larger than 20 MB."
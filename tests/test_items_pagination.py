@@ -0,0 +1,51 @@
+import pytest
+
+from app.items.markup import create_items_list_markup
+from app.items.models import Item
+from app.items.service import delete_item, read_items_page
+from app.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def items(session):
+    session.add_all([User(id=7, username="ann"), User(id=8, username="bob")])
+    # Items of both users interleaved, 23 of them owned by user 7
+    session.add_all([Item(id=n, name=f"item{n}", category=1, owner_id=7 if n % 4 else 8) for n in range(1, 31)])
+    session.commit()
+
+
+def ids(page):
+    return [item.id for item in page.items]
+
+
+def test_pages_walk_forward_and_back_with_one_query_each(session, statements):
+    own = [n for n in range(1, 31) if n % 4]
+
+    pages = [read_items_page(session, 7, limit=10)]
+    while pages[-1].has_next:
+        pages.append(read_items_page(session, 7, limit=10, after_id=pages[-1].items[-1].id))
+    assert [ids(page) for page in pages] == [own[:10], own[10:20], own[20:]]
+    assert [(page.has_previous, page.has_next) for page in pages] == [(False, True), (True, True), (True, False)]
+    assert len(statements) == 3
+
+    back = read_items_page(session, 7, limit=10, before_id=pages[-1].items[0].id)
+    assert ids(back) == own[10:20] and back.has_previous and back.has_next
+    first = read_items_page(session, 7, limit=10, before_id=back.items[0].id)
+    assert ids(first) == own[:10] and not first.has_previous and first.has_next
+
+
+def test_deleted_items_do_not_shift_pages(session):
+    first = read_items_page(session, 7, limit=5)
+    delete_item(session, first.items[0].id)
+    # The cursor is an id, not an offset: the next page starts where the first one ended
+    assert ids(read_items_page(session, 7, limit=5, after_id=first.items[-1].id))[0] == 7
+
+
+def test_page_buttons_carry_the_cursor(session):
+    page = read_items_page(session, 7, limit=3, after_id=3)
+    markup = create_items_list_markup("en", page.items, page.has_previous, page.has_next)
+    rows = [[button.callback_data for button in row] for row in markup.keyboard]
+    assert rows == [["view_item_5"], ["view_item_6"], ["view_item_7"], ["my_items_b5", "my_items_a7"], ["menu"]]
+
+    markup = create_items_list_markup("en", page.items)
+    assert [[button.callback_data for button in row] for row in markup.keyboard][-2:] == [["view_item_7"], ["menu"]]
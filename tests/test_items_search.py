@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.export import reflect_tables
+from app.database.migrate import migrate
+from app.items.markup import create_search_results_markup
+from app.items.search import search_items, search_terms
+from app.items.service import create_item, delete_item, update_item
+from app.users.models import User
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/bot.db")
+    migrate(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([User(id=7, username="ann"), User(id=8, username="bob")])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def names(page):
+    return [item.name for item in page.items]
+
+
+def test_results_are_ranked_and_owner_scoped(session):
+    create_item(session, name="Shopping", content="milk, bread and groceries for the week", category=1, owner_id=7)
+    create_item(session, name="Groceries", content="milk", category=1, owner_id=7)
+    create_item(session, name="Groceries of Bob", content="milk", category=1, owner_id=8)
+    create_item(session, name="Покупки", content="молоко и хлеб", category=1, owner_id=7)
+
+    # Matches in the name rank first, case does not matter
+    assert names(search_items(session, 7, "GROCERIES")) == ["Groceries", "Shopping"]
+    assert names(search_items(session, 7, "milk groceries")) == ["Groceries", "Shopping"]
+    assert names(search_items(session, 7, "Молоко")) == ["Покупки"]
+    assert names(search_items(session, 7, "grocer")) == []
+    assert names(search_items(session, 8, "groceries")) == ["Groceries of Bob"]
+    assert names(search_items(session, 7, "milk tea")) == []
+
+
+def test_query_syntax_is_not_interpreted(session):
+    create_item(session, name="notes", content="a OR b", category=1, owner_id=7)
+    assert search_terms('"notes" AND (b* OR NEAR') == ["notes", "and", "b", "or", "near"]
+    assert names(search_items(session, 7, 'notes" OR (')) == ["notes"]
+    assert search_items(session, 7, '"*()').items == []
+
+
+def test_index_follows_updates_and_deletes(session):
+    item = create_item(session, name="draft", content="first version", category=1, owner_id=7)
+    update_item(session, item.id, name="final", content="second version", category=1)
+    assert names(search_items(session, 7, "draft")) == [] and names(search_items(session, 7, "second")) == ["final"]
+
+    delete_item(session, item.id)
+    assert search_items(session, 7, "final").items == []
+
+
+def test_results_are_paged(session):
+    for n in range(25):
+        create_item(session, name=f"note {n}", content="todo", category=1, owner_id=7)
+
+    pages = [search_items(session, 7, "todo", offset=offset, limit=10) for offset in (0, 10, 20)]
+    assert [len(page.items) for page in pages] == [10, 10, 5]
+    assert [(page.has_previous, page.has_next) for page in pages] == [(False, True), (True, True), (True, False)]
+    assert len({item.id for page in pages for item in page.items}) == 25
+
+    markup = create_search_results_markup("en", pages[1].items, 10, 10, True, True)
+    assert [button.callback_data for button in markup.keyboard[-2]] == ["search_0", "search_20"]
+
+
+def test_search_index_is_not_exported(session):
+    tables = [table.name for table in reflect_tables(session.get_bind())]
+    assert "items" in tables and not any(name.startswith("items_fts") for name in tables)
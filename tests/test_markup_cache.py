@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import pytest
+from telebot import TeleBot
+
+from app.catalog import catalog
+from app.dispatch.fake_telegram import FakeTelegramApi
+from app.items.markup import create_items_list_markup
+from app.markup_cache import cached_markup, markup_cache
+from app.menu.markup import create_menu_markup
+
+
+def test_markups_are_built_and_serialized_once_per_lang():
+    markup = create_menu_markup("en")
+
+    assert create_menu_markup("en") is markup
+    assert create_menu_markup("ru") is not markup
+    assert markup.to_json() == create_menu_markup.uncached("en").to_json()
+    with pytest.raises(TypeError):
+        markup.add()
+
+    fake_api = FakeTelegramApi().install()
+    try:
+        TeleBot("1234567890:" + "A" * 35, threaded=False).send_message(1, "menu", reply_markup=markup)
+    finally:
+        FakeTelegramApi.uninstall()
+    assert fake_api.calls_to("sendMessage")[0]["reply_markup"] == markup.to_json()
+
+
+def test_catalog_reload_clears_the_cache():
+    markup = create_menu_markup("en")
+    hits = markup_cache.hits
+    assert create_menu_markup("en") is markup and markup_cache.hits == hits + 1
+
+    catalog.reload()
+    assert len(markup_cache) == 0
+    assert create_menu_markup("en") is not markup
+
+
+def test_dynamic_markups_opt_in_per_parameter_set():
+    items = [SimpleNamespace(id=1, name="first"), SimpleNamespace(id=2, name="second")]
+    markup = create_items_list_markup("en", items)
+    assert create_items_list_markup("en", list(items)) is markup
+    assert create_items_list_markup("en", items[:1]) is not markup
+
+    built = []
+
+    @cached_markup(key=lambda lang, page: (lang, page) if page == 0 else None)
+    def create_page_markup(lang, page):
+        built.append(page)
+        return create_menu_markup.uncached(lang)
+
+    for page in (0, 0, 1, 1):
+        create_page_markup("en", page)
+    assert built == [0, 1, 1]
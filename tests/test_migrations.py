@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import create_engine, event, func, inspect, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database.migrate import Migration, current_version, discover_migrations, migrate
+from app.items.data import init_item_categories_table
+from app.items.models import ItemCategory
+from app.users.data import init_roles_table
+from app.users.models import Role
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/bot.db")
+    yield engine
+    engine.dispose()
+
+
+def test_fresh_database_is_migrated_and_seeded(engine):
+    applied = migrate(engine)
+    assert [migration.version for migration in applied] == [m.version for m in discover_migrations()]
+    assert {"users", "items", "chatgpt_messages", "schema_version"} <= set(inspect(engine).get_table_names())
+    with sessionmaker(bind=engine)() as session:
+        assert session.scalars(select(Role.name).order_by(Role.id)).all() == ["superuser", "admin", "user"]
+        assert session.scalar(select(func.count()).select_from(ItemCategory)) == 2
+
+
+def test_restart_only_checks_the_version(engine):
+    migrate(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert migrate(engine) == []
+    assert not any(statement.lstrip().upper().startswith(("CREATE", "INSERT", "DROP")) for statement in statements)
+
+
+def test_seeding_is_idempotent_and_keeps_data(engine):
+    migrate(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        session.add(ItemCategory(id=3, name="Custom"))
+        session.commit()
+        init_roles_table(session)
+        init_item_categories_table(session)
+        assert session.scalar(select(func.count()).select_from(Role)) == 3
+        assert session.scalar(select(func.count()).select_from(ItemCategory)) == 3
+
+
+def test_pending_migrations_run_in_order_and_failures_roll_back(engine):
+    def create_notes(connection):
+        connection.execute(text("CREATE TABLE notes (id INTEGER PRIMARY KEY)"))
+
+    def add_column(connection):
+        connection.execute(text("ALTER TABLE notes ADD COLUMN body TEXT"))
+
+    def broken(connection):
+        connection.execute(text("INSERT INTO notes (id) VALUES (1)"))
+        raise RuntimeError("broken migration")
+
+    migrations = [Migration(1, "notes", create_notes)]
+    assert len(migrate(engine, migrations)) == 1
+    migrations += [Migration(2, "body", add_column), Migration(3, "broken", broken)]
+    with pytest.raises(RuntimeError):
+        migrate(engine, migrations)
+
+    with engine.connect() as connection:
+        assert current_version(connection) == 2
+        assert connection.execute(text("SELECT count(*) FROM notes")).scalar() == 0
+    assert "body" in [column["name"] for column in inspect(engine).get_columns("notes")]
+
+
+def test_indexes_are_added_to_existing_databases(engine):
+    migrate(engine, discover_migrations()[:2])
+    with engine.begin() as connection:
+        # A database created before the indexes were declared on the models
+        for name in ("ix_items_owner_id_id", "ix_users_username", "ix_chatgpt_messages_chat_id_created_at"):
+            connection.execute(text(f"DROP INDEX {name}"))
+
+    assert [migration.name for migration in migrate(engine)] == ["hot_path_indexes", "items_keyset_index", "items_search"]
+    indexes = {index["name"] for table in ("items", "users") for index in inspect(engine).get_indexes(table)}
+    assert {"ix_items_owner_id_id", "ix_users_username"} <= indexes
+    # Replaced by the (owner_id, id) index
+    assert "ix_items_owner_id" not in indexes
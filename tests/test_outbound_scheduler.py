@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from telebot import TeleBot
+from telebot.async_telebot import AsyncTeleBot
+
+from app.dispatch.asyncio_bridge import SyncBotBridge
+from app.dispatch.fake_telegram import FakeTelegramApi
+from app.metrics import metrics
+from app.outbound.scheduler import BULK, OutboundScheduler, send_lane
+
+
+@pytest.fixture
+def fake_api():
+    fake_api = FakeTelegramApi().install()
+    yield fake_api
+    FakeTelegramApi.uninstall()
+
+
+def create_bot(scheduler):
+    return scheduler.install(TeleBot("1234567890:" + "A" * 35, threaded=False))
+
+
+def test_interactive_sends_overtake_bulk_sends(fake_api):
+    scheduler = OutboundScheduler(global_rate=20, chat_rate=100, chat_burst=100)
+    bot = create_bot(scheduler)
+
+    def broadcast(chat_id):
+        with send_lane(BULK):
+            bot.send_message(chat_id, "bulk")
+
+    threads = [threading.Thread(target=broadcast, args=(1000 + i,)) for i in range(40)]
+    try:
+        for thread in threads:
+            thread.start()
+        while len(scheduler.lanes[BULK]) < 10:
+            time.sleep(0.001)
+        bot.send_message(1, "reply")
+        texts = [call["text"] for call in fake_api.calls_to("sendMessage")]
+        assert texts.count("bulk") < 30
+    finally:
+        for thread in threads:
+            thread.join()
+        scheduler.close()
+    assert len(fake_api.calls_to("sendMessage")) == 41
+
+
+def test_per_chat_rate_and_retry_after(fake_api):
+    scheduler = OutboundScheduler(global_rate=100, chat_rate=10, chat_burst=1)
+    bot = create_bot(scheduler)
+    try:
+        started = time.monotonic()
+        for text in "abc":
+            bot.send_message(5, text)
+        assert time.monotonic() - started >= 0.19
+        # Edits take the chat id as second argument
+        bot.edit_message_text("edited", 5, 1)
+        assert scheduler.chat_buckets.keys() == {5}
+
+        retries = metrics.counter("outbound.retry_after_total")
+        fake_api.add_flood("sendMessage", retry_after=1)
+        started = time.monotonic()
+        assert bot.send_message(6, "after flood").text == "after flood"
+        assert time.monotonic() - started >= 1
+        assert metrics.counter("outbound.retry_after_total") == retries + 1
+        assert [call["text"] for call in fake_api.calls_to("sendMessage")][-2:] == ["after flood"] * 2
+    finally:
+        scheduler.close()
+
+
+class FloodError(Exception):
+    error_code = 429
+    result_json = {"parameters": {"retry_after": 1}}
+
+
+def bulk_waits() -> int:
+    return metrics.snapshot().get("outbound.wait_seconds.bulk", {}).get("count", 0)
+
+
+def test_async_sends_are_rate_limited_on_the_loop():
+    async def scenario(scheduler):
+        bot = AsyncTeleBot("1234567890:" + "A" * 35)
+        sent = []
+        floods = ["after flood"]
+
+        async def send_message(chat_id, text, **kwargs):
+            if text in floods:
+                floods.remove(text)
+                raise FloodError()
+            sent.append(text)
+            return text
+
+        bot.send_message = send_message
+        scheduler.install(bot)
+
+        started = time.monotonic()
+        # Chats sent to at once do not wait for each other, one chat waits for its rate
+        await asyncio.gather(*(bot.send_message(5, text) for text in "abc"), bot.send_message(6, "d"))
+        assert time.monotonic() - started >= 0.19
+        assert sent.index("d") < 2
+
+        started = time.monotonic()
+        assert await bot.send_message(7, "after flood") == "after flood"
+        assert time.monotonic() - started >= 1
+
+        # Sends of the bridge's threads keep their lane
+        bridge = SyncBotBridge(bot, max_workers=1)
+        bridge.bind_loop(asyncio.get_running_loop())
+        waits = bulk_waits()
+
+        def broadcast():
+            with send_lane(BULK):
+                return bridge.send_message(8, "bulk")
+
+        assert await asyncio.to_thread(broadcast) == "bulk"
+        assert bulk_waits() == waits + 1
+        bridge.shutdown()
+
+    scheduler = OutboundScheduler(global_rate=100, chat_rate=10, chat_burst=1)
+    retries = metrics.counter("outbound.retry_after_total")
+    try:
+        asyncio.run(scenario(scheduler))
+    finally:
+        scheduler.close()
+    assert metrics.counter("outbound.retry_after_total") == retries + 1
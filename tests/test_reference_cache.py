@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import inspect
+
+from app.items.data import init_item_categories_table
+from app.items.models import Item, ItemCategory
+from app.items.service import read_item, read_item_categories, read_item_category
+from app.reference_cache import reference_cache
+from app.users.models import Role, User
+from app.users.service import read_role
+
+
+@pytest.fixture(autouse=True)
+def reference_rows(session_factory, monkeypatch):
+    with session_factory() as session:
+        session.add_all([Role(id=0, name="superuser"), Role(id=2, name="user")])
+        session.add_all([ItemCategory(id=1, name="Notes"), ItemCategory(id=2, name="Tasks")])
+        session.add(User(id=7, role_id=2))
+        session.add(Item(id=1, name="milk", category=2, owner_id=7))
+        session.commit()
+    monkeypatch.setattr(reference_cache, "session_factory", session_factory)
+    reference_cache.invalidate()
+    yield
+    reference_cache.invalidate()
+
+
+def test_rows_are_read_once(session_factory, statements):
+    reference_cache.load()
+    assert len(statements) == 2
+
+    with session_factory() as session:
+        assert [category.name for category in read_item_categories(session)] == ["Notes", "Tasks"]
+        assert read_item_category(session, 2).name == "Tasks" and read_item_category(session, 3) is None
+        assert read_role(session, 0).name == "superuser"
+    assert len(statements) == 2
+
+
+def test_committed_writes_drop_the_rows(session_factory):
+    with session_factory() as session:
+        assert len(read_item_categories(session)) == 2
+
+        session.add(ItemCategory(id=3, name="Ideas"))
+        session.flush()
+        session.rollback()
+        assert len(read_item_categories(session)) == 2
+
+        session.add(ItemCategory(id=3, name="Ideas"))
+        session.commit()
+        assert read_item_category(session, 3).name == "Ideas"
+
+        # Bulk upserts, as run by the seeding migration
+        init_item_categories_table(session)
+        session.commit()
+        assert reference_cache.cached(ItemCategory) is None
+
+
+def test_cached_rows_are_detached_copies(session_factory):
+    with session_factory() as session:
+        category = read_item_category(session, 1)
+        assert inspect(category).detached and category not in session
+    # Usable once the session that read them is closed
+    assert category.name == "Notes"
+
+
+def test_item_is_read_with_its_category_in_one_query(session_factory, statements):
+    with session_factory() as session:
+        item = read_item(session, 1)
+        assert item.item_category.name == "Tasks"
+        assert len(statements) == 1
+        assert read_item(session, 1) is item
+        assert len(statements) == 1
+
+
+def test_rows_read_stay_usable_when_invalidated_meanwhile(session_factory, monkeypatch):
+    put = reference_cache._put
+
+    def put_then_invalidate(model, rows):
+        entry = put(model, rows)
+        # A writer commits right after the rows are read
+        reference_cache.invalidate()
+        return entry
+
+    monkeypatch.setattr(reference_cache, "_put", put_then_invalidate)
+    with session_factory() as session:
+        assert read_item_category(session, 2).name == "Tasks"
+        assert [role.name for role in reference_cache.rows(Role, session)] == ["superuser", "user"]
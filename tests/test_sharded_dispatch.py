@@ -0,0 +1,47 @@
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from telebot import TeleBot
+
+from app.dispatch.sharded import ShardedWorkerPool, update_shard_key
+
+
+def make_message(chat_id: int, seq: int):
+    return SimpleNamespace(chat=SimpleNamespace(id=chat_id), from_user=SimpleNamespace(id=chat_id), seq=seq)
+
+
+def test_update_shard_key_resolves_chat_of_callbacks():
+    call = SimpleNamespace(message=SimpleNamespace(chat=SimpleNamespace(id=7)), from_user=SimpleNamespace(id=9))
+    inline_query = SimpleNamespace(from_user=SimpleNamespace(id=9))
+    assert update_shard_key(call) == 7
+    assert update_shard_key(inline_query) == 9
+    assert update_shard_key(object()) is None
+
+
+def test_updates_of_one_chat_stay_ordered():
+    bot = TeleBot("1234567890:" + "A" * 35, threaded=False)
+    pool = ShardedWorkerPool(bot, num_workers=4)
+    handled: dict[int, list[int]] = {}
+    lock = threading.Lock()
+    done = threading.Event()
+    total = 10 * 20
+
+    def handler(message):
+        time.sleep(random.random() / 1000)
+        with lock:
+            handled.setdefault(message.chat.id, []).append(message.seq)
+            if sum(len(seqs) for seqs in handled.values()) == total:
+                done.set()
+
+    try:
+        for seq in range(20):
+            for chat_id in range(10):
+                pool.put(handler, make_message(chat_id, seq))
+        assert done.wait(10)
+    finally:
+        pool.close()
+
+    assert all(seqs == list(range(20)) for seqs in handled.values())
+    assert pool.queue_depths() == [0, 0, 0, 0]
@@ -0,0 +1,54 @@
+import sys
+from types import SimpleNamespace
+
+from telebot import TeleBot
+
+from app.plugins.lazy import LazyObject
+from app.startup import ImportProfiler
+
+
+def test_plugins_register_without_importing_their_dependencies():
+    from app.chatgpt.handlers import chatgpt_service
+    from app.chatgpt.handlers import register_handlers as chatgpt_handlers
+    from app.google_sheets.handlers import google_sheets
+    from app.google_sheets.handlers import register_handlers as google_sheets_handlers
+    from app.yt_dlp.handlers import register_handlers as ydl_handlers
+
+    bot = TeleBot("1234567890:" + "A" * 35, threaded=False)
+    for register in (google_sheets_handlers, ydl_handlers, chatgpt_handlers):
+        register(bot)
+
+    assert bot.callback_query_handlers and bot.message_handlers
+    assert not chatgpt_service.loaded and not google_sheets.loaded
+    # Only the plugins use these, other tests may import pandas or PIL
+    assert not {"markitdown", "gspread", "yt_dlp"} & set(sys.modules)
+
+
+def test_lazy_object_builds_once_on_first_use():
+    built = []
+    lazy = LazyObject(lambda: built.append(1) or SimpleNamespace(answer=42))
+    lazy.on_load(lambda instance: setattr(instance, "ready", True))
+
+    assert not lazy.loaded and not built
+    assert lazy.answer == 42 and lazy.ready
+    assert lazy.answer == 42
+    assert lazy.loaded and built == [1]
+
+
+def test_import_profiler_records_module_imports(tmp_path, monkeypatch):
+    (tmp_path / "startup_probe_outer.py").write_text("import startup_probe_inner\n")
+    (tmp_path / "startup_probe_inner.py").write_text("import time\ntime.sleep(0.05)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    profiler = ImportProfiler().install()
+    try:
+        import startup_probe_outer  # noqa: F401
+    finally:
+        profiler.uninstall()
+        sys.modules.pop("startup_probe_outer", None)
+        sys.modules.pop("startup_probe_inner", None)
+
+    outer, inner = profiler.imports["startup_probe_outer"], profiler.imports["startup_probe_inner"]
+    assert inner.cumulative >= 0.05
+    assert outer.cumulative >= inner.cumulative and outer.self_time < inner.cumulative
+    assert profiler.slowest(2)[0].name == "startup_probe_outer"
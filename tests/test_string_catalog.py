@@ -0,0 +1,72 @@
+import pickle
+
+import pytest
+from omegaconf import OmegaConf
+
+from app.catalog import StringCatalog, Template, catalog
+
+
+def write_config(path, strings):
+    path.mkdir()
+    OmegaConf.save(OmegaConf.create({"app": {"name": path.name}, "strings": strings}), path / "config.yaml")
+
+
+def test_feature_strings_match_their_config_files():
+    from app.menu.markup import strings
+
+    config = OmegaConf.load(catalog.root / "menu" / "config.yaml")
+    assert strings is catalog.strings("menu")
+    for lang in ("en", "ru"):
+        assert strings[lang].main_menu.title == config.strings[lang].main_menu.title
+        assert [option.value for option in strings[lang].main_menu.options] == [
+            option.value for option in config.strings[lang].main_menu.options
+        ]
+    assert catalog.config("public_message").app.timezone == "Europe/Paris"
+
+
+def test_missing_keys_and_languages_fall_back_to_english(tmp_path):
+    write_config(
+        tmp_path / "greet",
+        {"en": {"hello": "Hello", "bye": "Bye", "menu": {"title": "Menu"}}, "ru": {"hello": "Привет", "menu": {}}},
+    )
+    strings = StringCatalog(tmp_path).strings("greet")
+
+    assert strings["ru"].hello == "Привет"
+    assert strings["ru"].bye == "Bye" and strings["ru"].menu.title == "Menu"
+    assert strings["de"].hello == "Hello"
+    with pytest.raises(AttributeError):
+        strings["en"].missing
+    with pytest.raises(AttributeError):
+        strings["en"].hello = "Hi"
+
+
+def test_templates_format_like_str_format():
+    template = Template("User `{user_id}` is {state!r} since {days:>3} days, {user_id}")
+    expected = str.format(template, user_id=5, state="blocked", days=7)
+    assert template.format(user_id=5, state="blocked", days=7, unused=1) == expected
+    assert "format" in template.__dict__
+
+    with pytest.raises(KeyError):
+        template.format(state="blocked", days=7)
+    with pytest.raises(KeyError):
+        template.format(5, "blocked", 7)
+    assert Template("{a}{b!s}{c!a}").format(a="é", b=1, c="é") == "é1'\\xe9'"
+
+    # Positional and attribute fields keep str.format
+    assert Template("{} and {}").format(1, 2) == "1 and 2"
+    assert Template("{0.real}").format(3) == "3"
+    assert pickle.loads(pickle.dumps(template)) == template
+
+
+def test_reload_updates_tables_in_place(tmp_path):
+    write_config(tmp_path / "greet", {"en": {"hello": "Hello"}})
+    string_catalog = StringCatalog(tmp_path)
+    strings = string_catalog.strings("greet")
+    reloads = []
+    string_catalog.on_reload(lambda reloaded: reloads.append(reloaded.version))
+
+    OmegaConf.save(OmegaConf.create({"strings": {"en": {"hello": "Hi"}}}), tmp_path / "greet" / "config.yaml")
+    string_catalog.reload()
+
+    assert strings["en"].hello == "Hi"
+    assert reloads == [1]
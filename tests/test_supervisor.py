@@ -0,0 +1,228 @@
+import functools
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from telebot import TeleBot
+from telebot.types import Update
+
+import app.items.models  # noqa: F401
+from app.dispatch.fake_telegram import make_message_update
+from app.dispatch.supervisor import Supervisor, publish, subscribe
+from app.models import Base
+from app.users.activity import ActivityTracker
+from app.users.models import User
+
+
+def create_recording_bot(path):
+    """Bot factory for the workers: append `pid user text` to a file for every message."""
+    bot = TeleBot("1234567890:" + "A" * 35, threaded=False)
+
+    @bot.message_handler(func=lambda message: True)
+    def record(message):
+        with open(path, "a") as output:
+            output.write(f"{os.getpid()} {message.from_user.id} {message.text}\n")
+
+    return bot
+
+
+def create_hanging_bot(path):
+    """Bot factory for the workers: like create_recording_bot, but the message "hang" never returns."""
+    bot = create_recording_bot(path)
+
+    @bot.message_handler(func=lambda message: message.text == "hang")
+    def hang(message):
+        time.sleep(3600)
+
+    bot.message_handlers.insert(0, bot.message_handlers.pop())
+    return bot
+
+
+def create_slow_bot(path):
+    """Bot factory for the workers: like create_recording_bot, but the message "slow" takes 3 seconds."""
+    bot = create_recording_bot(path)
+
+    @bot.message_handler(func=lambda message: message.text == "slow")
+    def slow(message):
+        time.sleep(3)
+        with open(path, "a") as output:
+            output.write(f"{os.getpid()} {message.from_user.id} {message.text}\n")
+
+    bot.message_handlers.insert(0, bot.message_handlers.pop())
+    return bot
+
+
+def create_tracking_bot(path, database):
+    """Bot factory for the workers: like create_recording_bot, also recording the activity of the users."""
+    bot = create_recording_bot(path)
+    tracker = ActivityTracker(sessionmaker(bind=create_engine(f"sqlite:///{database}")), flush_interval=3600)
+
+    @bot.message_handler(func=lambda message: message.text == "touch")
+    def touch(message):
+        tracker.touch(message.from_user.id, datetime(2025, 1, 1))
+        with open(path, "a") as output:
+            output.write(f"{os.getpid()} {message.from_user.id} {message.text}\n")
+
+    bot.message_handlers.insert(0, bot.message_handlers.pop())
+    return bot
+
+
+def create_broadcasting_bot(path):
+    """Bot factory for the workers: publish the text of every message, record the broadcasts received."""
+    bot = TeleBot("1234567890:" + "A" * 35, threaded=False)
+
+    def record(text):
+        with open(path, "a") as output:
+            output.write(f"{os.getpid()} - {text}\n")
+
+    subscribe("note", record)
+
+    @bot.message_handler(func=lambda message: True)
+    def send(message):
+        publish("note", message.text)
+
+    return bot
+
+
+def wait_for_lines(path, count, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if path.exists() and len(lines := path.read_text().splitlines()) >= count:
+            return [line.split() for line in lines]
+        time.sleep(0.05)
+    raise AssertionError(f"Expected {count} handled updates in {timeout}s")
+
+
+def test_supervisor_keeps_users_on_one_worker_and_restarts_dead_workers(tmp_path):
+    path = tmp_path / "handled.txt"
+    supervisor = Supervisor(functools.partial(create_recording_bot, str(path)), num_workers=2, health_timeout=10)
+    supervisor.start()
+    try:
+        updates = [Update.de_json(make_message_update(i, 100 + i % 4, str(i))) for i in range(40)]
+        for update in updates:
+            assert supervisor.submit(update)
+
+        lines = wait_for_lines(path, 40)
+        pids_by_user = {}
+        texts_by_user = {}
+        for pid, user, text in lines:
+            pids_by_user.setdefault(user, set()).add(pid)
+            texts_by_user.setdefault(user, []).append(int(text))
+        assert all(len(pids) == 1 for pids in pids_by_user.values())
+        assert all(texts == sorted(texts) for texts in texts_by_user.values())
+        assert len({pid for pids in pids_by_user.values() for pid in pids}) == 2
+
+        worker = supervisor.workers[supervisor.worker_for(updates[0])]
+        old_pid = worker.process.pid
+        worker.process.kill()
+        worker.process.join()
+        assert supervisor.submit(Update.de_json(make_message_update(100, 100, "after-restart")))
+
+        pid, user, text = wait_for_lines(path, 41)[-1]
+        assert (user, text) == ("100", "after-restart")
+        assert int(pid) == worker.process.pid != old_pid
+    finally:
+        supervisor.stop()
+
+
+def test_supervisor_restarts_a_worker_whose_handler_hangs(tmp_path):
+    path = tmp_path / "handled.txt"
+    supervisor = Supervisor(
+        functools.partial(create_hanging_bot, str(path)), num_workers=1, health_timeout=10, handler_timeout=2
+    )
+    supervisor.start()
+    try:
+        assert supervisor.submit(Update.de_json(make_message_update(1, 100, "before")))
+        pid, _, _ = wait_for_lines(path, 1)[0]
+        worker = supervisor.workers[0]
+        old_pid = worker.process.pid
+        assert supervisor.submit(Update.de_json(make_message_update(2, 100, "hang")))
+
+        deadline = time.monotonic() + 30
+        while worker.process.pid == old_pid and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert worker.process.pid != old_pid
+        assert supervisor.submit(Update.de_json(make_message_update(3, 100, "after")))
+
+        new_pid, user, text = wait_for_lines(path, 2)[-1]
+        assert (user, text) == ("100", "after")
+        assert int(pid) == old_pid and int(new_pid) == worker.process.pid
+    finally:
+        supervisor.stop()
+
+
+def test_slow_updates_keep_the_worker_and_other_chats_going(tmp_path):
+    path = tmp_path / "handled.txt"
+    supervisor = Supervisor(
+        functools.partial(create_slow_bot, str(path)), num_workers=1, health_timeout=2, handler_threads=2
+    )
+    supervisor.start()
+    try:
+        worker = supervisor.workers[0]
+        assert supervisor.submit(Update.de_json(make_message_update(1, 100, "slow")))
+        assert supervisor.submit(Update.de_json(make_message_update(2, 101, "fast")))
+
+        # The other chat's shard is not held up by the slow update
+        assert wait_for_lines(path, 1, timeout=2.5)[0][1:] == ["101", "fast"]
+        old_pid = worker.process.pid
+        lines = wait_for_lines(path, 2)
+        assert lines[1][1:] == ["100", "slow"]
+        # Heartbeats went on while the update ran longer than health_timeout
+        assert worker.process.pid == old_pid and worker.process.is_alive()
+    finally:
+        supervisor.stop()
+
+
+def test_terminated_workers_write_the_pending_activity(tmp_path):
+    path = tmp_path / "handled.txt"
+    database = tmp_path / "bot.db"
+    engine = create_engine(f"sqlite:///{database}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add(User(id=100, last_message_timestamp=datetime(2024, 1, 1)))
+        session.commit()
+
+    supervisor = Supervisor(functools.partial(create_tracking_bot, str(path), str(database)), num_workers=1)
+    supervisor.start()
+    try:
+        assert supervisor.submit(Update.de_json(make_message_update(1, 100, "touch")))
+        wait_for_lines(path, 1)
+        # As for a stuck worker, or a container stop
+        supervisor._terminate(supervisor.workers[0])
+        assert supervisor.workers[0].process.exitcode == 0
+    finally:
+        supervisor.stop()
+    with sessionmaker(bind=engine)() as session:
+        assert session.get(User, 100).last_message_timestamp == datetime(2025, 1, 1)
+
+
+def test_published_messages_reach_the_other_workers(tmp_path):
+    path = tmp_path / "handled.txt"
+    supervisor = Supervisor(functools.partial(create_broadcasting_bot, str(path)), num_workers=3)
+    supervisor.start()
+    try:
+        update = Update.de_json(make_message_update(1, 100, "hello"))
+        assert supervisor.submit(update)
+
+        lines = wait_for_lines(path, 2)
+        time.sleep(0.5)
+        assert len(path.read_text().splitlines()) == 2
+        sender = supervisor.workers[supervisor.worker_for(update)].process.pid
+        others = {worker.process.pid for worker in supervisor.workers} - {sender}
+        assert {int(pid) for pid, _, _ in lines} == others
+        assert {text for _, _, text in lines} == {"hello"}
+
+        # A restarted worker gets a new pipe
+        restarted = next(worker for worker in supervisor.workers if worker.process.pid in others)
+        old_pid = restarted.process.pid
+        restarted.process.kill()
+        deadline = time.monotonic() + 30
+        while not (restarted.is_alive() and restarted.process.pid != old_pid) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert supervisor.submit(Update.de_json(make_message_update(2, 100, "again")))
+        lines = wait_for_lines(path, 4)[2:]
+        assert {int(pid) for pid, _, _ in lines} == others - {old_pid} | {restarted.process.pid}
+    finally:
+        supervisor.stop()
@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from telebot import TeleBot, apihelper
+from telebot.apihelper import ApiHTTPException
+
+from app.dispatch.fake_telegram import FAKE_BOT_USER
+from app.outbound.transport import PooledTransport
+
+
+class StubBotApi(BaseHTTPRequestHandler):
+    """Keep-alive stub of the Bot API recording the client port of each request."""
+
+    protocol_version = "HTTP/1.1"
+    client_ports: list[int] = []
+
+    def do_POST(self):
+        self.client_ports.append(self.client_address[1])
+        if "/sendChatAction" in self.path:
+            time.sleep(0.5)
+        if "/getChat" in self.path:
+            body = b"Bad Gateway"
+            self.send_response(502)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        result = FAKE_BOT_USER if "/getMe" in self.path else True
+        body = json.dumps({"ok": True, "result": result}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubBotApi)
+    StubBotApi.client_ports = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(apihelper, "API_URL", f"http://127.0.0.1:{server.server_port}/bot{{0}}/{{1}}")
+    monkeypatch.setattr(apihelper, "CONNECT_TIMEOUT", apihelper.CONNECT_TIMEOUT)
+    monkeypatch.setattr(apihelper, "READ_TIMEOUT", apihelper.READ_TIMEOUT)
+    yield server
+    server.shutdown()
+
+
+def test_pooled_transport_reuses_connections_across_threads(stub_api):
+    transport = PooledTransport(pool_maxsize=4, read_timeout=0.2).install()
+    bot = TeleBot("1234567890:" + "A" * 35, threaded=False)
+    try:
+        threads = [threading.Thread(target=lambda: [bot.get_me() for _ in range(10)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = transport.stats()
+        assert stats["requests"] == 40
+        assert stats["connections_opened"] == len(set(StubBotApi.client_ports)) <= 4
+        assert stats["reuse_ratio"] >= 0.9
+
+        # The stub answers sendChatAction after the read timeout
+        with pytest.raises(Exception, match="timed out"):
+            bot.send_chat_action(1, "typing")
+    finally:
+        transport.close()
+    assert apihelper.CUSTOM_REQUEST_SENDER is None
+
+
+@pytest.mark.parametrize("http2", [False, True])
+def test_error_responses_raise_the_api_error(stub_api, http2):
+    if http2:
+        pytest.importorskip("httpx")
+        pytest.importorskip("h2")
+    transport = PooledTransport(http2=http2).install()
+    bot = TeleBot("1234567890:" + "A" * 35, threaded=False)
+    try:
+        with pytest.raises(ApiHTTPException, match="Bad Gateway") as error:
+            bot.get_chat(1)
+        assert error.value.result.status_code == 502
+        if http2:
+            with pytest.raises(ValueError, match="proxy"):
+                transport("get", apihelper.API_URL.format("token", "getMe"), proxies={"https": "http://proxy:3128"})
+    finally:
+        transport.close()
@@ -0,0 +1,106 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.middleware.database import close_session
+from app.middleware.user import UserCallbackMiddleware
+from app.users.activity import activity_tracker
+from app.users.cache import UserCache, UserIdentity, user_cache
+from app.users.models import Role, User
+from app.users.service import update_user
+
+
+@pytest.fixture(autouse=True)
+def roles(session_factory, monkeypatch):
+    with session_factory() as session:
+        session.add_all([Role(id=0, name="admin"), Role(id=1, name="user")])
+        session.commit()
+    user_cache.clear()
+    monkeypatch.setattr(activity_tracker, "session_factory", session_factory)
+    yield
+    activity_tracker.flush()
+    user_cache.clear()
+
+
+def make_callback(user_id, first_name="Ann"):
+    from_user = SimpleNamespace(id=user_id, username="ann", first_name=first_name, last_name=None)
+    return SimpleNamespace(id="1", from_user=from_user, data="menu")
+
+
+def process(middleware, session_factory, callback):
+    session = session_factory()
+    data = {"db_session": session, "state": SimpleNamespace(get=lambda: None)}
+    middleware.pre_process(callback, data)
+    close_session(session, None)
+    return data["user"]
+
+
+def test_cache_hit_reaches_the_handler_without_queries(session_factory, statements):
+    middleware = UserCallbackMiddleware(bot=None)
+    user = process(middleware, session_factory, make_callback(7))
+    assert user.id == 7 and user.lang == "en" and not user.is_blocked
+
+    statements.clear()
+    assert process(middleware, session_factory, make_callback(7)) is user
+    assert statements == []
+
+    # A new profile name is written to the database
+    assert process(middleware, session_factory, make_callback(7, first_name="Anna")).first_name == "Anna"
+    assert statements
+
+
+def test_update_user_invalidates_the_cached_record(session_factory):
+    middleware = UserCallbackMiddleware(bot=None)
+    process(middleware, session_factory, make_callback(7))
+
+    with session_factory() as session:
+        update_user(session, "7", lang="ru")
+    assert user_cache.get(7) is None
+    assert process(middleware, session_factory, make_callback(7)).lang == "ru"
+
+
+def test_user_is_cached_once_committed(session_factory):
+    middleware = UserCallbackMiddleware(bot=None)
+    session = session_factory()
+
+    def failed_commit():
+        raise OperationalError("COMMIT", {}, Exception("database is locked"))
+
+    session.commit = failed_commit
+    data = {"db_session": session, "state": SimpleNamespace(get=lambda: None)}
+    with pytest.raises(OperationalError):
+        middleware.pre_process(make_callback(7), data)
+    assert user_cache.get(7) is None
+    session.close()
+
+    with session_factory() as session:
+        assert session.get(User, 7) is None
+    assert process(middleware, session_factory, make_callback(7)) is user_cache.get(7)
+
+
+def test_entries_expire_and_least_recently_seen_are_dropped():
+    cache = UserCache(ttl=0.05, maxsize=2)
+    for user_id in (1, 2, 3):
+        cache.put(UserIdentity(id=user_id, lang="en"))
+        if user_id == 2:
+            assert cache.get(1).lang == "en"
+
+    assert cache.get(2) is None and cache.get(3) is not None
+    time.sleep(0.06)
+    assert cache.get(1) is None
+    assert cache.hits == 2 and cache.misses == 2 and cache.hit_ratio() == 0.5
+
+
+def test_invalidations_are_told_to_the_listeners_unless_received():
+    cache = UserCache(ttl=60)
+    told = []
+    cache.on_invalidate(told.append)
+    cache.put(UserIdentity(id=1))
+    cache.put(UserIdentity(id=2))
+
+    cache.invalidate(1)
+    cache.invalidate(2, propagate=False)
+    assert cache.get(1) is None and cache.get(2) is None
+    assert told == [1]
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.items.models  # noqa: F401
+from app.middleware.user import load_user
+from app.models import Base
+from app.users.models import Role, User
+from app.users.service import upsert_user
+
+
+def create_session():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([Role(id=role_id, name=name) for role_id, name in enumerate(("superuser", "admin", "user"))])
+    session.commit()
+    return engine, session
+
+
+def test_upsert_is_one_statement_and_only_writes_given_fields():
+    engine, session = create_session()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    user = upsert_user(session, user_id=5, username="ann", first_name="Ann")
+    assert (user.lang, user.role_id, user.is_blocked) == ("en", 2, False)
+    assert len(statements) == 1 and "ON CONFLICT" in statements[0] and "RETURNING" in statements[0]
+
+    first_seen = user.first_message_timestamp
+    user = upsert_user(session, user_id="5", role_id=1)
+    assert (user.username, user.first_name, user.role_id) == ("ann", "Ann", 1)
+    # The activity tracker writes last_message_timestamp
+    assert user.first_message_timestamp == user.last_message_timestamp == first_seen
+    assert len(statements) == 2
+
+
+def test_upsert_leaves_the_transaction_to_the_caller():
+    engine, session = create_session()
+    upsert_user(session, user_id=5, username="ann")
+    assert session.is_active and session.in_transaction()
+
+    session.rollback()
+    assert session.get(User, 5) is None
+
+
+def test_middleware_commits_the_upsert_before_the_handler(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/bot.db", connect_args={"timeout": 0.1})
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        session.add(Role(id=2, name="user"))
+        session.commit()
+    handler_session, other_session = factory(), factory()
+
+    load_user(handler_session, SimpleNamespace(id=5, username="ann", first_name="Ann", last_name=None))
+    assert not handler_session.in_transaction()
+
+    # A slow handler keeps its session open, the upserts of other updates are not locked out
+    assert upsert_user(other_session, user_id=6, username="bob").id == 6
+    other_session.commit()
+    assert other_session.get(User, 5).username == "ann"
+    handler_session.close()
+    other_session.close()
+    engine.dispose()
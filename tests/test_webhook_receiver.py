@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import time
+
+from aiohttp.test_utils import TestClient, TestServer
+from telebot import TeleBot
+
+from app.dispatch.fake_telegram import FakeTelegramApi, make_message_update
+from app.dispatch.webhook import SECRET_TOKEN_HEADER, QueuedWebhookReceiver
+
+
+def test_receiver_acks_queues_and_applies_backpressure():
+    fake_api = FakeTelegramApi().install()
+    release = threading.Event()
+    started = threading.Event()
+    bot = TeleBot("1234567890:" + "A" * 35, threaded=False)
+
+    @bot.message_handler(func=lambda message: True)
+    def echo(message):
+        started.set()
+        release.wait(5)
+        bot.send_message(message.chat.id, message.text)
+
+    receiver = QueuedWebhookReceiver(bot, num_workers=1, queue_size=2, secret_token="secret")
+    headers = {SECRET_TOKEN_HEADER: "secret"}
+
+    async def scenario():
+        async with TestClient(TestServer(receiver.make_app("/webhook"))) as client:
+            forbidden = await client.post("/webhook", json=make_message_update(1, 10, "x"))
+            invalid = await client.post("/webhook", data=b"not json", headers=headers)
+
+            first = await client.post("/webhook", json=make_message_update(2, 10, "a"), headers=headers)
+            await asyncio.to_thread(started.wait, 5)
+            queued = [await client.post("/webhook", json=make_message_update(i, 10, str(i)), headers=headers) for i in (3, 4)]
+            rejected = await client.post("/webhook", json=make_message_update(5, 10, "x"), headers=headers)
+            return forbidden.status, invalid.status, first.status, [r.status for r in queued], rejected
+
+    try:
+        forbidden, invalid, first, queued, rejected = asyncio.run(scenario())
+        assert (forbidden, invalid, first, queued) == (403, 400, 200, [200, 200])
+        assert rejected.status == 429 and rejected.headers["Retry-After"] == "1"
+
+        release.set()
+        deadline = time.monotonic() + 5
+        while len(fake_api.calls_to("sendMessage")) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [call["text"] for call in fake_api.calls_to("sendMessage")] == ["a", "3", "4"]
+    finally:
+        release.set()
+        receiver.close()
+        FakeTelegramApi.uninstall()